@@ -28,11 +28,13 @@ from .command.command_copy import CommandCopy
 from .command.command_dbinfo import CommandDbinfo
 from .command.command_fastsync import CommandFastSync
 from .command.command_ghost_icx import CommandGhostICX
+from .command.command_index import CommandIndex
 from .command.command_iiss_data import CommandIISSData
 from .command.command_iiss_tx_data import CommandIISSTXData
 from .command.command_invalidtx import CommandInvalidTx
 from .command.command_lastblock import CommandLastBlock
 from .command.command_migrate import CommandMigrate
+from .command.command_statediff import CommandStateDiff
 from .command.command_statehash import CommandStateHash
 from .command.command_statelastblock import CommandStateLastBlock
 from .command.command_sync import CommandSync
@@ -41,9 +43,13 @@ from .command.command_token import CommandToken
 from .command.command_tps import CommandTps
 from .command.command_transactions import CommandTransactions
 from .command.command_txresult import CommandTxResult
+from .command.command_verify_cdb import CommandVerifyCDB
+from .command.command_verify_replay import CommandVerifyReplay
 from .command.command_prune import CommandPrune
 from .command.command_cp_preps import CommandCopyPReps
 from .command.command_get import CommandGet
+from .libs.block_cache import configure_block_cache
+from .utils.db import DBOptions, add_db_arguments, configure_db_options
 from .utils.timer import Timer
 
 
@@ -55,6 +61,7 @@ def main():
         CommandClear,
         CommandTxResult,
         CommandStateHash,
+        CommandStateDiff,
         CommandStateLastBlock,
         CommandAccount,
         CommandAccountExport,
@@ -75,7 +82,10 @@ def main():
         # Commands for compact db
         CommandCDB,
         CommandMigrate,
+        CommandIndex,
+        CommandVerifyCDB,
         CommandFastSync,
+        CommandVerifyReplay,
 
         # Pruning DB
         CommandPrune,
@@ -97,11 +107,17 @@ def main():
     args = parser.parse_args()
     # pprint(args)
 
+    # Commands which do not use common_parser have no block_cache_size
+    block_cache = configure_block_cache(getattr(args, "block_cache_size", 0))
+    configure_db_options(DBOptions.from_args(args))
+
     timer = Timer()
     timer.start()
     ret: int = args.func(args)
     timer.stop()
     print(f"elapsedTime: {timer.duration()} seconds")
+    if block_cache is not None:
+        print(f"blockCache: {block_cache}")
 
     return ret
 
@@ -111,6 +127,14 @@ def create_common_parser() -> argparse.ArgumentParser:
     parent_parser.add_argument(
         "--db", type=str, required=True,
     )
+    parent_parser.add_argument(
+        "--block-cache-size",
+        dest="block_cache_size",
+        type=int,
+        default=0,
+        help="Memory budget in bytes for caching blocks read from --db. 0 disables it",
+    )
+    add_db_arguments(parent_parser)
 
     return parent_parser
 
@@ -12,22 +12,49 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import contextlib
+import functools
 import json
+import os
+import shutil
 import subprocess
+import tempfile
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import (
+    IO,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Tuple,
+)
 
 from icondbtools.command.command import Command
 from icondbtools.libs.iiss_data_reader import IISSDataReader
+from icondbtools.libs.range_scan import (
+    MAX_CHUNKS,
+    RangeTask,
+    create_ranges,
+    get_reader,
+    map_ranges,
+)
 from icondbtools.libs.state_database_reader import StateDatabaseReader
 from icondbtools.libs.term_calculator import TermCalculator, Term
+from icondbtools.libs.total_balance import is_account_key
+from icondbtools.utils.external_sort import dump_items, external_sort, load_items
+from icondbtools.utils.json_stream import JsonObjectWriter, iter_json_object
+from icondbtools.utils.utils import remove_dir
 from iconservice.base.address import Address
 from iconservice.icon_constant import Revision
 from iconservice.icx.icx_account import Account
 from iconservice.icx.issue.storage import RegulatorVariable
 from iconservice.iiss.reward_calc.msg_data import TxData, TxType, DelegationTx
 
-from .command_total_balance import is_account_key
+EXPORT_FORMATS = ("json", "jsonl")
 
 revision_array = [
     0, 0, 0, 0, 0,
@@ -57,11 +84,36 @@ class CommandAccountExport(Command):
             type=Path,
             help="Path of reward calculator dbtool",
         )
+        parser_account.add_argument(
+            "--format",
+            type=str,
+            choices=EXPORT_FORMATS,
+            default="json",
+            help="json: a JSON object whose accounts are keyed by address, "
+            "jsonl: the header in the first line and an account per line",
+        )
+        parser_account.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="The number of processes to export key ranges with. "
+            "Each of them writes its own shard, which are concatenated in order",
+        )
+        parser_account.add_argument(
+            "--chunks",
+            type=int,
+            default=256,
+            help=f"Split keys into this number of ranges (max: {MAX_CHUNKS}). "
+            "Used with --workers",
+        )
         parser_account.set_defaults(func=self.run)
 
     def run(self, args):
         """Export the info of all account
 
+        Accounts are written to the result file as they are read,
+        so that memory does not grow with the number of accounts
+
         :param args:
         :return:
         """
@@ -69,8 +121,7 @@ class CommandAccountExport(Command):
         if db_path.is_dir() is False:
             raise ValueError("There is no state DB")
         iiss_db_path = db_path.parent / "iiss" / "current_db"
-        if iiss_db_path.is_dir():
-            export_iiss_data = True
+        export_iiss_data = iiss_db_path.is_dir()
         rc_db_path = db_path.parent / "rc" / "IScore"
         if rc_db_path.is_dir() is False:
             raise ValueError("There is no RC DB")
@@ -82,13 +133,14 @@ class CommandAccountExport(Command):
 
         try:
             reader.open(str(db_path))
+            reader.take_snapshot()
             block = reader.get_last_block()
             height = block.height
             revision = get_revision(height)
             print(f"BH: {height}, Revision: {revision}")
             term_calc = TermCalculator()
             term: Term = term_calc.calc_decentralization_term_info_by_block(height)
-            result = {
+            header = {
                 "blockHeight": height,
                 "termHeight": term.start_height,
                 "status": {
@@ -100,7 +152,7 @@ class CommandAccountExport(Command):
             bs = reader.get_by_key(b'regulator_variable')
             if bs is not None:
                 rv = RegulatorVariable.from_bytes(bs)
-                result["issue"] = {
+                header["issue"] = {
                     "issuedICX": rv.current_calc_period_issued_icx,
                     "prevIssuedICX": rv.prev_calc_period_issued_icx,
                     "overIssuedIScore": rv.over_issued_iscore,
@@ -108,7 +160,7 @@ class CommandAccountExport(Command):
 
             if export_iiss_data:
                 print(f"> Read IISS data from {iiss_db_path}")
-                result["front"] = {}
+                header["front"] = {}
                 iiss_reader = IISSDataReader()
                 iiss_reader.open(str(iiss_db_path))
                 iterator = iiss_reader.tx_iterator
@@ -116,47 +168,329 @@ class CommandAccountExport(Command):
                 for key, value in iterator:
                     tx = TxData.from_bytes(value)
                     iiss_event.append(iiss_tx_to_json(tx))
+                iiss_reader.close()
                 if len(iiss_event) > 0:
-                    result["front"]["event"] = iiss_event
-
-            print(f"> Read account information from {db_path}")
-            result["accounts"] = {}
-            i = 0
-            errors = 0
-            iterator = reader.iterator
-            for key, value in iterator:
-                try:
-                    if is_account_key(key):
-                        address = Address.from_bytes(key)
-                        account = reader.get_account(address, block.height, revision)
-                        result["accounts"][str(address)] = get_account_info(account, revision)
-                        i += 1
-                    else:
-                        continue
-                except BaseException as e:
-                    print(f"error {e}")
-                    errors += 1
+                    header["front"]["event"] = iiss_event
 
             print(f"> Get IScore information from {rc_db_path} via {rc_dbtool_path}")
             iscore_file = "./iscore.json"
             cmd = f"{rc_dbtool_path} iscore -dbroot {rc_db_path} -output {iscore_file}"
             popen = subprocess.Popen(cmd, stdout=subprocess.PIPE, shell=True)
             popen.communicate()
-            print(f"> Merge account and IScore information")
-            with open(iscore_file, 'r', encoding='utf-8') as jf:
-                iscore: dict = json.load(jf)
-                for key, value in iscore.items():
-                    if key in result["accounts"]:
-                        result["accounts"][key]["iscore"] = value
-
-            filename = f'./icon1_account_info_{height:08d}.json'
-            with open(filename, 'w', encoding='utf-8') as jf:
-                json.dump(result, jf, indent=2)
-            print(f"Get {i} accounts and {errors} errors. Check result file: {filename}")
+
+            filename = f'./icon1_account_info_{height:08d}.{args.format}'
+            if args.workers > 1:
+                # Workers open clones of statedb, which is locked while it is open
+                reader.close()
+                print(
+                    f"> Read account information from {db_path} "
+                    f"on {args.workers} processes"
+                )
+                count, errors = export_shards(
+                    str(db_path),
+                    header,
+                    revision,
+                    iscore_file,
+                    filename,
+                    args.format,
+                    args.chunks,
+                    args.workers,
+                )
+            else:
+                print(f"> Read account information from {db_path}")
+                with open(iscore_file, 'r', encoding='utf-8') as iscore_f, \
+                        open(filename, 'w', encoding='utf-8') as jf:
+                    accounts = AccountIterator(
+                        reader, block.height, revision, iter_sorted_iscores(iscore_f)
+                    )
+                    if args.format == "jsonl":
+                        write_jsonl(jf, header, accounts)
+                    else:
+                        write_json(jf, header, accounts)
+                count, errors = accounts.count, accounts.errors
+            print(
+                f"Get {count} accounts and {errors} errors. "
+                f"Check result file: {filename}"
+            )
         finally:
             reader.close()
 
 
+class AccountIterator(object):
+    """Read accounts in statedb key order and merge IScore sorted in the same order"""
+
+    def __init__(
+        self,
+        reader: StateDatabaseReader,
+        block_height: int,
+        revision: int,
+        iscores: Iterator[Tuple[bytes, Any]],
+        start: Optional[bytes] = None,
+        stop: Optional[bytes] = None,
+    ):
+        """
+        :param iscores: (account key, iscore) in ascending order of key
+        :param start: the first key to read, inclusive. None means the first key of db
+        :param stop: the last key to read, exclusive. None means the end of db
+        """
+        self._reader = reader
+        self._block_height = block_height
+        self._revision = revision
+        self._iscores = iscores
+        self._start = start
+        self._stop = stop
+        self.count = 0
+        self.errors = 0
+
+    def __iter__(self) -> Iterator[Tuple[str, dict]]:
+        """
+        :return: address and account info
+        """
+        iscore: Optional[Tuple[bytes, Any]] = next(self._iscores, None)
+
+        for key, value in self._reader.iterate(start=self._start, stop=self._stop):
+            if not is_account_key(key):
+                continue
+
+            try:
+                address = Address.from_bytes(key)
+                # The coin part is the value which has just been iterated
+                account = self._reader.create_account(
+                    address, value, self._block_height, self._revision
+                )
+                info = get_account_info(account, self._revision)
+            except BaseException as e:
+                print(f"error {e}")
+                self.errors += 1
+                continue
+
+            # Skip IScore of the addresses which have no account
+            while iscore is not None and iscore[0] < key:
+                iscore = next(self._iscores, None)
+            if iscore is not None and iscore[0] == key:
+                info["iscore"] = iscore[1]
+
+            self.count += 1
+            yield str(address), info
+
+
+def iter_sorted_iscores(fp: TextIO) -> Iterator[Tuple[bytes, Any]]:
+    """Read the output of rc dbtool and sort it by account key in statedb
+
+    :param fp: JSON object of which key is address and value is iscore
+    :return: (account key, iscore) in ascending order of key
+    """
+
+    def _iter_iscores() -> Iterator[Tuple[bytes, Any]]:
+        for address, iscore in iter_json_object(fp):
+            try:
+                key: bytes = Address.from_string(address).to_bytes()
+            except BaseException as e:
+                print(f"error {address}: {e}")
+                continue
+            yield key, iscore
+
+    # Sorted runs are spilled next to iscore.json
+    return external_sort(_iter_iscores(), key=itemgetter(0), dir_path=".")
+
+
+def write_json(fp: TextIO, header: dict, accounts: Iterable[Tuple[str, dict]]):
+    writer = JsonObjectWriter(fp, indent=2)
+    for key, value in header.items():
+        writer.write(key, value)
+
+    accounts_writer = writer.begin_object("accounts")
+    for address, info in accounts:
+        accounts_writer.write(address, info)
+    accounts_writer.close()
+
+    writer.close()
+
+
+def write_jsonl(fp: TextIO, header: dict, accounts: Iterable[Tuple[str, dict]]):
+    fp.write(json.dumps(header))
+    fp.write("\n")
+    write_jsonl_accounts(fp, accounts)
+
+
+def write_jsonl_accounts(fp: TextIO, accounts: Iterable[Tuple[str, dict]]):
+    for address, info in accounts:
+        fp.write(json.dumps({"address": address, **info}))
+        fp.write("\n")
+
+
+class ShardContext(NamedTuple):
+    block_height: int
+    revision: int
+    # The directory where iscore and account shards are written
+    shard_path: str
+    export_format: str
+
+
+def _get_shard_path(shard_path: str, name: str, index: int) -> str:
+    return os.path.join(shard_path, f"{name}-{index:05d}")
+
+
+def split_iscores(
+    iscores: Iterator[Tuple[bytes, Any]],
+    ranges: List[Tuple[Optional[bytes], Optional[bytes]]],
+    shard_path: str,
+):
+    """Write sorted iscores to the shard of the key range each of them belongs to
+
+    :param iscores: (account key, iscore) in ascending order of key
+    :param ranges: (start, stop) in ascending order, which cover the whole key space
+    """
+    index = 0
+    f: Optional[IO[bytes]] = None
+
+    try:
+        for item in iscores:
+            key: bytes = item[0]
+            if ranges[index][1] is not None and key >= ranges[index][1]:
+                while ranges[index][1] is not None and key >= ranges[index][1]:
+                    index += 1
+                if f is not None:
+                    f.close()
+                    f = None
+
+            if f is None:
+                f = open(_get_shard_path(shard_path, "iscore", index), "wb")
+            dump_items((item,), f)
+    finally:
+        if f is not None:
+            f.close()
+
+
+def _export_range(context: ShardContext, task: RangeTask) -> Tuple[int, int]:
+    """Export the accounts in a key range to its own shard
+
+    :return: the number of accounts and errors
+    """
+    index, start, stop = task
+
+    iscore_path: str = _get_shard_path(context.shard_path, "iscore", index)
+    account_path: str = _get_shard_path(context.shard_path, "account", index)
+
+    with contextlib.ExitStack() as stack:
+        iscores: Iterator[Tuple[bytes, Any]] = iter(())
+        if os.path.exists(iscore_path):
+            iscores = load_items(stack.enter_context(open(iscore_path, "rb")))
+
+        accounts = AccountIterator(
+            get_reader(),
+            context.block_height,
+            context.revision,
+            iscores,
+            start=start,
+            stop=stop,
+        )
+
+        with open(account_path, "w", encoding="utf-8") as f:
+            write_account_shard(f, accounts, context.export_format)
+
+    return accounts.count, accounts.errors
+
+
+def write_account_shard(
+    fp: TextIO, accounts: Iterable[Tuple[str, dict]], export_format: str
+):
+    """Write accounts in a key range to be concatenated by concat_account_shards()"""
+    if export_format == "jsonl":
+        write_jsonl_accounts(fp, accounts)
+    else:
+        writer = JsonObjectWriter(fp, indent=2, level=1, fragment=True)
+        for address, info in accounts:
+            writer.write(address, info)
+
+
+def concat_account_shards(
+    fp: TextIO,
+    header: dict,
+    shard_paths: List[str],
+    counts: List[int],
+    export_format: str,
+):
+    """Write the same output as write_json() or write_jsonl() with account shards
+
+    :param shard_paths: the shards written by write_account_shard() in key order
+    :param counts: the number of accounts in each shard
+    """
+    if export_format == "jsonl":
+        fp.write(json.dumps(header))
+        fp.write("\n")
+        for path in shard_paths:
+            with open(path, "r", encoding="utf-8") as f:
+                shutil.copyfileobj(f, fp)
+        return
+
+    writer = JsonObjectWriter(fp, indent=2)
+    for key, value in header.items():
+        writer.write(key, value)
+
+    accounts_writer = writer.begin_object("accounts")
+    for path, count in zip(shard_paths, counts):
+        with open(path, "r", encoding="utf-8") as f:
+            accounts_writer.copy_members(f, count)
+    accounts_writer.close()
+
+    writer.close()
+
+
+def export_shards(
+    db_path: str,
+    header: dict,
+    revision: int,
+    iscore_file: str,
+    filename: str,
+    export_format: str,
+    chunks: int,
+    workers: int,
+) -> Tuple[int, int]:
+    """Export accounts in key ranges on worker processes and concatenate the shards
+
+    :return: the number of accounts and errors
+    """
+    block_height: int = header["blockHeight"]
+    ranges = create_ranges(chunks)
+
+    # Shards are written next to the result file
+    shard_path: str = tempfile.mkdtemp(
+        prefix=".account_export-", dir=os.path.dirname(os.path.abspath(filename))
+    )
+    try:
+        with open(iscore_file, "r", encoding="utf-8") as f:
+            split_iscores(iter_sorted_iscores(f), ranges, shard_path)
+
+        context = ShardContext(block_height, revision, shard_path, export_format)
+        block, results = map_ranges(
+            db_path,
+            functools.partial(_export_range, context),
+            chunks,
+            workers,
+            read_base=StateDatabaseReader.get_last_block,
+        )
+        if block is None or block.height != block_height:
+            raise ValueError(f"statedb has been changed during export: {block}")
+
+        print(f"> Concatenate {len(results)} shards")
+        with open(filename, "w", encoding="utf-8") as jf:
+            concat_account_shards(
+                jf,
+                header,
+                [
+                    _get_shard_path(shard_path, "account", index)
+                    for index in range(len(results))
+                ],
+                [count for count, _ in results],
+                export_format,
+            )
+    finally:
+        remove_dir(shard_path)
+
+    return sum(count for count, _ in results), sum(errors for _, errors in results)
+
+
 def get_account_info(account: 'Account', revision: int) -> dict:
     info = {"balance": account.balance}
     if account.stake_part is not None:
@@ -18,7 +18,11 @@ from typing import TYPE_CHECKING, List
 from icondbtools.command.command import Command
 from iconservice.base.address import Address
 from ..libs.balance_calculator import BalanceCalculator, StakeInfo
-from ..libs.transaction_collector import TransactionCollector
+from ..fastsync.block_reader import BLOCK_FORMATS
+from ..libs.transaction_collector import (
+    TransactionCollector,
+    CompactTransactionCollector,
+)
 from ..utils.convert_type import bytes_to_hex
 
 if TYPE_CHECKING:
@@ -73,6 +77,19 @@ class CommandBalance(Command):
             default=False,
             help="Show the result in more detail",
         )
+        parser_balance.add_argument(
+            "--compact",
+            action="store_true",
+            default=False,
+            help="--db is compact db migrated with --tx-results",
+        )
+        parser_balance.add_argument(
+            "--format",
+            dest="block_format",
+            choices=BLOCK_FORMATS,
+            default="leveldb",
+            help="Format of compact db given with --db. Used with --compact",
+        )
 
         parser_balance.set_defaults(func=self.run)
 
@@ -90,9 +107,17 @@ class CommandBalance(Command):
         else:
             end = -1
 
-        transaction_collector = TransactionCollector()
+        if args.compact:
+            transaction_collector = CompactTransactionCollector(args.block_format)
+        else:
+            transaction_collector = TransactionCollector()
         transaction_collector.open(db_path)
 
+        if args.compact and not transaction_collector.has_tx_results:
+            transaction_collector.close()
+            print(CompactTransactionCollector.NO_TX_RESULTS_MESSAGE)
+            return 1
+
         if path:
             it = transaction_collector.run_with_file(path)
         else:
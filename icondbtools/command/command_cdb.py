@@ -13,8 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from pprint import pprint
+
 from .command import Command
-from ..fastsync.block_reader import BlockDatabaseReader
+from ..fastsync.block_reader import (
+    BLOCK_FORMATS,
+    BlockDatabaseReader,
+    create_block_reader,
+)
+from ..fastsync.segment_reader import NO_INDEX_MESSAGE, SegmentBlockReader
 from ..migrate.block import Block
 from ..utils.convert_type import hex_to_bytes
 
@@ -41,12 +48,25 @@ class CommandCDB(Command):
             required=False,
             help="Print block indicated by a given hash",
         )
+        parser.add_argument(
+            "--tx-hash",
+            type=hex_to_bytes,
+            required=False,
+            help="Print transaction indicated by a given hash",
+        )
+        parser.add_argument(
+            "--format",
+            dest="block_format",
+            choices=BLOCK_FORMATS,
+            default="leveldb",
+            help="Format of compact block db given with --db",
+        )
         parser.set_defaults(func=self.run)
 
     def run(self, args):
         db_path: str = args.db
 
-        block_reader = BlockDatabaseReader()
+        block_reader = create_block_reader(args.block_format)
         try:
             block_reader.open(db_path)
 
@@ -55,7 +75,13 @@ class CommandCDB(Command):
             if hasattr(args, "block_height") and isinstance(args.block_height, int):
                 self._print_block_by_height(block_reader, args.block_height)
             elif hasattr(args, "block_hash") and isinstance(args.block_hash, bytes):
+                if not self._check_hash_index(block_reader):
+                    return 1
                 self._print_block_by_hash(block_reader, args.block_hash)
+            elif hasattr(args, "tx_hash") and isinstance(args.tx_hash, bytes):
+                if not self._check_hash_index(block_reader):
+                    return 1
+                self._print_transaction_by_hash(block_reader, args.tx_hash)
 
         finally:
             block_reader.close()
@@ -66,6 +92,14 @@ class CommandCDB(Command):
         end_height: int = block_reader.get_end_block_height()
         print(f"block range: {start_height} ~ {end_height}")
 
+    @classmethod
+    def _check_hash_index(cls, block_reader: BlockDatabaseReader) -> bool:
+        if isinstance(block_reader, SegmentBlockReader):
+            print(NO_INDEX_MESSAGE)
+            return False
+
+        return True
+
     @classmethod
     def _print_block_by_height(
         cls, block_reader: BlockDatabaseReader, block_height: int
@@ -76,8 +110,31 @@ class CommandCDB(Command):
     @classmethod
     def _print_block_by_hash(cls, block_reader: BlockDatabaseReader, block_hash: bytes):
         block = block_reader.get_block_by_hash(block_hash)
+        if block is None:
+            print(
+                f"block not found: {block_hash.hex()}\n"
+                f"Run 'index' command if the db was migrated without block_hash index"
+            )
+            return
+
         cls._print_block(block)
 
+    @classmethod
+    def _print_transaction_by_hash(
+        cls, block_reader: BlockDatabaseReader, tx_hash: bytes
+    ):
+        height, index = block_reader.get_transaction_index_by_hash(tx_hash)
+        if height < 0:
+            print(
+                f"transaction not found: {tx_hash.hex()}\n"
+                f"Run 'index' command if the db was migrated without tx_hash index"
+            )
+            return
+
+        tx: dict = block_reader.get_transaction_by_hash(tx_hash)
+        print(f"block_height={height} index={index}")
+        pprint(tx)
+
     @classmethod
     def _print_block(cls, block: Block):
         print(block)
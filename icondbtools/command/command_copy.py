@@ -16,8 +16,6 @@
 import json
 from typing import Optional, Tuple
 
-import plyvel
-
 from icondbtools.command.command import Command
 from icondbtools.libs import (
     NID_KEY,
@@ -31,6 +29,7 @@ from icondbtools.libs.block_database_raw_reader import (
     BlockDatabaseRawReader,
     TransactionParser,
 )
+from icondbtools.utils.db import open_db
 
 
 class CommandCopy(Command):
@@ -80,29 +79,28 @@ class CommandCopy(Command):
 
         block_reader = BlockDatabaseRawReader()
         block_reader.open(db_path)
-        new_db = plyvel.DB(new_db_path, create_if_missing=True)
+        new_db = open_db(new_db_path, create_if_missing=True, for_write=True)
 
         last_block: Optional[bytes] = None
-        height = start
         wb_size = 1000
+        wb = new_db.write_batch()
 
-        while height < end:
-            with new_db.write_batch() as wb:
-                # Write batch_data to leveldb every 10000 blocks
-                for _ in range(wb_size):
-                    block: bytes = block_reader.get_block_by_height(height)
-                    if block is None:
-                        height = end
-                        break
+        for height, block_hash_key, block in block_reader.iter_blocks(
+            start, end - 1, batch_size=wb_size
+        ):
+            # Copy a block data from source db to target db
+            self._copy_block(wb, block_reader, block, height, block_hash_key)
+            last_block = block
 
-                    # Copy a block data from source db to target db
-                    self._copy_block(wb, block_reader, block, height)
+            # Write batch_data to leveldb every wb_size blocks
+            if (height - start + 1) % wb_size == 0:
+                wb.write()
+                wb.clear()
 
-                    height += 1
-                    last_block = block
+                # Display copy progress status
+                print(".", end="", flush=True)
 
-            # Display copy progress status
-            print(".", end="", flush=True)
+        wb.write()
 
         if last_block:
             with new_db.write_batch() as wb:
@@ -111,9 +109,11 @@ class CommandCopy(Command):
         block_reader.close()
 
     @classmethod
-    def _copy_block(cls, wb, block_reader, block: bytes, height: int):
+    def _copy_block(
+        cls, wb, block_reader, block: bytes, height: int, block_hash_key: bytes
+    ):
         cls._write_transactions(wb, block_reader, block)
-        cls._write_block(wb, block_reader, block, height)
+        cls._write_block(wb, block_reader, block, height, block_hash_key)
         cls._write_reps_data(wb, block_reader, block)
 
     @classmethod
@@ -131,9 +131,10 @@ class CommandCopy(Command):
                 wb.put(tx_hash_key, full_transaction)
 
     @classmethod
-    def _write_block(cls, wb, block_reader, block: bytes, height: int):
+    def _write_block(
+        cls, wb, block_reader, block: bytes, height: int, block_hash_key: bytes
+    ):
         block_height_key: bytes = block_reader.get_block_height_key(height)
-        block_hash_key: bytes = block_reader.get_block_hash_key_by_height(height)
         wb.put(block_hash_key, block)
         wb.put(block_height_key, block_hash_key)
 
@@ -17,7 +17,10 @@ from typing import TYPE_CHECKING, Optional
 
 from .command import Command
 from ..libs.state_database_reader import StateDatabaseReader
+from ..fastsync.block_reader import BLOCK_FORMATS
 from ..fastsync.icon_service_syncer import IconServiceSyncer
+from ..fastsync.sync_cursor import DEFAULT_CURSOR_PATH, SyncCursor
+from ..utils.backup import BACKUP_MODES
 
 if TYPE_CHECKING:
     from iconservice.base.block import Block
@@ -89,6 +92,21 @@ class CommandFastSync(Command):
             default=0,
             help="Backup statedb every this period blocks",
         )
+        parser.add_argument(
+            "--backup-mode",
+            dest="backup_mode",
+            choices=BACKUP_MODES,
+            default="copy",
+            help="copy: copy all files, "
+            "hardlink: hardlink leveldb table files and copy the others",
+        )
+        parser.add_argument(
+            "--backup-keep",
+            dest="backup_keep",
+            type=int,
+            default=0,
+            help="Keep only the last this number of statedb backups. 0 means all",
+        )
         parser.add_argument(
             "--is-config", type=str, default="", help="iconservice_config.json filepath"
         )
@@ -105,6 +123,44 @@ class CommandFastSync(Command):
             help="Backup all IISS DBs to specified path. "
             "If IISS DB is already exists on the path, overwrite it",
         )
+        parser.add_argument(
+            "--prefetch-depth",
+            dest="prefetch_depth",
+            type=int,
+            default=16,
+            help="The number of blocks to read and convert ahead of invoke",
+        )
+        parser.add_argument(
+            "--metrics-file",
+            dest="metrics_path",
+            type=str,
+            default=None,
+            help="Dump the time spent in each stage per block to the file. "
+            "CSV if it ends with .csv, otherwise JSONL",
+        )
+        parser.add_argument(
+            "--metrics-period",
+            dest="metrics_period",
+            type=int,
+            default=0,
+            help="Print the stage metrics summary every this period blocks. "
+            "0 means only at the end",
+        )
+        parser.add_argument(
+            "--cursor",
+            dest="cursor_path",
+            type=str,
+            default=DEFAULT_CURSOR_PATH,
+            help="File to save the sync state to after each commit. "
+            "Without --start, fastsync resumes from it. Empty string disables it",
+        )
+        parser.add_argument(
+            "--format",
+            dest="block_format",
+            choices=BLOCK_FORMATS,
+            default="leveldb",
+            help="Format of compact block db given with --db",
+        )
         parser.set_defaults(func=self.run)
 
     def run(self, args):
@@ -122,24 +178,35 @@ class CommandFastSync(Command):
         score_package_validator: bool = args.score_package_validator
         channel: str = args.channel
         backup_period: int = args.backup_period
+        backup_mode: str = args.backup_mode
+        backup_keep: int = args.backup_keep
         iconservice_config_path: str = args.is_config
         print_block_height: int = args.print_block_height
         iiss_db_backup_path: Optional[str] = args.iiss_db_backup_path
+        prefetch_depth: int = args.prefetch_depth
+        metrics_path: Optional[str] = args.metrics_path
+        metrics_period: int = args.metrics_period
+        cursor_path: str = args.cursor_path
 
         reader = StateDatabaseReader()
+        last_block: Optional["Block"] = None
 
         # If --start option is not present, set start point to the last block height from statedb
         if start < 0:
             try:
                 state_db_path = ".statedb/icon_dex"
                 reader.open(state_db_path)
-                block: "Block" = reader.get_last_block()
-                start = block.height + 1
+                last_block = reader.get_last_block()
+                start = last_block.height + 1
             except:
                 start = 0
             finally:
                 reader.close()
 
+        cursor: Optional[SyncCursor] = None
+        if cursor_path and last_block is not None:
+            cursor = self._load_cursor(cursor_path, last_block)
+
         if end > -1:
             if end < start:
                 raise ValueError(f"end({end} < start({start})")
@@ -158,8 +225,14 @@ class CommandFastSync(Command):
 
         if print_block_height < 1:
             raise ValueError(f"print block height should be more than 0")
+        if backup_keep < 0:
+            raise ValueError(f"backup keep should be 0 or more")
+        if prefetch_depth < 1:
+            raise ValueError(f"prefetch depth should be more than 0")
+        if metrics_period < 0:
+            raise ValueError(f"metrics period should be 0 or more")
 
-        syncer = IconServiceSyncer()
+        syncer = IconServiceSyncer(block_format=args.block_format)
         try:
             syncer.open(
                 config_path=iconservice_config_path,
@@ -178,9 +251,32 @@ class CommandFastSync(Command):
                 no_commit=no_commit,
                 write_precommit_data=write_precommit_data,
                 backup_period=backup_period,
+                backup_mode=backup_mode,
+                backup_keep=backup_keep,
                 print_block_height=print_block_height,
                 iiss_db_backup_path=iiss_db_backup_path,
+                prefetch_depth=prefetch_depth,
+                metrics_path=metrics_path,
+                metrics_period=metrics_period,
+                cursor=cursor,
+                cursor_path=cursor_path,
             )
         finally:
             syncer.close()
             print("\n")
+
+    @staticmethod
+    def _load_cursor(cursor_path: str, last_block: "Block") -> Optional[SyncCursor]:
+        try:
+            cursor: Optional[SyncCursor] = SyncCursor.load(cursor_path)
+            if cursor is None:
+                print(f"cursor: not found")
+                return None
+
+            cursor.check(last_block)
+        except (KeyError, ValueError) as e:
+            # e.g. killed between commit and saving the cursor
+            print(f"cursor ignored: {e}")
+            return None
+
+        return cursor
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from icondbtools.command.command import Command
+from ..migrate.block_indexer import BlockIndexer
+
+
+class CommandIndex(Command):
+    def __init__(self, sub_parser, common_parser):
+        self.add_parser(sub_parser, common_parser)
+
+    def add_parser(self, sub_parser, common_parser):
+        name = "index"
+        desc = "Add block_hash and tx_hash indexes to compact db created by migrate"
+
+        parser = sub_parser.add_parser(name, parents=[common_parser], help=desc)
+        parser.set_defaults(func=self.run)
+
+    def run(self, args):
+        db_path: str = args.db
+
+        block_indexer = BlockIndexer()
+        block_indexer.open(db_path)
+        try:
+            block_indexer.run()
+        finally:
+            block_indexer.close()
@@ -16,7 +16,9 @@
 from typing import Tuple
 
 from icondbtools.command.command import Command
+from ..fastsync.block_reader import BLOCK_FORMATS
 from ..migrate.block_migrator import BlockMigrator
+from ..migrate.segment import DEFAULT_SEGMENT_SIZE
 
 
 class CommandMigrate(Command):
@@ -40,7 +42,8 @@ class CommandMigrate(Command):
             "--start",
             type=int,
             default=-1,
-            help="start block height to be copied",
+            help="start block height to be copied. "
+            "If omitted, resume from the block next to the last one in the new db",
         )
         parser.add_argument(
             "--end",
@@ -54,6 +57,81 @@ class CommandMigrate(Command):
         parser.add_argument(
             "--new-db", type=str, default="", help="new DB path for blocks to be copied"
         )
+        parser.add_argument(
+            "--tx-results",
+            dest="tx_results",
+            action="store_true",
+            default=False,
+            help="Migrate transaction results as well as blocks",
+        )
+        parser.add_argument(
+            "--compression",
+            type=str,
+            choices=("none", "zlib", "zstd"),
+            default="none",
+            help="Compress blocks with a dictionary trained on sample blocks. "
+            "zstd needs zstandard package",
+        )
+        parser.add_argument(
+            "--dict-samples",
+            dest="dict_samples",
+            type=int,
+            default=1000,
+            help="The number of sample blocks to train a compression dictionary with. "
+            "0 means no dictionary",
+        )
+        parser.add_argument(
+            "--dict-size",
+            dest="dict_size",
+            type=int,
+            default=112_640,
+            help="Max compression dictionary size in bytes. zlib uses 32KB at most",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            dest="chunk_size",
+            type=int,
+            default=0,
+            help="Pack this number of consecutive blocks into one value. "
+            "0 means one value per block. "
+            "It can not be changed once blocks are written to the new db",
+        )
+        parser.add_argument(
+            "--format",
+            dest="block_format",
+            choices=BLOCK_FORMATS,
+            default="leveldb",
+            help="leveldb: compact db, segment: append-only segment archive. "
+            "segment archive has neither indexes, transaction results, "
+            "compression nor chunks",
+        )
+        parser.add_argument(
+            "--segment-size",
+            dest="segment_size",
+            type=int,
+            default=DEFAULT_SEGMENT_SIZE,
+            help="Max segment file size in bytes for segment archive",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="The number of processes to convert loopchain blocks with. "
+            "Blocks are still read and written in height order on the main process",
+        )
+        parser.add_argument(
+            "--follow",
+            action="store_true",
+            default=False,
+            help="Keep migrating new blocks as they are written to loopchain db. "
+            "--end and --count are not allowed",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls for new blocks in --follow mode",
+        )
         parser.set_defaults(func=self.run)
 
     def run(self, args):
@@ -62,13 +140,48 @@ class CommandMigrate(Command):
         end: int = args.end
         count: int = args.count
         new_db_path: str = args.new_db
+        tx_results: bool = args.tx_results
+        compression: str = args.compression
 
-        start, count = self._get_block_range(start, end, count)
+        if args.workers < 1:
+            raise ValueError(f"workers should be more than 0")
+        if args.follow and (end > -1 or count > -1):
+            raise ValueError(f"--end and --count are not allowed with --follow")
 
-        block_migrator = BlockMigrator()
+        block_migrator = BlockMigrator(
+            tx_results=tx_results,
+            compression=None if compression == "none" else compression,
+            dict_samples=args.dict_samples,
+            dict_size=args.dict_size,
+            chunk_size=args.chunk_size,
+            block_format=args.block_format,
+            segment_size=args.segment_size,
+            workers=args.workers,
+        )
         block_migrator.open(db_path, new_db_path)
-        block_migrator.run(start, count)
-        block_migrator.close()
+        try:
+            if start < 0:
+                start = block_migrator.get_resume_height()
+                print(f"resume: start={start}")
+
+            if args.follow:
+                block_migrator.follow(start, args.interval)
+                return
+
+            start, count = self._get_block_range(start, end, count)
+            if count > 0:
+                block_migrator.run(start, count)
+
+                # Migration stops at the last block in loopchain db
+                blocks_done: int = block_migrator.blocks_done
+                if (end > -1 or args.count > -1) and blocks_done < count:
+                    print(
+                        f"Only {blocks_done}/{count} blocks migrated: "
+                        f"no block data from BH={start + blocks_done}"
+                    )
+                    return 1
+        finally:
+            block_migrator.close()
 
     @classmethod
     def _get_block_range(cls, start: int, end: int, count: int) -> Tuple[int, int]:
@@ -76,8 +189,9 @@ class CommandMigrate(Command):
         :return: start block and the number of blocks to migrate
         """
         if end > -1:
-            if end < start:
+            if end < start - 1:
                 raise ValueError(f"end({end} < start({start})")
+            # end == start - 1 means that there is nothing to resume
             count = max(count, end - start + 1)
         elif count == -1:
             count = cls.MAX_COPY_BLOCK_COUNT
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List, Optional
+
+from iconservice.base.address import Address
+from iconservice.icx.coin_part import CoinPart
+from iconservice.icx.delegation_part import DelegationPart
+from iconservice.icx.stake_part import StakePart
+
+from .command import Command
+from ..libs.state_database_reader import StateDatabaseReader
+from ..libs.state_diff import DiffCounter, StateDiff, diff_items
+from ..libs.total_balance import is_account_key
+
+
+class CommandStateDiff(Command):
+    def __init__(self, sub_parser, common_parser):
+        self.add_parser(sub_parser, common_parser)
+
+    def add_parser(self, sub_parser, common_parser):
+        name = "statediff"
+        desc = "Print keys added, removed or changed from statedb given with --db to --db2"
+
+        parser = sub_parser.add_parser(name, parents=[common_parser], help=desc)
+        parser.add_argument(
+            "--db2", type=str, required=True, help="statedb path to compare with --db"
+        )
+        parser.add_argument(
+            "--prefix",
+            dest="prefixes",
+            type=str,
+            action="append",
+            default=None,
+            help="Compare only keys which start with a given prefix in hex. "
+            "It can be given multiple times",
+        )
+        parser.add_argument(
+            "--max-diffs",
+            dest="max_diffs",
+            type=int,
+            default=100,
+            help="Stop after this number of differences. 0 means no limit",
+        )
+        parser.set_defaults(func=self.run)
+
+    def run(self, args) -> int:
+        prefixes: List[Optional[bytes]] = [None]
+        if args.prefixes:
+            prefixes = _merge_prefixes(
+                [_hex_to_bytes(prefix) for prefix in args.prefixes]
+            )
+        max_diffs: int = args.max_diffs
+        if max_diffs < 0:
+            raise ValueError(f"Invalid max diffs: {max_diffs}")
+
+        old_reader = StateDatabaseReader()
+        new_reader = StateDatabaseReader()
+        counter = DiffCounter()
+
+        try:
+            old_reader.open(args.db)
+            new_reader.open(args.db2)
+            old_reader.take_snapshot()
+            new_reader.take_snapshot()
+            _print_block_heights(old_reader, new_reader)
+
+            diffs = (
+                diff
+                for prefix in prefixes
+                for diff in diff_items(
+                    old_reader.iterate(prefix), new_reader.iterate(prefix), counter
+                )
+            )
+            for diff in diffs:
+                print(format_diff(diff))
+                if counter.diffs == max_diffs:
+                    print(f"Stopped at {max_diffs} differences")
+                    break
+        finally:
+            old_reader.close()
+            new_reader.close()
+
+        print(counter)
+        return 0 if counter.diffs == 0 else 1
+
+
+def _hex_to_bytes(value: str) -> bytes:
+    if value.startswith("0x"):
+        value = value[2:]
+    return bytes.fromhex(value)
+
+
+def _merge_prefixes(prefixes: List[bytes]) -> List[bytes]:
+    """Sort prefixes and drop the ones covered by a shorter one
+
+    Otherwise the keys under both of them would be compared twice
+    """
+    merged: List[bytes] = []
+    for prefix in sorted(set(prefixes)):
+        if not merged or not prefix.startswith(merged[-1]):
+            merged.append(prefix)
+
+    return merged
+
+
+def _print_block_heights(old_reader: StateDatabaseReader, new_reader: StateDatabaseReader):
+    for name, reader in (("db", old_reader), ("db2", new_reader)):
+        block = reader.get_last_block()
+        print(f"{name} block height: {-1 if block is None else block.height}")
+
+
+def format_diff(diff: StateDiff) -> str:
+    lines = [f"{diff.type.value} {describe_key(diff.key)}"]
+    if diff.old_value is not None:
+        lines.append(f"  - {describe_value(diff.key, diff.old_value)}")
+    if diff.new_value is not None:
+        lines.append(f"  + {describe_value(diff.key, diff.new_value)}")
+
+    return "\n".join(lines)
+
+
+def describe_key(key: bytes) -> str:
+    """Add the address of account keys to the key in hex"""
+    address: Optional[Address] = None
+
+    try:
+        if is_account_key(key):
+            address = Address.from_bytes(key)
+        elif key.startswith((StakePart.PREFIX, DelegationPart.PREFIX)):
+            address = Address.from_bytes_including_prefix(key[len(StakePart.PREFIX):])
+    except BaseException:
+        pass
+
+    return key.hex() if address is None else f"{key.hex()} ({address})"
+
+
+def describe_value(key: bytes, value: bytes) -> str:
+    """Decode CoinPart, StakePart and DelegationPart. Others are printed in hex"""
+    try:
+        if is_account_key(key):
+            part = CoinPart.from_bytes(value)
+            return (
+                f"CoinPart(type={part.type} flags={part.flags} balance={part.balance})"
+            )
+        elif key.startswith(StakePart.PREFIX):
+            part = StakePart.from_bytes(value)
+            # Properties of StakePart assert that it is complete
+            part.set_complete(True)
+            return (
+                f"StakePart(stake={part.stake} unstake={part.unstake} "
+                f"unstake_block_height={part.unstake_block_height})"
+            )
+        elif key.startswith(DelegationPart.PREFIX):
+            part = DelegationPart.from_bytes(value)
+            delegations: str = ", ".join(
+                f"{address}: {amount}" for address, amount in part.delegations
+            )
+            return (
+                f"DelegationPart(delegated_amount={part.delegated_amount} "
+                f"delegations=[{delegations}])"
+            )
+    except BaseException:
+        pass
+
+    return value.hex()
@@ -16,6 +16,11 @@
 from pprint import pprint
 
 from icondbtools.command.command import Command
+from icondbtools.libs.chunked_state_hash import (
+    ChunkedStateHash,
+    create_chunked_state_hash,
+)
+from icondbtools.libs.range_scan import MAX_CHUNKS
 from icondbtools.libs.state_database_reader import StateDatabaseReader, StateHash
 
 
@@ -37,6 +42,20 @@ class CommandStateHash(Command):
             default=None,
             help="Generate a state hash using data of which keys start with a given prefix",
         )
+        parser_state_hash.add_argument(
+            "--chunks",
+            type=int,
+            default=0,
+            help=f"Split keys into this number of ranges (max: {MAX_CHUNKS}) "
+            "and combine their hashes into a merkle root. "
+            "0 hashes all keys in order as before",
+        )
+        parser_state_hash.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="The number of processes to hash ranges with. Used with --chunks",
+        )
         parser_state_hash.set_defaults(func=self.run)
 
     def run(self, args):
@@ -48,8 +67,19 @@ class CommandStateHash(Command):
         db_path: str = args.db
         prefix: str = args.prefix
 
+        if args.chunks > 0:
+            if prefix is not None:
+                raise ValueError("--prefix can not be used with --chunks")
+
+            chunked_state_hash: "ChunkedStateHash" = create_chunked_state_hash(
+                db_path, args.chunks, args.workers
+            )
+            print(chunked_state_hash)
+            return
+
         reader = StateDatabaseReader()
         reader.open(db_path)
+        reader.take_snapshot()
 
         # convert hex string to bytes
         if prefix is not None:
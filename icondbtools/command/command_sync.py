@@ -18,6 +18,7 @@ from typing import TYPE_CHECKING, Optional
 from icondbtools.command.command import Command
 from icondbtools.libs.icon_service_syncer import IconServiceSyncer
 from icondbtools.libs.state_database_reader import StateDatabaseReader
+from icondbtools.utils.backup import BACKUP_MODES
 
 if TYPE_CHECKING:
     from iconservice.base.block import Block
@@ -91,6 +92,21 @@ class CommandSync(Command):
             default=0,
             help="Backup statedb every this period blocks",
         )
+        parser_sync.add_argument(
+            "--backup-mode",
+            dest="backup_mode",
+            choices=BACKUP_MODES,
+            default="copy",
+            help="copy: copy all files, "
+            "hardlink: hardlink leveldb table files and copy the others",
+        )
+        parser_sync.add_argument(
+            "--backup-keep",
+            dest="backup_keep",
+            type=int,
+            default=0,
+            help="Keep only the last this number of statedb backups. 0 means all",
+        )
         parser_sync.add_argument(
             "--is-config", type=str, default="", help="iconservice_config.json filepath"
         )
@@ -107,6 +123,22 @@ class CommandSync(Command):
             help="Backup all IISS DBs to specified path. "
             "If IISS DB is already exists on the path, overwrite it",
         )
+        parser_sync.add_argument(
+            "--metrics-file",
+            dest="metrics_path",
+            type=str,
+            default=None,
+            help="Dump the time spent in each stage per block to the file. "
+            "CSV if it ends with .csv, otherwise JSONL",
+        )
+        parser_sync.add_argument(
+            "--metrics-period",
+            dest="metrics_period",
+            type=int,
+            default=0,
+            help="Print the stage metrics summary every this period blocks. "
+            "0 means only at the end",
+        )
         parser_sync.set_defaults(func=self.run)
 
     def run(self, args):
@@ -124,9 +156,13 @@ class CommandSync(Command):
         score_package_validator: bool = args.score_package_validator
         channel: str = args.channel
         backup_period: int = args.backup_period
+        backup_mode: str = args.backup_mode
+        backup_keep: int = args.backup_keep
         iconservice_config_path: str = args.is_config
         print_block_height: int = args.print_block_height
         iiss_db_backup_path: Optional[str] = args.iiss_db_backup_path
+        metrics_path: Optional[str] = args.metrics_path
+        metrics_period: int = args.metrics_period
 
         reader = StateDatabaseReader()
 
@@ -160,6 +196,10 @@ class CommandSync(Command):
 
         if print_block_height < 1:
             raise ValueError(f"print block height should be more than 0")
+        if backup_keep < 0:
+            raise ValueError(f"backup keep should be 0 or more")
+        if metrics_period < 0:
+            raise ValueError(f"metrics period should be 0 or more")
 
         syncer = IconServiceSyncer()
         try:
@@ -180,8 +220,12 @@ class CommandSync(Command):
                 no_commit=no_commit,
                 write_precommit_data=write_precommit_data,
                 backup_period=backup_period,
+                backup_mode=backup_mode,
+                backup_keep=backup_keep,
                 print_block_height=print_block_height,
                 iiss_db_backup_path=iiss_db_backup_path,
+                metrics_path=metrics_path,
+                metrics_period=metrics_period,
             )
         finally:
             syncer.close()
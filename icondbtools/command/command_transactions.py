@@ -18,7 +18,12 @@ from typing import TYPE_CHECKING
 from iconservice.base.address import Address
 
 from ..command.command import Command
-from ..libs.transaction_collector import TransactionCollector, TransactionFilter
+from ..fastsync.block_reader import BLOCK_FORMATS
+from ..libs.transaction_collector import (
+    TransactionCollector,
+    CompactTransactionCollector,
+    TransactionFilter,
+)
 
 if TYPE_CHECKING:
     from ..data.transaction import Transaction
@@ -49,6 +54,19 @@ class CommandTransactions(Command):
         parser.add_argument("--start", type=int, dest="start", help="start BH", required=True)
         parser.add_argument("--end", type=int, dest="end", help="end BH", required=True)
         parser.add_argument("--output", type=str, help="output file path", required=True)
+        parser.add_argument(
+            "--compact",
+            action="store_true",
+            default=False,
+            help="--db is compact db migrated with --tx-results",
+        )
+        parser.add_argument(
+            "--format",
+            dest="block_format",
+            choices=BLOCK_FORMATS,
+            default="leveldb",
+            help="Format of compact db given with --db. Used with --compact",
+        )
         parser.set_defaults(func=self.run)
 
     def run(self, args):
@@ -61,9 +79,17 @@ class CommandTransactions(Command):
 
         tx_filter = MyFilter(from_, to)
 
-        transaction_collector = TransactionCollector()
+        if args.compact:
+            transaction_collector = CompactTransactionCollector(args.block_format)
+        else:
+            transaction_collector = TransactionCollector()
         transaction_collector.open(db_path)
 
+        if args.compact and not transaction_collector.has_tx_results:
+            transaction_collector.close()
+            print(CompactTransactionCollector.NO_TX_RESULTS_MESSAGE)
+            return 1
+
         it = transaction_collector.run(start, end, tx_filter)
 
         size = 0
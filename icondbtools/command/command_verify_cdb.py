@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from icondbtools.command.command import Command
+from ..fastsync.block_reader import BLOCK_FORMATS
+from ..migrate.block_verifier import BlockVerifier
+
+
+class CommandVerifyCDB(Command):
+    def __init__(self, sub_parser, common_parser):
+        self.add_parser(sub_parser, common_parser)
+
+    def add_parser(self, sub_parser, common_parser):
+        name = "verify-cdb"
+        desc = (
+            "Verify compact db against loopchain db given with --db: "
+            "block contents, prev_block_hash links and gaps"
+        )
+
+        parser = sub_parser.add_parser(name, parents=[common_parser], help=desc)
+        parser.add_argument(
+            "--cdb", type=str, required=True, help="compact db path created by migrate"
+        )
+        parser.add_argument(
+            "-s",
+            "--start",
+            type=int,
+            default=-1,
+            help="start block height. The first block in compact db by default",
+        )
+        parser.add_argument(
+            "--end",
+            type=int,
+            default=-1,
+            help="end block height, inclusive. The last block in compact db by default",
+        )
+        parser.add_argument(
+            "--step",
+            type=int,
+            default=1,
+            help="Compare every step-th block with loopchain db. "
+            "Links and gaps are checked for all blocks",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="The number of processes to compare blocks with",
+        )
+        parser.add_argument(
+            "--format",
+            dest="block_format",
+            choices=BLOCK_FORMATS,
+            default="leveldb",
+            help="Format of compact block db given with --cdb",
+        )
+        parser.set_defaults(func=self.run)
+
+    def run(self, args) -> int:
+        verifier = BlockVerifier(
+            block_format=args.block_format, step=args.step, workers=args.workers
+        )
+        verifier.open(args.db, args.cdb)
+        try:
+            ok: bool = verifier.run(args.start, args.end)
+        finally:
+            verifier.close()
+
+        return 0 if ok else 1
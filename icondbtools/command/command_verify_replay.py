@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import os
+from typing import List, Tuple
+
+from .command import Command
+from ..fastsync.block_reader import BLOCK_FORMATS
+from ..fastsync.replay_coordinator import (
+    REPORT_FILE,
+    ReplayCoordinator,
+    ReplayResult,
+    ReplayTask,
+    find_checkpoints,
+    plan_tasks,
+    write_report,
+)
+from ..utils.backup import BACKUP_MODES
+
+
+class CommandVerifyReplay(Command):
+    def __init__(self, sub_parser, common_parser):
+        self.add_parser(sub_parser, common_parser)
+
+    def add_parser(self, sub_parser, common_parser):
+        name = "verify-replay"
+        desc = (
+            "Replay compact db given with --db from statedb checkpoints "
+            "on parallel fastsync processes and check state_root_hash of every block"
+        )
+
+        parser = sub_parser.add_parser(name, parents=[common_parser], help=desc)
+        parser.add_argument(
+            "--checkpoints",
+            dest="checkpoint_path",
+            type=str,
+            default=".",
+            help="Directory which has statedb checkpoints named block-{height:09d}, "
+            "created by sync or fastsync with --backup-period",
+        )
+        parser.add_argument(
+            "--work-dir",
+            dest="work_path",
+            type=str,
+            default="replay",
+            help="Directory where a working directory is created for each interval",
+        )
+        parser.add_argument(
+            "--end",
+            type=int,
+            default=-1,
+            help="end block height, inclusive. The last block in compact db by default",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="The number of fastsync processes running at the same time",
+        )
+        parser.add_argument(
+            "--format",
+            dest="block_format",
+            choices=BLOCK_FORMATS,
+            default="leveldb",
+            help="Format of compact block db given with --db",
+        )
+        parser.add_argument(
+            "--is-config", type=str, default="", help="iconservice_config.json filepath"
+        )
+        parser.add_argument(
+            "--backup-mode",
+            dest="backup_mode",
+            choices=BACKUP_MODES,
+            default="hardlink",
+            help="How a checkpoint is copied to a working directory",
+        )
+        parser.add_argument(
+            "fastsync_args",
+            nargs=argparse.REMAINDER,
+            help="Arguments after -- are passed to fastsync. e.g. -- --no-fee",
+        )
+        parser.set_defaults(func=self.run)
+
+    def run(self, args) -> int:
+        fastsync_args: List[str] = args.fastsync_args
+        if fastsync_args[:1] == ["--"]:
+            fastsync_args = fastsync_args[1:]
+
+        checkpoints: List[Tuple[int, str]] = find_checkpoints(args.checkpoint_path)
+        tasks: List[ReplayTask] = plan_tasks(checkpoints, args.end, args.work_path)
+        if not tasks:
+            raise ValueError(f"No checkpoints to replay from: {args.checkpoint_path}")
+
+        print(
+            f"checkpoints: {len(checkpoints)}\n"
+            f"intervals: {len(tasks)}\n"
+            f"workers: {args.workers}\n"
+            f"fastsync_args: {fastsync_args}\n"
+        )
+
+        coordinator = ReplayCoordinator(
+            db_path=args.db,
+            workers=args.workers,
+            block_format=args.block_format,
+            config_path=args.is_config,
+            backup_mode=args.backup_mode,
+            fastsync_args=fastsync_args,
+        )
+        results: List[ReplayResult] = coordinator.run(tasks)
+
+        report_path: str = os.path.join(args.work_path, REPORT_FILE)
+        write_report(report_path, results)
+
+        failures: List[ReplayResult] = [result for result in results if not result.ok]
+        for result in failures:
+            print(f"failed: {result.task.work_path}")
+        print(
+            f"intervals: {len(results)}\n"
+            f"failed: {len(failures)}\n"
+            f"report: {report_path}"
+        )
+
+        return 1 if failures else 0
@@ -15,7 +15,7 @@
 
 import base64
 import json
-from typing import Optional, Dict, Union
+from typing import Optional, Dict, Union, Any
 
 from iconservice.base.address import Address
 from ..utils.convert_type import str_to_int, bytes_to_hex, hex_to_bytes
@@ -204,6 +204,30 @@ class Transaction(object):
             nonce=nonce,
         )
 
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "Transaction":
+        """Create a transaction with params stored in compact db
+
+        :param params: transaction params which have already been converted to objects
+        """
+        data_type = params.get("dataType")
+        signature = params.get("signature")
+
+        return Transaction(
+            version=params.get("version", 2),
+            nid=params.get("nid", 1),
+            from_=params["from"],
+            to=params["to"],
+            value=params.get("value", 0),
+            tx_hash=params["txHash"],
+            signature=base64.b64decode(signature) if signature else None,
+            step_limit=params.get("stepLimit", 0),
+            timestamp=params["timestamp"],
+            data_type=data_type,
+            data=cls._get_data(data_type, params.get("data")),
+            nonce=params.get("nonce"),
+        )
+
     @classmethod
     def _get_tx_hash(cls, data: Dict[str, str]) -> bytes:
         for key in ("txHash", "tx_hash"):
@@ -15,7 +15,7 @@
 
 import json
 from enum import IntEnum, auto
-from typing import List, Dict, Union, Any
+from typing import List, Dict, Union, Any, Optional
 
 from iconservice.base.address import Address
 from ..data.event_log import EventLog
@@ -196,6 +196,15 @@ class TransactionResult(pack.Serializable):
 
     @classmethod
     def from_list(cls, obj: List[Any]) -> "TransactionResult":
+        event_logs: Optional[List] = obj[cls.Index.EVENT_LOGS]
+        if event_logs is not None:
+            obj[cls.Index.EVENT_LOGS] = [
+                EventLog.from_list(event_log)
+                if isinstance(event_log, list)
+                else event_log
+                for event_log in event_logs
+            ]
+
         return cls(*obj)
 
     @classmethod
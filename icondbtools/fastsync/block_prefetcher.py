@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Union
+
+from iconservice.base.address import Address
+from iconservice.base.block import Block
+
+from ..fastsync.utils import (
+    create_transaction_requests,
+    create_iconservice_block,
+    create_block_validators,
+)
+from ..migrate.block import Block as BinBlock
+
+if TYPE_CHECKING:
+    from .block_reader import BlockDatabaseReader
+
+
+class PrefetchedBlock(object):
+    """Block data which is ready to be passed to IconServiceEngine.invoke()
+    """
+
+    def __init__(
+        self,
+        bin_block: "BinBlock",
+        block: "Block",
+        tx_requests: List[Dict[str, Any]],
+        prev_block_generator: Optional["Address"],
+        prev_block_validators: Optional[List["Address"]],
+        read_s: float = 0.0,
+        build_s: float = 0.0,
+    ):
+        """
+        :param read_s: seconds taken to read and decode bin_block
+        :param build_s: seconds taken to build the block and requests from bin_block
+        """
+        self.bin_block = bin_block
+        self.block = block
+        self.tx_requests = tx_requests
+        self.prev_block_generator = prev_block_generator
+        self.prev_block_validators = prev_block_validators
+        self.read_s = read_s
+        self.build_s = build_s
+
+
+class BlockPrefetcher(object):
+    """Read, decode and convert the next blocks on a worker thread
+
+    Items are delivered in block height order through a bounded queue.
+    None is delivered when a block is missing in the block database.
+    """
+
+    _STOP_CHECK_INTERVAL_S = 0.5
+
+    def __init__(self, block_reader: "BlockDatabaseReader", depth: int = 16):
+        if depth < 1:
+            raise ValueError(f"Invalid prefetch depth: {depth}")
+
+        self._block_reader = block_reader
+        self._queue = queue.Queue(maxsize=depth)
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # Status
+        self._gets = 0
+        self._waits = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.maxsize
+
+    @property
+    def gets(self) -> int:
+        """The number of items which the consumer has taken"""
+        return self._gets
+
+    @property
+    def waits(self) -> int:
+        """How many times the consumer had to wait for the worker"""
+        return self._waits
+
+    def start(
+        self, start_height: int, end_height: int, prev_bin_block: Optional["BinBlock"]
+    ):
+        """
+        :param start_height: the first block height to prefetch
+        :param end_height: the last block height to prefetch, inclusive
+        :param prev_bin_block: the block right before start_height
+        """
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(start_height, end_height, prev_bin_block),
+            name="BlockPrefetcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+        if self._thread is not None:
+            # Unblock the worker waiting for a free slot
+            while self._thread.is_alive():
+                self._drain()
+                self._thread.join(self._STOP_CHECK_INTERVAL_S)
+            self._thread = None
+
+        self._drain()
+
+    def get(self) -> Optional["PrefetchedBlock"]:
+        if self._queue.empty():
+            self._waits += 1
+
+        item: Union[None, "PrefetchedBlock", BaseException] = self._queue.get()
+        self._gets += 1
+
+        if isinstance(item, BaseException):
+            raise item
+
+        return item
+
+    def _run(
+        self, start_height: int, end_height: int, prev_bin_block: Optional["BinBlock"]
+    ):
+        try:
+            for height in range(start_height, end_height + 1):
+                start: float = time.perf_counter()
+                bin_block: Optional["BinBlock"] = self._block_reader.get_block_by_height(
+                    height
+                )
+                if bin_block is None:
+                    self._put(None)
+                    break
+                read_end: float = time.perf_counter()
+
+                item = self._create_item(bin_block, prev_bin_block)
+                item.read_s = read_end - start
+                item.build_s = time.perf_counter() - read_end
+                if not self._put(item):
+                    break
+
+                prev_bin_block = bin_block
+        except BaseException as e:
+            self._put(e)
+
+    @staticmethod
+    def _create_item(
+        bin_block: "BinBlock", prev_bin_block: Optional["BinBlock"]
+    ) -> "PrefetchedBlock":
+        prev_block_generator: Optional["Address"] = (
+            prev_bin_block.leader if prev_bin_block else None
+        )
+
+        return PrefetchedBlock(
+            bin_block=bin_block,
+            block=create_iconservice_block(bin_block),
+            tx_requests=create_transaction_requests(bin_block.transactions),
+            prev_block_generator=prev_block_generator,
+            prev_block_validators=create_block_validators(
+                bin_block.prev_votes, prev_block_generator
+            ),
+        )
+
+    def _put(self, item) -> bool:
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=self._STOP_CHECK_INTERVAL_S)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def _drain(self):
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
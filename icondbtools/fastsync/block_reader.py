@@ -12,20 +12,46 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 from enum import Enum
-from typing import Optional
+from typing import Optional, Tuple, Dict, Any, List, Iterator, Union
 
-import plyvel
 from icondbtools.migrate.preps import PReps
 
+from ..data.transaction_result import TransactionResult
+from ..libs.block_cache import BlockCache, get_default_block_cache
 from ..migrate.block import Block
+from ..migrate.chunk import BlockChunk, get_chunk_start
+from ..migrate.codec import BlockDecompressor, Codec, decode_dict_value
+from ..utils import pack
+from ..utils.db import open_db
+from .segment_reader import SegmentBlockReader
 
 
 class Bucket(Enum):
     BLOCK_HEIGHT = b"\x00"
-    # BLOCK_HASH = b"\x01"
-    # BLOCK_RESULT = b"\x02"
+    BLOCK_HASH = b"\x01"
+    BLOCK_RESULT = b"\x02"
     PREPS = b"\x03"
+    TX_HASH = b"\x04"
+    META = b"\x05"
+    BLOCK_CHUNK = b"\x06"
+
+
+CHUNK_SIZE_KEY = Bucket.META.value + b"chunk_size"
+# The last block height flushed by migrate sub-command
+PROGRESS_KEY = Bucket.META.value + b"progress"
+
+# leveldb: BlockDatabaseReader, segment: SegmentBlockReader
+BLOCK_FORMATS = ("leveldb", "segment")
+
+
+def make_dict_key(dict_id: int) -> bytes:
+    return Bucket.META.value + b"dict" + dict_id.to_bytes(2, "big")
+
+
+def make_block_chunk_key(chunk_start: int) -> bytes:
+    return Bucket.BLOCK_CHUNK.value + chunk_start.to_bytes(8, "big")
 
 
 class BlockDatabaseReader(object):
@@ -36,13 +62,45 @@ class BlockDatabaseReader(object):
     LevelDB data structure
     b"\x00" + height.to_bytes(8, "big"): block data im msgpack format
     b"\x01" + block_hash(32): height.to_bytes(8, "big")
+    b"\x02" + height.to_bytes(8, "big"): transaction results in msgpack format
+    b"\x04" + tx_hash(32): height.to_bytes(8, "big") + index_in_block.to_bytes(4, "big")
+    b"\x05" + b"dict" + dict_id.to_bytes(2, "big"): codec(1) + compression dictionary
+    b"\x05" + b"chunk_size": chunk_size.to_bytes(4, "big")
+    b"\x06" + chunk_start.to_bytes(8, "big"): BlockChunk
+
+    Block and block result values can be compressed. Refer to migrate.codec
+    If chunk_size exists, blocks are stored in chunks instead of b"\x00" bucket.
+    A chunk contains chunk_size consecutive blocks starting from a multiple of chunk_size.
+    Refer to migrate.chunk
     """
 
-    def __init__(self):
+    READ_AHEAD_CHUNKS = 1
+
+    def __init__(self, cache: Optional[BlockCache] = None):
         self._db = None
+        self._cache: Optional[BlockCache] = (
+            cache if cache is not None else get_default_block_cache()
+        )
+        self._cache_namespace = None
+        self._decompressor = BlockDecompressor(self._load_dict)
+
+        # Chunk mode
+        self._chunk_size = 0
+        self._chunks: Dict[int, BlockChunk] = {}
+
+    @property
+    def chunk_size(self) -> int:
+        """0 means that blocks are not stored in chunks"""
+        return self._chunk_size
 
     def open(self, db_path: str):
-        self._db = plyvel.DB(db_path)
+        self._db = open_db(db_path)
+        self._cache_namespace = (self.__class__.__name__, os.path.abspath(db_path))
+        self._decompressor = BlockDecompressor(self._load_dict)
+
+        value: Optional[bytes] = self._db.get(CHUNK_SIZE_KEY)
+        self._chunk_size = 0 if value is None else int.from_bytes(value, "big")
+        self._chunks = {}
 
     def close(self):
         if self._db:
@@ -50,10 +108,165 @@ class BlockDatabaseReader(object):
             self._db = None
 
     def get_block_by_height(self, block_height: int) -> Optional[Block]:
-        key: bytes = self._get_key_by_height(block_height)
-        return self._get_block(key)
+        value: Optional[bytes] = self.get_block_data_by_height(block_height)
+        if value is None:
+            return None
+
+        return Block.from_bytes(value)
+
+    def get_block_data_by_height(self, block_height: int) -> Optional[bytes]:
+        """Return decompressed Block.to_bytes() without decoding it"""
+        if self._chunk_size > 0:
+            return self._get_block_value_from_chunk(block_height)
+
+        return self._get_block_value(self._get_key_by_height(block_height))
+
+    def get_block_by_hash(self, block_hash: bytes) -> Optional[Block]:
+        height: int = self.get_block_height_by_hash(block_hash)
+        if height < 0:
+            return None
+
+        return self.get_block_by_height(height)
+
+    def get_block_height_by_hash(self, block_hash: bytes) -> int:
+        """
+        :param block_hash: 32-byte block hash
+        :return: block height or -1 if block_hash is not indexed
+        """
+        value: Optional[bytes] = self._db.get(
+            self._get_key(Bucket.BLOCK_HASH, block_hash)
+        )
+        if value is None:
+            return -1
+
+        return int.from_bytes(value, "big")
+
+    def get_transaction_index_by_hash(self, tx_hash: bytes) -> Tuple[int, int]:
+        """
+        :param tx_hash: 32-byte transaction hash
+        :return: (block height, index of the transaction in the block)
+            (-1, -1) if tx_hash is not indexed
+        """
+        key: bytes = self._get_key(Bucket.TX_HASH, tx_hash)
+        value: Optional[bytes] = self._db.get(key)
+        if value is None:
+            return -1, -1
+
+        return int.from_bytes(value[:8], "big"), int.from_bytes(value[8:], "big")
+
+    def get_transaction_by_hash(self, tx_hash: bytes) -> Optional[Dict[str, Any]]:
+        """
+        :param tx_hash: 32-byte transaction hash
+        :return: transaction params which have already been converted to objects
+        """
+        height, index = self.get_transaction_index_by_hash(tx_hash)
+        if height < 0:
+            return None
+
+        block: Optional[Block] = self.get_block_by_height(height)
+        if block is None:
+            return None
+
+        return block.transactions[index]
+
+    def get_transaction_results_by_height(
+        self, block_height: int
+    ) -> Optional[List[Optional[TransactionResult]]]:
+        """
+        :param block_height:
+        :return: transaction results in the order of transactions in the block
+            None if the db was migrated without transaction results
+            An item is None if its original result is not compatible to protocol v3
+        """
+        key: bytes = Bucket.BLOCK_RESULT.value + block_height.to_bytes(8, "big")
+        value: Optional[bytes] = self._db.get(key)
+        if value is None:
+            return None
+
+        return pack.decode(self._decompressor.decompress(value))
+
+    def get_transaction_result_by_hash(
+        self, tx_hash: bytes
+    ) -> Optional[TransactionResult]:
+        height, index = self.get_transaction_index_by_hash(tx_hash)
+        if height < 0:
+            return None
+
+        tx_results = self.get_transaction_results_by_height(height)
+        if tx_results is None:
+            return None
+
+        return tx_results[index]
+
+    def iter_blocks(self, start: int, end: int = -1) -> Iterator[Block]:
+        """Iterate over blocks ranging from start to end in block height order
+
+        Iteration stops at the first missing block height
+
+        :param start: start block height
+        :param end: end block height, inclusive. -1 means the last block
+        """
+        expected_height = start
+        for height, value in self.iter_block_datas(start, end):
+            if height != expected_height:
+                return
+
+            yield Block.from_bytes(value)
+            expected_height += 1
+
+    def iter_block_datas(
+        self, start: int, end: int = -1
+    ) -> Iterator[Tuple[int, bytes]]:
+        """Iterate over decompressed Block.to_bytes() in block height order
+
+        Unlike iter_blocks(), blocks are not decoded and missing heights are skipped
+
+        :param start: start block height
+        :param end: end block height, inclusive. -1 means the last block
+        :return: (block_height, Block.to_bytes())
+        """
+        if self._chunk_size > 0:
+            yield from self._iter_block_datas_in_chunks(start, end)
+            return
+
+        if end > -1:
+            stop: bytes = self._get_key_by_height(end + 1)
+        else:
+            stop: bytes = Bucket.BLOCK_HEIGHT.value + b"\xff" * 8
+
+        it = self._db.iterator(start=self._get_key_by_height(start), stop=stop)
+        try:
+            for key, value in it:
+                yield self._key_to_height(key), self._decompressor.decompress(value)
+        finally:
+            it.close()
+
+    def _iter_block_datas_in_chunks(
+        self, start: int, end: int
+    ) -> Iterator[Tuple[int, bytes]]:
+        it = self._db.iterator(
+            start=make_block_chunk_key(get_chunk_start(start, self._chunk_size)),
+            stop=Bucket.BLOCK_CHUNK.value + b"\xff" * 8,
+            include_key=False,
+        )
+        try:
+            for value in it:
+                chunk = BlockChunk.from_bytes(self._decompressor.decompress(value))
+                for height, block_value in chunk:
+                    if height < start:
+                        continue
+                    if -1 < end < height:
+                        return
+
+                    yield height, block_value
+        finally:
+            it.close()
 
     def get_start_block_height(self) -> int:
+        if self._chunk_size > 0:
+            chunk: Optional[BlockChunk] = self._get_edge_chunk(reverse=False)
+            return -1 if chunk is None else chunk.first_height
+
         try:
             it = self._db.iterator(
                 prefix=Bucket.BLOCK_HEIGHT.value,
@@ -69,6 +282,10 @@ class BlockDatabaseReader(object):
             raise
 
     def get_end_block_height(self) -> int:
+        if self._chunk_size > 0:
+            chunk: Optional[BlockChunk] = self._get_edge_chunk(reverse=True)
+            return -1 if chunk is None else chunk.last_height
+
         try:
             it = self._db.iterator(
                 prefix=Bucket.BLOCK_HEIGHT.value,
@@ -83,15 +300,77 @@ class BlockDatabaseReader(object):
         except:
             return -1
 
-    def _get_block(self, key: Optional[bytes]) -> Optional[Block]:
-        if key is None:
+    def _get_block_value(self, key: bytes) -> Optional[bytes]:
+        if self._cache is None:
+            value: Optional[bytes] = self._db.get(key)
+        else:
+            value: Optional[bytes] = self._cache.get_or_load(
+                (self._cache_namespace, key), lambda: self._db.get(key)
+            )
+        if value is None:
             return None
 
-        value: bytes = self._db.get(key)
+        # Cached values stay compressed to make the most of the cache budget
+        return self._decompressor.decompress(value)
+
+    def _get_block_value_from_chunk(self, height: int) -> Optional[bytes]:
+        chunk_start: int = get_chunk_start(height, self._chunk_size)
+
+        chunk: Optional[BlockChunk] = self._chunks.get(chunk_start)
+        if chunk is None:
+            self._chunks = self._read_chunks(chunk_start)
+            chunk = self._chunks.get(chunk_start)
+            if chunk is None:
+                return None
+
+        return chunk.get(height)
+
+    def _read_chunks(self, chunk_start: int) -> Dict[int, BlockChunk]:
+        """Read the chunk starting at chunk_start and the next ones with one seek
+
+        Sequential readers like fastsync find the next chunk already decoded
+        """
+        key: bytes = make_block_chunk_key(chunk_start)
+        if self._cache is not None:
+            value: Optional[bytes] = self._cache.get((self._cache_namespace, key))
+            if value is not None:
+                chunk = BlockChunk.from_bytes(self._decompressor.decompress(value))
+                return {chunk_start: chunk}
+
+        chunks: Dict[int, BlockChunk] = {}
+        it = self._db.iterator(
+            start=key, stop=Bucket.BLOCK_CHUNK.value + b"\xff" * 8
+        )
+        try:
+            for _, (k, value) in zip(range(1 + self.READ_AHEAD_CHUNKS), it):
+                if self._cache is not None:
+                    self._cache.put((self._cache_namespace, k), value)
+
+                chunk = BlockChunk.from_bytes(self._decompressor.decompress(value))
+                chunks[int.from_bytes(k[1:], "big")] = chunk
+        finally:
+            it.close()
+
+        return chunks
+
+    def _get_edge_chunk(self, reverse: bool) -> Optional[BlockChunk]:
+        it = self._db.iterator(
+            prefix=Bucket.BLOCK_CHUNK.value, reverse=reverse, include_key=False
+        )
+        value: Optional[bytes] = next(it, None)
+        it.close()
+
         if value is None:
             return None
 
-        return Block.from_bytes(value)
+        return BlockChunk.from_bytes(self._decompressor.decompress(value))
+
+    def _load_dict(self, dict_id: int) -> Optional[Tuple[Codec, bytes]]:
+        value: Optional[bytes] = self._db.get(make_dict_key(dict_id))
+        if value is None:
+            return None
+
+        return decode_dict_value(value)
 
     @classmethod
     def _get_key_by_height(cls, height: int) -> bytes:
@@ -111,16 +390,6 @@ class BlockDatabaseReader(object):
 
         return bucket.value + key_data
 
-    # def get_block_by_hash(self, block_hash: bytes) -> Optional[Block]:
-    #     key: Optional[bytes] = self._get_key_by_block_hash(block_hash)
-    #     return self._get_block(key)
-
-    # def _get_key_by_block_hash(self, block_hash: bytes) -> Optional[bytes]:
-    #     key: bytes = self._get_key(Bucket.BLOCK_HASH, block_hash)
-    #     key_data: Optional[bytes] = self._db.get(key)
-    #
-    #     return self._get_key(Bucket.BLOCK_HEIGHT, key_data)
-
     def load_main_preps(self, reps_hash: Optional[bytes]) -> list:
         if reps_hash is None:
             return []
@@ -129,3 +398,14 @@ class BlockDatabaseReader(object):
         value: bytes = self._db.get(key=key)
         preps: 'PReps' = PReps.from_bytes(value)
         return preps.to_list()
+
+
+def create_block_reader(
+    block_format: str = "leveldb",
+) -> Union[BlockDatabaseReader, SegmentBlockReader]:
+    if block_format == "leveldb":
+        return BlockDatabaseReader()
+    elif block_format == "segment":
+        return SegmentBlockReader()
+
+    raise ValueError(f"Unknown block format: {block_format}")
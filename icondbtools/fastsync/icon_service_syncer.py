@@ -16,8 +16,6 @@
 import asyncio
 import logging
 import os
-import shutil
-import time
 from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from typing import TYPE_CHECKING, Optional, List, Tuple, Dict, Any
@@ -37,17 +35,24 @@ from iconservice.iconscore.icon_score_context import (
 from iconservice.iiss.reward_calc.storage import Storage
 
 from icondbtools.utils.convert_type import object_to_str
-from icondbtools.word_detector import WordDetector
 from ..data.node_container import NodeContainer
-from ..fastsync.block_reader import BlockDatabaseReader as BinBlockDatabaseReader
+from ..fastsync.block_prefetcher import BlockPrefetcher, PrefetchedBlock
+from ..fastsync.block_reader import create_block_reader
+from ..fastsync.sync_cursor import SyncCursor
 from ..fastsync.utils import (
-    create_transaction_requests,
     create_iconservice_block,
-    create_block_validators,
     create_prev_block_votes,
 )
+from ..libs.calculate_detector import CalculateDetector
 from ..migrate.block import Block as BinBlock
 from ..utils import estimate_remaining_time_s
+from ..utils.backup import (
+    STATE_DB_BACKUP_PREFIX,
+    BackupStats,
+    backup_dir,
+    remove_old_backups,
+)
+from ..utils.metrics import SYNC_STAGES, StageMetrics
 from ..utils.timer import Timer
 from ..utils.utils import remove_dir
 
@@ -59,8 +64,11 @@ if TYPE_CHECKING:
 class IconServiceSyncer(object):
     _TAG = "SYNC"
 
-    def __init__(self):
-        self._block_reader = BinBlockDatabaseReader()
+    def __init__(self, block_format: str = "leveldb"):
+        """
+        :param block_format: format of compact block db. "leveldb" or "segment"
+        """
+        self._block_reader = create_block_reader(block_format)
         self._engine = IconServiceEngine()
         self._timer = Timer()
 
@@ -156,9 +164,16 @@ class IconServiceSyncer(object):
         stop_on_error: bool = True,
         no_commit: bool = False,
         backup_period: int = 0,
+        backup_mode: str = "copy",
+        backup_keep: int = 0,
         write_precommit_data: bool = False,
         print_block_height: int = 1,
         iiss_db_backup_path: Optional[str] = None,
+        prefetch_depth: int = 16,
+        metrics_path: Optional[str] = None,
+        metrics_period: int = 0,
+        cursor: Optional[SyncCursor] = None,
+        cursor_path: Optional[str] = None,
     ) -> int:
         """Begin to synchronize IconServiceEngine with blocks from loopchain db
 
@@ -169,17 +184,24 @@ class IconServiceSyncer(object):
         :param stop_on_error: If error happens, stop syncing
         :param no_commit: Do not commit
         :param backup_period: state backup period in block
+        :param backup_mode: "copy" or "hardlink". See utils.backup.backup_dir()
+        :param backup_keep: keep only the last this number of state backups. 0 means all
         :param write_precommit_data:
         :param print_block_height: print every this block height
+        :param prefetch_depth: the number of blocks to read ahead on a worker thread
+        :param metrics_path: file to dump the time spent in each stage per block
+            CSV if it ends with ".csv", otherwise JSONL
+        :param metrics_period: print the stage metrics summary every this block
+            0 means that it is printed only at the end
+        :param cursor: the cursor saved after start_height - 1 was committed
+            main preps are restored from it instead of being derived again
+        :param cursor_path: file to save the cursor to after each commit
         :return: 0(success), otherwise(error)
         """
         Logger.debug(tag=self._TAG, msg="_run() start")
 
-        word_detector = WordDetector(
-            filename="iconservice.log",
-            block_word=r"CALCULATE\(",
-            release_word=r"CALCULATE_DONE\(",
-        )
+        calculate_detector = CalculateDetector()
+        calculate_detector.install()
         ret: int = 0
         self._block_reader.open(db_path)
 
@@ -190,7 +212,12 @@ class IconServiceSyncer(object):
         main_preps: Optional['NodeContainer'] = None
         next_main_preps: Optional["NodeContainer"] = None
 
-        if start_height > 0:
+        if start_height > 0 and cursor is not None:
+            prev_bin_block: Optional[BinBlock] = self._block_reader.get_block_by_height(start_height - 1)
+            main_preps, next_main_preps = self._restore_main_preps(
+                cursor, start_height, prev_bin_block
+            )
+        elif start_height > 0:
             prev_bin_block: Optional[BinBlock] = self._block_reader.get_block_by_height(start_height - 1)
             # init main_preps
             preps: list = self._block_reader.load_main_preps(reps_hash=prev_bin_block.reps_hash)
@@ -206,114 +233,186 @@ class IconServiceSyncer(object):
 
         end_height = start_height + count - 1
 
-        self._timer.start()
-
-        for height in range(start_height, end_height + 1):
-            bin_block = self._block_reader.get_block_by_height(height)
-            if bin_block is None:
-                print(f"last block: {height - 1}")
-                break
+        prefetcher = BlockPrefetcher(self._block_reader, prefetch_depth)
+        prefetcher.start(start_height, end_height, prev_bin_block)
 
-            block: "Block" = create_iconservice_block(bin_block)
+        metrics = StageMetrics(SYNC_STAGES, metrics_path)
+        metrics.open()
 
-            tx_requests: List[Dict[str, Any]] = create_transaction_requests(
-                bin_block.transactions
-            )
-            prev_block_generator: Optional[
-                "Address"
-            ] = prev_bin_block.leader if prev_bin_block else None
-            prev_block_validators: Optional[List["Address"]] = create_block_validators(
-                bin_block.prev_votes, prev_block_generator
-            )
-            prev_block_votes: Optional[
-                List[Tuple["Address", int]]
-            ] = create_prev_block_votes(
-                bin_block.prev_votes, prev_block_generator, main_preps
-            )
+        self._timer.start()
 
-            Logger.info(
-                tag=self._TAG, msg=f"prev_block_generator={prev_block_generator}"
-            )
-            Logger.info(
-                tag=self._TAG, msg=f"prev_block_validators={prev_block_validators}"
-            )
-            Logger.info(tag=self._TAG, msg=f"prev_block_votes={prev_block_votes}")
+        try:
+            for height in range(start_height, end_height + 1):
+                metrics.begin_block(height)
+                with metrics.measure("wait"):
+                    item: Optional[PrefetchedBlock] = prefetcher.get()
+                if item is None:
+                    print(f"last block: {height - 1}")
+                    break
 
-            if prev_block is not None and prev_block.hash != block.prev_hash:
-                raise Exception(f"Invalid prev_block_hash: height={height}")
+                metrics.record("read", item.read_s)
+                metrics.record("build", item.build_s)
+
+                bin_block: "BinBlock" = item.bin_block
+                block: "Block" = item.block
+
+                tx_requests: List[Dict[str, Any]] = item.tx_requests
+                prev_block_generator: Optional["Address"] = item.prev_block_generator
+                prev_block_validators: Optional[
+                    List["Address"]
+                ] = item.prev_block_validators
+                prev_block_votes: Optional[
+                    List[Tuple["Address", int]]
+                ] = create_prev_block_votes(
+                    bin_block.prev_votes, prev_block_generator, main_preps
+                )
 
-            invoke_result = self._engine.invoke(
-                block,
-                tx_requests,
-                prev_block_generator,
-                prev_block_validators,
-                prev_block_votes,
-            )
-            tx_results, state_root_hash = invoke_result[0], invoke_result[1]
-            main_preps_as_dict: Optional[Dict] = invoke_result[3]
+                Logger.info(
+                    tag=self._TAG, msg=f"prev_block_generator={prev_block_generator}"
+                )
+                Logger.info(
+                    tag=self._TAG, msg=f"prev_block_validators={prev_block_validators}"
+                )
+                Logger.info(tag=self._TAG, msg=f"prev_block_votes={prev_block_votes}")
+
+                if prev_block is not None and prev_block.hash != block.prev_hash:
+                    raise Exception(f"Invalid prev_block_hash: height={height}")
+
+                with metrics.measure("invoke"):
+                    invoke_result = self._engine.invoke(
+                        block,
+                        tx_requests,
+                        prev_block_generator,
+                        prev_block_validators,
+                        prev_block_votes,
+                    )
+                tx_results, state_root_hash = invoke_result[0], invoke_result[1]
+                main_preps_as_dict: Optional[Dict] = invoke_result[3]
 
-            commit_state: bytes = bin_block.state_hash
+                commit_state: bytes = bin_block.state_hash
 
-            # "commit_state" is the field name of state_root_hash in loopchain block
-            if (height - start_height) % print_block_height == 0:
-                self._print_status(
-                    height, start_height, count,
-                    commit_state, state_root_hash, len(tx_requests)
-                )
+                # "commit_state" is the field name of state_root_hash in loopchain block
+                if (height - start_height) % print_block_height == 0:
+                    self._print_status(
+                        height, start_height, count,
+                        commit_state, state_root_hash, len(tx_requests)
+                    )
 
-            if write_precommit_data:
-                self._print_precommit_data(block)
+                if write_precommit_data:
+                    self._print_precommit_data(block)
 
-            try:
-                if stop_on_error:
-                    if commit_state:
-                        if commit_state != state_root_hash:
-                            raise Exception("state_root_hash mismatch")
+                try:
+                    with metrics.measure("verify"):
+                        if stop_on_error:
+                            if commit_state:
+                                if commit_state != state_root_hash:
+                                    raise Exception("state_root_hash mismatch")
+
+                            if height > 0 and not self._check_invoke_result(tx_results):
+                                raise Exception("tx_result mismatch")
+                except Exception as e:
+                    logging.exception(e)
+
+                    self._print_precommit_data(block)
+                    ret: int = 1
+                    break
 
-                    if height > 0 and not self._check_invoke_result(tx_results):
-                        raise Exception("tx_result mismatch")
-            except Exception as e:
-                logging.exception(e)
+                is_calculation_block = self._check_calculation_block(block)
+
+                if is_calculation_block:
+                    if iiss_db_backup_path is not None:
+                        with metrics.measure("backup"):
+                            self._backup_iiss_db(
+                                iiss_db_backup_path, block.height, backup_mode
+                            )
+
+                # If no_commit is set to True, the config only affects to the last block to commit
+                committed: bool = not no_commit or height < end_height
+                if committed:
+                    with metrics.measure("calc_wait"):
+                        calculate_detector.wait()
+
+                    # Call IconServiceEngine.commit() with a block
+                    with metrics.measure("commit"):
+                        self._commit(block)
+
+                if next_main_preps:
+                    main_preps = next_main_preps
+                    next_main_preps = None
+
+                if main_preps_as_dict is not None:
+                    next_main_preps = NodeContainer.from_dict(main_preps_as_dict)
+
+                # The cursor is saved in .statedb before it is backed up below,
+                # so that each backup has the cursor of its own block
+                if committed and cursor_path:
+                    SyncCursor(
+                        height=block.height,
+                        block_hash=block.hash,
+                        main_preps_hash=bin_block.reps_hash,
+                        next_main_preps_pending=next_main_preps is not None,
+                    ).save(cursor_path)
+
+                # Wait for rc to finish the calculation requested on commit
+                with metrics.measure("calc_wait"):
+                    calculate_detector.wait()
+                # Prepare the next iteration
+                with metrics.measure("backup"):
+                    self._backup_state_db(
+                        block, backup_period, backup_mode, backup_keep
+                    )
+                metrics.end_block()
 
-                self._print_precommit_data(block)
-                ret: int = 1
-                break
+                if metrics_period > 0 and metrics.blocks % metrics_period == 0:
+                    print(f"\n{metrics.summary()}")
 
-            is_calculation_block = self._check_calculation_block(block)
+                prev_block: 'Block' = block
+                prev_bin_block: 'BinBlock' = bin_block
+        finally:
+            prefetcher.stop()
+            calculate_detector.uninstall()
+            metrics.close()
 
-            if is_calculation_block:
-                word_detector.start()
-                time.sleep(0.5)
-                if iiss_db_backup_path is not None:
-                    self._backup_iiss_db(iiss_db_backup_path, block.height)
+        self._block_reader.close()
 
-            # If no_commit is set to True, the config only affects to the last block to commit
-            if not no_commit or height < end_height:
-                while word_detector.get_hold():
-                    time.sleep(0.5)
+        print(
+            f"\nprefetch: depth={prefetcher.depth} "
+            f"waits={prefetcher.waits}/{prefetcher.gets}"
+        )
+        print(metrics.summary())
+        Logger.debug(tag=self._TAG, msg=f"_run() end: {ret}")
+        return ret
 
-                # Call IconServiceEngine.commit() with a block
-                self._commit(block)
+    def _restore_main_preps(
+        self, cursor: SyncCursor, start_height: int, prev_bin_block: Optional["BinBlock"]
+    ) -> Tuple[Optional["NodeContainer"], Optional["NodeContainer"]]:
+        """Restore main_preps and next_main_preps from the cursor saved on the last commit
 
-            while word_detector.get_hold():
-                time.sleep(0.5)
-            # Prepare the next iteration
-            self._backup_state_db(block, backup_period)
-            prev_block: 'Block' = block
-            prev_bin_block: 'BinBlock' = bin_block
+        :return: main_preps, next_main_preps
+        """
+        if cursor.height != start_height - 1:
+            raise ValueError(f"Cursor height mismatch: cursor={cursor.height} start={start_height}")
+        if prev_bin_block is None or prev_bin_block.block_hash != cursor.block_hash:
+            raise ValueError(f"Cursor mismatch with block db: {cursor}")
 
-            if next_main_preps:
-                main_preps = next_main_preps
-                next_main_preps = None
+        print(f"resume from cursor: {cursor}")
 
-            if main_preps_as_dict is not None:
-                next_main_preps = NodeContainer.from_dict(main_preps_as_dict)
+        preps: list = self._block_reader.load_main_preps(reps_hash=cursor.main_preps_hash)
+        main_preps: Optional["NodeContainer"] = NodeContainer.from_list(preps=preps)
 
-        self._block_reader.close()
-        word_detector.stop()
+        # main preps change from start_height. It is the first block of the new term
+        next_main_preps: Optional["NodeContainer"] = None
+        if cursor.next_main_preps_pending:
+            cur_bin_block: Optional["BinBlock"] = self._block_reader.get_block_by_height(
+                start_height
+            )
+            if cur_bin_block is not None:
+                preps: list = self._block_reader.load_main_preps(
+                    reps_hash=cur_bin_block.reps_hash
+                )
+                next_main_preps = NodeContainer.from_list(preps=preps)
 
-        Logger.debug(tag=self._TAG, msg=f"_run() end: {ret}")
-        return ret
+        return main_preps, next_main_preps
 
     def _commit(self, block: "Block"):
         # if "block" in inspect.signature(self._engine.commit).parameters:
@@ -322,7 +421,12 @@ class IconServiceSyncer(object):
         #     self._engine.commit(block.height, block.hash, block.hash)
         self._engine.commit(block.height, block.hash, block.hash)
 
-    def _backup_iiss_db(self, iiss_db_backup_path: Optional[str], block_height: int):
+    def _backup_iiss_db(
+        self,
+        iiss_db_backup_path: Optional[str],
+        block_height: int,
+        backup_mode: str = "copy",
+    ):
         iiss_db_path: str = os.path.join(self._engine._state_db_root_path, "iiss")
 
         with os.scandir(iiss_db_path) as it:
@@ -334,7 +438,7 @@ class IconServiceSyncer(object):
                     )
                     if os.path.exists(dst_path):
                         remove_dir(dst_path)
-                    shutil.copytree(entry.path, dst_path)
+                    backup_dir(entry.path, dst_path, backup_mode)
                     break
 
     def _check_invoke_result(self, tx_results: list):
@@ -473,7 +577,9 @@ class IconServiceSyncer(object):
         return start_block == block.height
 
     @staticmethod
-    def _backup_state_db(block: "Block", backup_period: int):
+    def _backup_state_db(
+        block: "Block", backup_period: int, backup_mode: str = "copy", backup_keep: int = 0
+    ):
         if backup_period <= 0:
             return
         if block.height == 0:
@@ -481,12 +587,18 @@ class IconServiceSyncer(object):
 
         if block.height % backup_period == 0:
             print(f"----------- Backup statedb: {block.height} ------------")
-            dirname: str = f"block-{'%09d' % block.height}"
+            dirname: str = f"{STATE_DB_BACKUP_PREFIX}{'%09d' % block.height}"
+            stats = BackupStats()
             for basename in (".score", ".statedb"):
-                try:
-                    shutil.copytree(basename, f"{dirname}/{basename}/")
-                except FileExistsError:
-                    pass
+                dst_path: str = os.path.join(dirname, basename)
+                if os.path.exists(dst_path):
+                    continue
+                stats += backup_dir(basename, dst_path, backup_mode)
+            print(f"backup: {stats}")
+
+            if backup_keep > 0:
+                for path in remove_old_backups(".", STATE_DB_BACKUP_PREFIX, backup_keep):
+                    print(f"backup removed: {path}")
 
     def _print_status(
             self,
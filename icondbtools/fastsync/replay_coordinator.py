@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Replay the intervals between statedb checkpoints on parallel fastsync processes
+
+A checkpoint is a statedb backup named block-{height:09d}, which sync and fastsync
+create with --backup-period. The interval after each checkpoint is replayed
+from a copy of the checkpoint in its own working directory, so that
+the statedb, score and rc of each fastsync process do not collide.
+A compact db in leveldb format is cloned there too,
+because leveldb allows only one process to open a db
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from ..libs.state_database_reader import StateDatabaseReader
+from ..utils.backup import STATE_DB_BACKUP_PREFIX, backup_dir, list_backups
+from ..utils.utils import remove_dir
+
+CONFIG_FILE = "iconservice_config.json"
+LOG_FILE = "fastsync.log"
+REPORT_FILE = "report.json"
+# Hardlinked clone of a compact db in leveldb format in each working directory
+DB_CLONE_DIR = ".compactdb"
+
+
+class ReplayTask(NamedTuple):
+    index: int
+    checkpoint_path: str
+    start_height: int
+    # -1 means the last block in compact db
+    end_height: int
+    work_path: str
+
+
+class ReplayResult(NamedTuple):
+    task: ReplayTask
+    returncode: int
+    # The last block height committed in the working directory. -1 if unknown
+    last_height: int
+    duration: float
+    # Set if fastsync could not be started
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        if self.error is not None or self.returncode != 0:
+            return False
+
+        return self.task.end_height < 0 or self.last_height == self.task.end_height
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.task.index,
+            "checkpoint": self.task.checkpoint_path,
+            "start": self.task.start_height,
+            "end": self.task.end_height,
+            "lastHeight": self.last_height,
+            "returncode": self.returncode,
+            "duration": round(self.duration, 3),
+            "error": self.error,
+            "ok": self.ok,
+        }
+
+
+def find_checkpoints(root_path: str) -> List[Tuple[int, str]]:
+    """
+    :return: (block height, path) of checkpoints in ascending order of block height
+    """
+    return [
+        (int(name[len(STATE_DB_BACKUP_PREFIX):]), os.path.join(root_path, name))
+        for name in list_backups(root_path, STATE_DB_BACKUP_PREFIX)
+    ]
+
+
+def plan_tasks(
+    checkpoints: Sequence[Tuple[int, str]], end_height: int, work_root_path: str
+) -> List[ReplayTask]:
+    """Split blocks after the first checkpoint into the intervals between checkpoints
+
+    The interval after checkpoint i ends at checkpoint i + 1,
+    which lets the state of each interval be checked at its end
+
+    :param checkpoints: (block height, path) in ascending order of block height
+    :param end_height: the last block height to replay. -1 means the last block in compact db
+    :param work_root_path: the directory where working directories are created
+    """
+    tasks: List[ReplayTask] = []
+
+    for i, (height, path) in enumerate(checkpoints):
+        start: int = height + 1
+        end: int = checkpoints[i + 1][0] if i + 1 < len(checkpoints) else end_height
+        if 0 <= end_height < end:
+            end = end_height
+        if 0 <= end < start:
+            break
+
+        tasks.append(
+            ReplayTask(
+                index=len(tasks),
+                checkpoint_path=path,
+                start_height=start,
+                end_height=end,
+                work_path=os.path.join(work_root_path, f"replay-{'%09d' % start}"),
+            )
+        )
+
+    return tasks
+
+
+class ReplayCoordinator(object):
+    """Run a fastsync process per ReplayTask and merge their results"""
+
+    def __init__(
+        self,
+        db_path: str,
+        workers: int,
+        block_format: str = "leveldb",
+        config_path: str = "",
+        backup_mode: str = "hardlink",
+        fastsync_args: Sequence[str] = (),
+    ):
+        """
+        :param db_path: compact db path
+        :param workers: the number of fastsync processes running at the same time
+        :param block_format: format of compact db
+        :param config_path: iconservice_config.json which all fastsync processes share
+        :param backup_mode: how a checkpoint is copied to a working directory
+            "hardlink" shares table files with the checkpoint. See utils.backup.backup_dir()
+        :param fastsync_args: extra arguments passed to fastsync
+        """
+        if workers < 1:
+            raise ValueError(f"Invalid workers: {workers}")
+
+        self._db_path = os.path.abspath(db_path)
+        self._workers = workers
+        self._block_format = block_format
+        self._config_path = config_path
+        self._backup_mode = backup_mode
+        self._fastsync_args: List[str] = list(fastsync_args)
+
+    def run(self, tasks: Sequence[ReplayTask]) -> List[ReplayResult]:
+        """
+        :return: results in task order
+        """
+        results: List[ReplayResult] = []
+
+        # Each thread only waits for its fastsync process
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            futures = [executor.submit(self._run_task, task) for task in tasks]
+
+            for future in as_completed(futures):
+                result: ReplayResult = future.result()
+                self._print_result(result)
+                results.append(result)
+
+        results.sort(key=lambda x: x.task.index)
+        return results
+
+    def _run_task(self, task: ReplayTask) -> ReplayResult:
+        start_time: float = time.monotonic()
+
+        # A task which fails to start should not abort the others and the report
+        try:
+            self._prepare(task)
+        except Exception as e:
+            return ReplayResult(
+                task=task,
+                returncode=-1,
+                last_height=-1,
+                duration=time.monotonic() - start_time,
+                error=f"Failed to prepare: {type(e).__name__}: {e}",
+            )
+
+        try:
+            return self._run_fastsync(task, start_time)
+        finally:
+            # The clone is only needed while fastsync runs
+            if self._clones_db:
+                remove_dir(self._get_db_path(task))
+
+    def _run_fastsync(self, task: ReplayTask, start_time: float) -> ReplayResult:
+        # fastsync does not check if statedb is right before the start height
+        checkpoint_height: int = self._get_last_height(task.work_path)
+        if checkpoint_height != task.start_height - 1:
+            return ReplayResult(
+                task=task,
+                returncode=-1,
+                last_height=checkpoint_height,
+                duration=time.monotonic() - start_time,
+                error=f"Invalid checkpoint: last block height is {checkpoint_height}",
+            )
+
+        with open(os.path.join(task.work_path, LOG_FILE), "wb") as f:
+            returncode: int = subprocess.call(
+                self._create_command(task),
+                cwd=task.work_path,
+                stdout=f,
+                stderr=subprocess.STDOUT,
+            )
+
+        return ReplayResult(
+            task=task,
+            returncode=returncode,
+            last_height=self._get_last_height(task.work_path),
+            duration=time.monotonic() - start_time,
+        )
+
+    def _prepare(self, task: ReplayTask):
+        """Copy the checkpoint and compact db and write iconservice config
+        to the working directory
+        """
+        if os.path.exists(task.work_path):
+            raise FileExistsError(f"Working directory already exists: {task.work_path}")
+        for basename in (".score", ".statedb"):
+            path: str = os.path.join(task.checkpoint_path, basename)
+            if not os.path.isdir(path):
+                raise FileNotFoundError(f"Checkpoint has no {basename}: {path}")
+        if self._clones_db and not os.path.isdir(self._db_path):
+            raise FileNotFoundError(f"Compact db not found: {self._db_path}")
+        os.makedirs(task.work_path)
+
+        for basename in (".score", ".statedb"):
+            backup_dir(
+                os.path.join(task.checkpoint_path, basename),
+                os.path.join(task.work_path, basename),
+                self._backup_mode,
+            )
+        if self._clones_db:
+            backup_dir(self._db_path, self._get_db_path(task), "hardlink")
+
+        conf: dict = {}
+        if self._config_path:
+            with open(self._config_path, "r") as f:
+                conf = json.load(f)
+
+        # rc listens on /tmp/iiss_{amqpKey}.sock, which must not be shared
+        conf["amqpKey"] = f"replay{os.getpid()}_{task.index}"
+
+        with open(os.path.join(task.work_path, CONFIG_FILE), "w") as f:
+            json.dump(conf, f, indent=4)
+
+    @property
+    def _clones_db(self) -> bool:
+        """Segment files can be read by any number of processes"""
+        return self._block_format == "leveldb"
+
+    def _get_db_path(self, task: ReplayTask) -> str:
+        if self._clones_db:
+            return os.path.join(task.work_path, DB_CLONE_DIR)
+
+        return self._db_path
+
+    def _create_command(self, task: ReplayTask) -> List[str]:
+        command: List[str] = [
+            sys.executable,
+            "-m",
+            "icondbtools",
+            "fastsync",
+            "--db",
+            self._get_db_path(task),
+            "--start",
+            str(task.start_height),
+            "--stop-on-error",
+            "--format",
+            self._block_format,
+            "--is-config",
+            CONFIG_FILE,
+            "--print-block-height",
+            str(1000),
+        ]
+        if task.end_height >= 0:
+            command += ["--end", str(task.end_height)]
+
+        return command + self._fastsync_args
+
+    @staticmethod
+    def _get_last_height(work_path: str) -> int:
+        reader = StateDatabaseReader()
+        try:
+            reader.open(os.path.join(work_path, ".statedb", "icon_dex"))
+            last_block = reader.get_last_block()
+            return last_block.height if last_block else -1
+        except Exception:
+            return -1
+        finally:
+            reader.close()
+
+    @staticmethod
+    def _print_result(result: ReplayResult):
+        task: ReplayTask = result.task
+        print(
+            f"[{task.index}] {task.start_height} ~ {task.end_height}: "
+            f"{'ok' if result.ok else 'FAILED'} "
+            f"last={result.last_height} returncode={result.returncode} "
+            f"duration={result.duration:.3f}s"
+            f"{'' if result.error is None else ' error=' + result.error}",
+            flush=True,
+        )
+
+
+def write_report(path: str, results: Sequence[ReplayResult]):
+    report = {
+        "ok": all(result.ok for result in results),
+        "segments": [result.to_dict() for result in results],
+    }
+
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
+
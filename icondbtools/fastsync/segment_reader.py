@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mmap
+import os
+import threading
+from typing import Optional, Dict, Iterator, Tuple
+
+from icondbtools.migrate.preps import PReps
+
+from ..migrate.block import Block
+from ..migrate.segment import (
+    FORMAT_VERSION,
+    INDEX_ENTRY_SIZE,
+    INDEX_FILE,
+    decode_index_entry,
+    get_segment_file_name,
+    load_meta,
+    load_preps,
+)
+
+
+# Printed instead of looking up segment archive by hash or for transaction results
+NO_INDEX_MESSAGE = "segment archive has no hash index / tx results"
+
+
+class SegmentBlockReader(object):
+    """Read block data from segment archive
+
+    Segment archive is created by "migrate" sub-command with "--format segment"
+    It has the same interface as BlockDatabaseReader for block and preps lookups.
+    Refer to migrate.segment for the structure
+    """
+
+    def __init__(self):
+        self._path: Optional[str] = None
+        self._start_height = -1
+        self._count = 0
+        self._preps: Dict[bytes, bytes] = {}
+
+        self._index: Optional[mmap.mmap] = None
+        self._segments: Dict[int, Tuple[object, mmap.mmap]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def chunk_size(self) -> int:
+        return 0
+
+    def open(self, db_path: str):
+        meta: Optional[dict] = load_meta(db_path)
+        if meta is None:
+            raise FileNotFoundError(f"Segment archive not found: {db_path}")
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported segment format: {meta['version']}")
+
+        self._path = db_path
+        self._start_height = meta["startHeight"]
+        self._count = meta["count"]
+        self._preps = load_preps(db_path)
+
+        if self._count > 0:
+            with open(os.path.join(db_path, INDEX_FILE), "rb") as f:
+                self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        with self._lock:
+            for f, mm in self._segments.values():
+                mm.close()
+                f.close()
+            self._segments.clear()
+
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+        self._path = None
+
+    def get_block_by_height(self, block_height: int) -> Optional[Block]:
+        value: Optional[bytes] = self.get_block_data_by_height(block_height)
+        if value is None:
+            return None
+
+        return Block.from_bytes(value)
+
+    def get_block_data_by_height(self, block_height: int) -> Optional[bytes]:
+        """Return Block.to_bytes() without decoding it"""
+        return self._get_block_value(block_height)
+
+    def iter_blocks(self, start: int, end: int = -1) -> Iterator[Block]:
+        """Iterate over blocks ranging from start to end in block height order
+
+        :param start: start block height
+        :param end: end block height, inclusive. -1 means the last block
+        """
+        end_height: int = self.get_end_block_height()
+        if end < 0 or end > end_height:
+            end = end_height
+
+        for height in range(max(start, self._start_height), end + 1):
+            yield self.get_block_by_height(height)
+
+    def iter_block_datas(
+        self, start: int, end: int = -1
+    ) -> Iterator[Tuple[int, bytes]]:
+        """Iterate over Block.to_bytes() in block height order without decoding it
+
+        :param start: start block height
+        :param end: end block height, inclusive. -1 means the last block
+        :return: (block_height, Block.to_bytes())
+        """
+        end_height: int = self.get_end_block_height()
+        if end < 0 or end > end_height:
+            end = end_height
+
+        for height in range(max(start, self._start_height), end + 1):
+            yield height, self._get_block_value(height)
+
+    def get_start_block_height(self) -> int:
+        return self._start_height if self._count > 0 else -1
+
+    def get_end_block_height(self) -> int:
+        if self._count == 0:
+            return -1
+
+        return self._start_height + self._count - 1
+
+    def load_main_preps(self, reps_hash: Optional[bytes]) -> list:
+        if reps_hash is None:
+            return []
+
+        value: bytes = self._preps[reps_hash]
+        preps: "PReps" = PReps.from_bytes(value)
+        return preps.to_list()
+
+    # Segment archive has no block_hash and tx_hash index and no transaction results.
+    # The lookups below return what BlockDatabaseReader returns for a missing index
+
+    def get_block_by_hash(self, block_hash: bytes) -> Optional[Block]:
+        return None
+
+    def get_block_height_by_hash(self, block_hash: bytes) -> int:
+        return -1
+
+    def get_transaction_index_by_hash(self, tx_hash: bytes) -> Tuple[int, int]:
+        return -1, -1
+
+    def get_transaction_by_hash(self, tx_hash: bytes) -> Optional[dict]:
+        return None
+
+    def get_transaction_results_by_height(self, block_height: int) -> Optional[list]:
+        return None
+
+    def get_transaction_result_by_hash(self, tx_hash: bytes):
+        return None
+
+    def _get_block_value(self, block_height: int) -> Optional[bytes]:
+        i: int = block_height - self._start_height
+        if not 0 <= i < self._count:
+            return None
+
+        offset: int = i * INDEX_ENTRY_SIZE
+        segment_no, offset, length = decode_index_entry(
+            self._index[offset : offset + INDEX_ENTRY_SIZE]
+        )
+
+        mm: mmap.mmap = self._get_segment(segment_no)
+        return mm[offset : offset + length]
+
+    def _get_segment(self, segment_no: int) -> mmap.mmap:
+        segment = self._segments.get(segment_no)
+        if segment is None:
+            with self._lock:
+                segment = self._segments.get(segment_no)
+                if segment is None:
+                    path = os.path.join(self._path, get_segment_file_name(segment_no))
+                    f = open(path, "rb")
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    segment = f, mm
+                    self._segments[segment_no] = segment
+
+        return segment[1]
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+from typing import TYPE_CHECKING, Optional
+
+from ..utils.utils import write_file_atomically
+
+if TYPE_CHECKING:
+    from iconservice.base.block import Block
+
+DEFAULT_CURSOR_PATH = ".statedb/fastsync_cursor.json"
+
+
+class SyncCursor(object):
+    """The state of fastsync which is saved after each commit
+
+    It lets fastsync resume from the block next to the last committed one
+    with the same main preps, instead of deriving them again
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        height: int,
+        block_hash: bytes,
+        main_preps_hash: Optional[bytes],
+        next_main_preps_pending: bool,
+    ):
+        """
+        :param height: the last committed block height
+        :param block_hash: the hash of the last committed block
+            It should be the prev_block_hash of the block to resume from
+        :param main_preps_hash: reps_hash of the main preps to validate the votes of the next block
+        :param next_main_preps_pending: main preps change from the next block
+        """
+        self.height = height
+        self.block_hash = block_hash
+        self.main_preps_hash = main_preps_hash
+        self.next_main_preps_pending = next_main_preps_pending
+
+    def __eq__(self, other):
+        return isinstance(other, SyncCursor) and self.to_dict() == other.to_dict()
+
+    def __str__(self):
+        return (
+            f"height={self.height} "
+            f"block_hash={self.block_hash.hex()} "
+            f"main_preps_hash={self.main_preps_hash.hex() if self.main_preps_hash else None} "
+            f"next_main_preps_pending={self.next_main_preps_pending}"
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.VERSION,
+            "height": self.height,
+            "blockHash": self.block_hash.hex(),
+            "mainPrepsHash": self.main_preps_hash.hex()
+            if self.main_preps_hash
+            else None,
+            "nextMainPrepsPending": self.next_main_preps_pending,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SyncCursor":
+        version: int = data["version"]
+        if version != cls.VERSION:
+            raise ValueError(f"Unknown cursor version: {version}")
+
+        main_preps_hash: Optional[str] = data["mainPrepsHash"]
+
+        return cls(
+            height=data["height"],
+            block_hash=bytes.fromhex(data["blockHash"]),
+            main_preps_hash=bytes.fromhex(main_preps_hash) if main_preps_hash else None,
+            next_main_preps_pending=data["nextMainPrepsPending"],
+        )
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SyncCursor"]:
+        try:
+            with open(path, "r") as f:
+                return cls.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def save(self, path: str):
+        dir_path: str = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        # fsync is skipped because statedb is not synced on commit either
+        write_file_atomically(path, json.dumps(self.to_dict()).encode(), sync=False)
+
+    def check(self, last_block: "Block"):
+        """Check if the cursor was saved right after last_block was committed
+
+        :param last_block: the last block in statedb
+        :exception ValueError: cursor mismatch
+        """
+        if self.height != last_block.height:
+            raise ValueError(
+                f"Cursor height mismatch: cursor={self.height} statedb={last_block.height}"
+            )
+        if self.block_hash != last_block.hash:
+            raise ValueError(
+                f"Cursor block_hash mismatch: "
+                f"cursor={self.block_hash.hex()} statedb={last_block.hash.hex()}"
+            )
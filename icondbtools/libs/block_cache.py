@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from collections import OrderedDict
+from typing import Optional, Hashable, Callable
+
+
+class BlockCache(object):
+    """LRU cache for block values read from leveldb, bounded by the total size in bytes
+
+    Values are kept as they are stored in leveldb.
+    Every reader decodes a cached value again, so callers are free to modify the decoded block.
+    """
+
+    def __init__(self, max_bytes: int):
+        if max_bytes < 1:
+            raise ValueError(f"Invalid max_bytes: {max_bytes}")
+
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Status
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def bytes(self) -> int:
+        """Total size of cached values in bytes"""
+        return self._bytes
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            value: Optional[bytes] = self._items.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: bytes):
+        size: int = len(value)
+        if size > self._max_bytes:
+            # A value bigger than the whole cache would evict everything for nothing
+            return
+
+        with self._lock:
+            old: Optional[bytes] = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+
+            self._items[key] = value
+            self._bytes += size
+
+            while self._bytes > self._max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+
+    def get_or_load(
+        self, key: Hashable, load: Callable[[], Optional[bytes]]
+    ) -> Optional[bytes]:
+        """Return the cached value or load it and put it into the cache
+
+        None returned by load is not cached
+        """
+        value: Optional[bytes] = self.get(key)
+        if value is None:
+            value = load()
+            if value is not None:
+                self.put(key, value)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def __str__(self) -> str:
+        return (
+            f"items={len(self._items)} "
+            f"bytes={self._bytes}/{self._max_bytes} "
+            f"hits={self._hits} "
+            f"misses={self._misses} "
+            f"evictions={self._evictions}"
+        )
+
+
+_default_block_cache: Optional[BlockCache] = None
+
+
+def configure_block_cache(max_bytes: int) -> Optional[BlockCache]:
+    """Set the cache which block readers share when no cache is given to them
+
+    :param max_bytes: memory budget in bytes. 0 disables the cache
+    :return: the configured cache or None
+    """
+    global _default_block_cache
+
+    if max_bytes < 0:
+        raise ValueError(f"Invalid block cache size: {max_bytes}")
+
+    _default_block_cache = BlockCache(max_bytes) if max_bytes > 0 else None
+    return _default_block_cache
+
+
+def get_default_block_cache() -> Optional[BlockCache]:
+    return _default_block_cache
@@ -1,7 +1,6 @@
 import json
-from typing import Optional, Dict
-
-import plyvel
+import os
+from typing import Optional, Dict, Iterator, List, Tuple
 
 from ..libs import (
     TRANSACTION_COUNT_KEY,
@@ -10,7 +9,9 @@ from ..libs import (
     PREPS_KEY_PREFIX,
     BLOCK_HEIGHT_KEY_PREFIX,
 )
+from ..libs.block_cache import BlockCache, get_default_block_cache
 from ..utils.convert_type import bytes_to_hex
+from ..utils.db import open_db
 
 
 class TransactionParser:
@@ -35,17 +36,44 @@ class BlockDatabaseRawReader(object):
         ex) block_hash_key, tx_hash_key
     """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[BlockCache] = None):
         self._db = None
+        # Reads go to this snapshot instead of db while it exists
+        self._snapshot = None
+        self._cache: Optional[BlockCache] = (
+            cache if cache is not None else get_default_block_cache()
+        )
+        self._cache_namespace = None
 
     def open(self, db_path: str):
-        self._db = plyvel.DB(db_path)
+        self._db = open_db(db_path)
+        self._cache_namespace = (self.__class__.__name__, os.path.abspath(db_path))
 
     def close(self):
+        self.release_snapshot()
+
         if self._db:
             self._db.close()
             self._db = None
 
+    def take_snapshot(self):
+        """Make the following reads see the db at this point until release_snapshot()
+
+        It keeps the last block and the blocks before it consistent with each other
+        while loopchain is writing new blocks
+        """
+        self.release_snapshot()
+        self._snapshot = self._db.snapshot()
+
+    def release_snapshot(self):
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    @property
+    def _reader(self):
+        return self._db if self._snapshot is None else self._snapshot
+
     def get_transaction_by_hash(self, tx_hash: bytes) -> bytes:
         """
         :param tx_hash: tx_hash in bytes not utf-8 encoded hex
@@ -99,12 +127,95 @@ class BlockDatabaseRawReader(object):
         :param block_height: block height in integer
         :return: block in bytes
         """
+        if self._cache is None:
+            return self._get_block_by_height(block_height)
+
+        return self._cache.get_or_load(
+            (self._cache_namespace, block_height),
+            lambda: self._get_block_by_height(block_height),
+        )
+
+    def _get_block_by_height(self, block_height: int) -> Optional[bytes]:
         block_hash_key: bytes = self.get_block_hash_key_by_height(block_height)
         if block_hash_key is None:
             return
 
         return self.get_data_by_key(block_hash_key)
 
+    def iter_blocks(
+        self, start: int, end: int = -1, batch_size: int = 1000
+    ) -> Iterator[Tuple[int, bytes, bytes]]:
+        """Iterate over blocks ranging from start to end in block height order
+
+        Block hash keys are read with a single iterator over block_height_key prefix
+        and block bodies are fetched in batches, sorted by their keys,
+        to reduce random reads on leveldb.
+        Iteration stops at the first missing block height.
+
+        :param start: start block height
+        :param end: end block height, inclusive. -1 means the last block
+        :param batch_size: the number of block bodies to fetch at once
+        :return: (block_height, block_hash_key, block)
+        """
+        if -1 < end < start:
+            raise ValueError(f"end({end}) < start({start})")
+
+        batch: List[Tuple[int, bytes]] = []
+        for height, block_hash_key in self._iter_block_hash_keys(start, end):
+            batch.append((height, block_hash_key))
+            if len(batch) < batch_size:
+                continue
+
+            blocks = self._get_blocks_in_batch(batch)
+            yield from blocks
+            if len(blocks) < len(batch):
+                return
+            batch.clear()
+
+        if len(batch) > 0:
+            yield from self._get_blocks_in_batch(batch)
+
+    def _iter_block_hash_keys(self, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+        if end > -1:
+            stop: bytes = self.get_block_height_key(end + 1)
+        else:
+            stop: bytes = BLOCK_HEIGHT_KEY_PREFIX + b"\xff" * 13
+
+        it = self._reader.iterator(start=self.get_block_height_key(start), stop=stop)
+        try:
+            expected_height = start
+            prefix_size = len(BLOCK_HEIGHT_KEY_PREFIX)
+            for key, block_hash_key in it:
+                height = int.from_bytes(key[prefix_size:], "big")
+                if height != expected_height:
+                    break
+
+                yield height, block_hash_key
+                expected_height += 1
+        finally:
+            it.close()
+
+    def _get_blocks_in_batch(
+        self, batch: List[Tuple[int, bytes]]
+    ) -> List[Tuple[int, bytes, bytes]]:
+        """Fetch block bodies in key order and return them in block height order
+
+        The result is truncated at the first block which is not found
+        """
+        blocks: Dict[bytes, Optional[bytes]] = {
+            key: self.get_data_by_key(key)
+            for key in sorted(block_hash_key for _, block_hash_key in batch)
+        }
+
+        ret: List[Tuple[int, bytes, bytes]] = []
+        for height, block_hash_key in batch:
+            block: Optional[bytes] = blocks[block_hash_key]
+            if block is None:
+                break
+            ret.append((height, block_hash_key, block))
+
+        return ret
+
     def get_block_hash_key_by_height(self, block_height: int) -> Optional[bytes]:
         """Get block hash in bytes by block height
 
@@ -127,7 +238,7 @@ class BlockDatabaseRawReader(object):
         return self.get_data_by_key(block_hash_key)
 
     def get_data_by_key(self, key: bytes) -> Optional[bytes]:
-        return self._db.get(key)
+        return self._reader.get(key)
 
     @staticmethod
     def get_block_height_key(block_height: int) -> bytes:
@@ -152,7 +263,7 @@ class BlockDatabaseRawReader(object):
 
     def get_nid(self) -> Optional[bytes]:
         """Get NID"""
-        return self._db.get(NID_KEY)
+        return self.get_data_by_key(NID_KEY)
 
     def get_transaction_count(self) -> Optional[bytes]:
         """Get transaction count"""
@@ -160,11 +271,16 @@ class BlockDatabaseRawReader(object):
 
     def get_reps(self, reps_hash: bytes) -> bytes:
         key = PREPS_KEY_PREFIX + reps_hash
-        reps = self._db.get(key)
+        reps = self.get_data_by_key(key)
         if reps is None:
             return b"{}"
         return reps
 
     def get_reps_data(self) -> Dict[bytes, bytes]:
-        sub_db = self._db.prefixed_db(PREPS_KEY_PREFIX)
-        return {key: value for key, value in sub_db}
+        """Return all reps data keyed by reps_hash, read from the snapshot if any"""
+        prefix_size = len(PREPS_KEY_PREFIX)
+        it = self._reader.iterator(prefix=PREPS_KEY_PREFIX)
+        try:
+            return {key[prefix_size:]: value for key, value in it}
+        finally:
+            it.close()
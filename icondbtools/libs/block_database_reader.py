@@ -14,26 +14,32 @@
 # limitations under the License.
 
 import json
+import os
 import sys
 import time
 from pprint import pprint
 from typing import Optional
 
-import plyvel
-
 from icondbtools.libs import BLOCK_HEIGHT_KEY_PREFIX, LAST_BLOCK_KEY, PREPS_KEY_PREFIX
+from icondbtools.libs.block_cache import BlockCache, get_default_block_cache
 from icondbtools.utils.convert_type import convert_hex_str_to_bytes
+from icondbtools.utils.db import open_db
 
 
 class BlockDatabaseReader(object):
     """Read block data from leveldb managed by loopchain
     """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[BlockCache] = None):
         self._db = None
+        self._cache: Optional[BlockCache] = (
+            cache if cache is not None else get_default_block_cache()
+        )
+        self._cache_namespace = None
 
     def open(self, db_path: str):
-        self._db = plyvel.DB(db_path)
+        self._db = open_db(db_path)
+        self._cache_namespace = (self.__class__.__name__, os.path.abspath(db_path))
 
     def close(self):
         if self._db:
@@ -41,13 +47,27 @@ class BlockDatabaseReader(object):
             self._db = None
 
     def get_block_by_block_height(self, block_height: int) -> Optional[dict]:
+        if self._cache is None:
+            value: Optional[bytes] = self._get_block_value_by_height(block_height)
+        else:
+            value: Optional[bytes] = self._cache.get_or_load(
+                (self._cache_namespace, block_height),
+                lambda: self._get_block_value_by_height(block_height),
+            )
+
+        if value is None:
+            return
+
+        return json.loads(value)
+
+    def _get_block_value_by_height(self, block_height: int) -> Optional[bytes]:
         block_height_key = BLOCK_HEIGHT_KEY_PREFIX + block_height.to_bytes(12, "big")
 
         key: bytes = self._db.get(block_height_key)
         if key is None:
             return
 
-        return self.get_block_by_key(key)
+        return self._db.get(key)
 
     def get_block_by_block_hash(self, block_hash: str) -> Optional[dict]:
         """Get block data with hexa string representing block hash
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import re
+import threading
+from typing import Optional
+
+from iconcommons.logger.logger import icon_logger
+
+
+class CalculateDetector(logging.Handler):
+    """Detect the reward calculation of rc from the logs of in-process iconservice
+
+    iconservice logs "CALCULATE(...)" when rc starts to calculate
+    and "CALCULATE_DONE(...)" when rc notifies that the calculation is done.
+    Records are caught as soon as they are logged, without reading iconservice.log
+    """
+
+    def __init__(
+        self, start_word: str = r"CALCULATE\(", done_word: str = r"CALCULATE_DONE\("
+    ):
+        super().__init__(level=logging.DEBUG)
+
+        self._start_word = re.compile(start_word)
+        self._done_word = re.compile(done_word)
+
+        # Set while no calculation is in progress
+        self._done = threading.Event()
+        self._done.set()
+
+        self._logger: Optional[logging.Logger] = None
+
+    @property
+    def calculating(self) -> bool:
+        return not self._done.is_set()
+
+    def install(self, logger: logging.Logger = icon_logger):
+        self._logger = logger
+        logger.addHandler(self)
+
+    def uninstall(self):
+        if self._logger is not None:
+            self._logger.removeHandler(self)
+            self._logger = None
+
+    def emit(self, record: logging.LogRecord):
+        msg: str = record.getMessage()
+
+        if self._done_word.search(msg):
+            self._done.set()
+        elif self._start_word.search(msg):
+            self._done.clear()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the calculation in progress is done
+
+        It returns immediately if no calculation is in progress
+
+        :param timeout: seconds. None means no timeout
+        :return: False if timeout expires
+        """
+        return self._done.wait(timeout)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Hash statedb by key ranges on parallel processes
+
+Each range is hashed in the same way as StateDatabaseReader.create_state_hash()
+and the range hashes are combined into a merkle root.
+The root differs from the hash of statedb command without --chunks,
+but two statedbs with the same data always have the same root and range hashes,
+so that a mismatch can be found by comparing range hashes
+"""
+
+import hashlib
+from typing import List, NamedTuple, Optional
+
+from .range_scan import RangeTask, get_reader, map_ranges
+from .state_database_reader import StateDatabaseReader, StateHash
+
+
+class RangeHash(NamedTuple):
+    index: int
+    # Inclusive. None means the first key of db
+    start: Optional[bytes]
+    # Exclusive. None means the end of db
+    stop: Optional[bytes]
+    hash_data: bytes
+    rows: int
+    total_key_size: int
+    total_value_size: int
+
+    def __str__(self):
+        start: str = "" if self.start is None else self.start.hex()
+        stop: str = "" if self.stop is None else self.stop.hex()
+        return (
+            f"{self.index:>5} [{start:>4}, {stop:>4}) {self.hash_data.hex()} "
+            f"rows={self.rows} key_size={self.total_key_size} "
+            f"value_size={self.total_value_size}"
+        )
+
+
+class ChunkedStateHash(object):
+    def __init__(self, ranges: List[RangeHash], block_height: int = -1):
+        self.ranges = ranges
+        self.root_hash: bytes = merkle_root([r.hash_data for r in ranges])
+        self.block_height = block_height
+
+    @property
+    def rows(self) -> int:
+        return sum(r.rows for r in self.ranges)
+
+    @property
+    def total_key_size(self) -> int:
+        return sum(r.total_key_size for r in self.ranges)
+
+    @property
+    def total_value_size(self) -> int:
+        return sum(r.total_value_size for r in self.ranges)
+
+    def __str__(self):
+        lines = [str(r) for r in self.ranges]
+        lines.append(
+            f"root_hash: {self.root_hash.hex()}\n"
+            f"chunks: {len(self.ranges)}\n"
+            f"rows: {self.rows}\n"
+            f"total_key_size: {self.total_key_size}\n"
+            f"total_value_size: {self.total_value_size}\n"
+            f"block_height: {self.block_height}"
+        )
+        return "\n".join(lines)
+
+
+def merkle_root(hashes: List[bytes]) -> bytes:
+    """Combine hashes pairwise with sha3_256 up to a single root
+
+    A hash without its pair is carried to the upper level as it is
+    """
+    if not hashes:
+        return hashlib.sha3_256().digest()
+
+    while len(hashes) > 1:
+        hashes = [
+            hashlib.sha3_256(b"".join(hashes[i:i + 2])).digest()
+            if i + 1 < len(hashes)
+            else hashes[i]
+            for i in range(0, len(hashes), 2)
+        ]
+
+    return hashes[0]
+
+
+def _hash_range(task: RangeTask) -> RangeHash:
+    index, start, stop = task
+    state_hash: StateHash = get_reader().create_range_state_hash(start, stop)
+
+    return RangeHash(
+        index,
+        start,
+        stop,
+        state_hash.hash_data,
+        state_hash.rows,
+        state_hash.total_key_size,
+        state_hash.total_value_size,
+    )
+
+
+def create_chunked_state_hash(
+    db_path: str, chunks: int, workers: int
+) -> ChunkedStateHash:
+    """
+    :param db_path: statedb path. It should not be written to while it is hashed
+    :param chunks: the number of key ranges
+    :param workers: the number of processes to hash ranges with
+    """
+    block, ranges = map_ranges(
+        db_path,
+        _hash_range,
+        chunks,
+        workers,
+        read_base=StateDatabaseReader.get_last_block,
+    )
+
+    return ChunkedStateHash(ranges, -1 if block is None else block.height)
@@ -17,8 +17,6 @@ import asyncio
 import inspect
 import logging
 import os
-import shutil
-import time
 from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Optional, List, Tuple, Dict
 
@@ -39,10 +37,17 @@ from iconservice.iiss.reward_calc.storage import Storage
 from icondbtools.data.vote import Vote
 from icondbtools.utils.convert_type import object_to_str
 from icondbtools.utils.transaction import create_transaction_requests
-from icondbtools.word_detector import WordDetector
 from .block_database_reader import BlockDatabaseReader
+from .calculate_detector import CalculateDetector
 from .loopchain_block import LoopchainBlock
 from ..data.node_container import NodeContainer
+from ..utils.backup import (
+    STATE_DB_BACKUP_PREFIX,
+    BackupStats,
+    backup_dir,
+    remove_old_backups,
+)
+from ..utils.metrics import SYNC_STAGES, StageMetrics
 from ..utils.utils import remove_dir
 
 if TYPE_CHECKING:
@@ -210,9 +215,13 @@ class IconServiceSyncer(object):
         stop_on_error: bool = True,
         no_commit: bool = False,
         backup_period: int = 0,
+        backup_mode: str = "copy",
+        backup_keep: int = 0,
         write_precommit_data: bool = False,
         print_block_height: int = 1,
         iiss_db_backup_path: Optional[str] = None,
+        metrics_path: Optional[str] = None,
+        metrics_period: int = 0,
     ) -> int:
         """Begin to synchronize IconServiceEngine with blocks from loopchain db
 
@@ -223,141 +232,171 @@ class IconServiceSyncer(object):
         :param stop_on_error: If error happens, stop syncing
         :param no_commit: Do not commit
         :param backup_period: state backup period in block
+        :param backup_mode: "copy" or "hardlink". See utils.backup.backup_dir()
+        :param backup_keep: keep only the last this number of state backups. 0 means all
         :param write_precommit_data:
         :param print_block_height: print every this block height
+        :param metrics_path: file to dump the time spent in each stage per block
+            CSV if it ends with ".csv", otherwise JSONL
+        :param metrics_period: print the stage metrics summary every this block
+            0 means that it is printed only at the end
         :return: 0(success), otherwise(error)
         """
         Logger.debug(tag=self._TAG, msg="_run() start")
 
-        word_detector = WordDetector(
-            filename="iconservice.log",
-            block_word=r"CALCULATE\(",
-            release_word=r"CALCULATE_DONE\(",
-        )
+        metrics = StageMetrics(SYNC_STAGES, metrics_path)
+        metrics.open()
+        calculate_detector = CalculateDetector()
+        calculate_detector.install()
         ret: int = 0
-        self._block_reader.open(db_path)
-
-        print("block_height | commit_state | state_root_hash | tx_count")
-
-        prev_block: Optional["Block"] = None
-        prev_loopchain_block: Optional["LoopchainBlock"] = None
-        main_preps: Optional['NodeContainer'] = None
-        next_main_preps: Optional["NodeContainer"] = None
-
-        if start_height > 0:
-            prev_block_dict = self._block_reader.get_block_by_block_height(start_height - 1)
-            prev_loopchain_block = LoopchainBlock.from_dict(prev_block_dict)
-
-            # init main_preps
-            preps: list = self._block_reader.load_main_preps(prev_block_dict)
-            main_preps: Optional['NodeContainer'] = NodeContainer.from_list(preps=preps)
-
-            # when sync from the first block of term, have to initialize next_main_preps here
-            # in that case, invoke_result[3] will be None on first block and can not update next_main_preps
-            block_dict = self._block_reader.get_block_by_block_height(start_height)
-            loopchain_block = LoopchainBlock.from_dict(block_dict)
-            block = _create_iconservice_block(loopchain_block)
-            if self._check_calculation_block(block):
-                preps: list = self._block_reader.load_main_preps(block_dict)
-                next_main_preps: Optional['NodeContainer'] = NodeContainer.from_list(preps=preps)
-
-        end_height = start_height + count - 1
-
-        for height in range(start_height, end_height + 1):
-            block_dict: dict = self._block_reader.get_block_by_block_height(height)
-
-            if block_dict is None:
-                print(f"last block: {height - 1}")
-                break
-
-            loopchain_block: 'LoopchainBlock' = LoopchainBlock.from_dict(block_dict)
-            block: 'Block' = _create_iconservice_block(loopchain_block)
-
-            tx_requests: list = create_transaction_requests(loopchain_block)
-            prev_block_generator: Optional[
-                "Address"
-            ] = prev_loopchain_block.leader if prev_loopchain_block else None
-            prev_block_validators: Optional[List["Address"]] = _create_block_validators(
-                block_dict, prev_block_generator
-            )
-            prev_block_votes: Optional[
-                List[Tuple["Address", int]]
-            ] = _create_prev_block_votes(block_dict, prev_block_generator, main_preps)
-
-            if prev_block is not None and prev_block.hash != block.prev_hash:
-                raise Exception()
-
-            invoke_result = self._engine.invoke(
-                block,
-                tx_requests,
-                prev_block_generator,
-                prev_block_validators,
-                prev_block_votes,
-            )
-            tx_results, state_root_hash = invoke_result[0], invoke_result[1]
-            main_preps_as_dict: Optional[Dict] = invoke_result[3]
 
-            commit_state: bytes = self._block_reader.get_commit_state(
-                block_dict, channel
-            )
+        try:
+            self._block_reader.open(db_path)
 
-            # "commit_state" is the field name of state_root_hash in loopchain block
-            if (height - start_height) % print_block_height == 0:
-                print(
-                    f"{height} | {commit_state.hex()[:6]} | {state_root_hash.hex()[:6]} | {len(tx_requests)}"
-                )
+            print("block_height | commit_state | state_root_hash | tx_count")
 
-            if write_precommit_data:
-                self._print_precommit_data(block)
+            prev_block: Optional["Block"] = None
+            prev_loopchain_block: Optional["LoopchainBlock"] = None
+            main_preps: Optional['NodeContainer'] = None
+            next_main_preps: Optional["NodeContainer"] = None
 
-            try:
-                if stop_on_error:
-                    if commit_state:
-                        if commit_state != state_root_hash:
-                            raise Exception()
+            if start_height > 0:
+                prev_block_dict = self._block_reader.get_block_by_block_height(start_height - 1)
+                prev_loopchain_block = LoopchainBlock.from_dict(prev_block_dict)
 
-                    if height > 0 and not self._check_invoke_result(tx_results):
-                        raise Exception()
-            except Exception as e:
-                logging.exception(e)
+                # init main_preps
+                preps: list = self._block_reader.load_main_preps(prev_block_dict)
+                main_preps: Optional['NodeContainer'] = NodeContainer.from_list(preps=preps)
 
-                self._print_precommit_data(block)
-                ret: int = 1
-                break
+                # when sync from the first block of term, have to initialize next_main_preps here
+                # in that case, invoke_result[3] will be None on first block and can not update next_main_preps
+                block_dict = self._block_reader.get_block_by_block_height(start_height)
+                loopchain_block = LoopchainBlock.from_dict(block_dict)
+                block = _create_iconservice_block(loopchain_block)
+                if self._check_calculation_block(block):
+                    preps: list = self._block_reader.load_main_preps(block_dict)
+                    next_main_preps: Optional['NodeContainer'] = NodeContainer.from_list(preps=preps)
 
-            is_calculation_block = self._check_calculation_block(block)
+            end_height = start_height + count - 1
 
-            if is_calculation_block:
-                word_detector.start()
-                time.sleep(0.5)
-                if iiss_db_backup_path is not None:
-                    self._backup_iiss_db(iiss_db_backup_path, block.height)
+            for height in range(start_height, end_height + 1):
+                metrics.begin_block(height)
 
-            # If no_commit is set to True, the config only affects to the last block to commit
-            if height < end_height:
-                while word_detector.get_hold():
-                    time.sleep(0.5)
+                with metrics.measure("read"):
+                    block_dict: dict = self._block_reader.get_block_by_block_height(height)
 
-                # Call IconServiceEngine.commit() with a block
-                if not no_commit:
-                    self._commit(block)
+                if block_dict is None:
+                    print(f"last block: {height - 1}")
+                    break
 
-            while word_detector.get_hold():
-                time.sleep(0.5)
-            # Prepare the next iteration
-            self._backup_state_db(block, backup_period)
-            prev_block = block
-            prev_loopchain_block = loopchain_block
+                with metrics.measure("read"):
+                    loopchain_block: 'LoopchainBlock' = LoopchainBlock.from_dict(block_dict)
 
-            if next_main_preps:
-                main_preps = next_main_preps
-                next_main_preps = None
+                with metrics.measure("build"):
+                    block: 'Block' = _create_iconservice_block(loopchain_block)
 
-            if main_preps_as_dict is not None:
-                next_main_preps = NodeContainer.from_dict(main_preps_as_dict)
+                    tx_requests: list = create_transaction_requests(loopchain_block)
+                    prev_block_generator: Optional[
+                        "Address"
+                    ] = prev_loopchain_block.leader if prev_loopchain_block else None
+                    prev_block_validators: Optional[List["Address"]] = _create_block_validators(
+                        block_dict, prev_block_generator
+                    )
+                    prev_block_votes: Optional[
+                        List[Tuple["Address", int]]
+                    ] = _create_prev_block_votes(block_dict, prev_block_generator, main_preps)
+
+                if prev_block is not None and prev_block.hash != block.prev_hash:
+                    raise Exception()
+
+                with metrics.measure("invoke"):
+                    invoke_result = self._engine.invoke(
+                        block,
+                        tx_requests,
+                        prev_block_generator,
+                        prev_block_validators,
+                        prev_block_votes,
+                    )
+                tx_results, state_root_hash = invoke_result[0], invoke_result[1]
+                main_preps_as_dict: Optional[Dict] = invoke_result[3]
 
-        self._block_reader.close()
-        word_detector.stop()
+                commit_state: bytes = self._block_reader.get_commit_state(
+                    block_dict, channel
+                )
+
+                # "commit_state" is the field name of state_root_hash in loopchain block
+                if (height - start_height) % print_block_height == 0:
+                    print(
+                        f"{height} | {commit_state.hex()[:6]} | {state_root_hash.hex()[:6]} | {len(tx_requests)}"
+                    )
+
+                if write_precommit_data:
+                    self._print_precommit_data(block)
+
+                try:
+                    with metrics.measure("verify"):
+                        if stop_on_error:
+                            if commit_state:
+                                if commit_state != state_root_hash:
+                                    raise Exception()
+
+                            if height > 0 and not self._check_invoke_result(tx_results):
+                                raise Exception()
+                except Exception as e:
+                    logging.exception(e)
+
+                    self._print_precommit_data(block)
+                    ret: int = 1
+                    break
+
+                is_calculation_block = self._check_calculation_block(block)
+
+                if is_calculation_block:
+                    if iiss_db_backup_path is not None:
+                        with metrics.measure("backup"):
+                            self._backup_iiss_db(
+                                iiss_db_backup_path, block.height, backup_mode
+                            )
+
+                # If no_commit is set to True, the config only affects to the last block to commit
+                if height < end_height:
+                    with metrics.measure("calc_wait"):
+                        calculate_detector.wait()
+
+                    # Call IconServiceEngine.commit() with a block
+                    if not no_commit:
+                        with metrics.measure("commit"):
+                            self._commit(block)
+
+                # Wait for rc to finish the calculation requested on commit
+                with metrics.measure("calc_wait"):
+                    calculate_detector.wait()
+                # Prepare the next iteration
+                with metrics.measure("backup"):
+                    self._backup_state_db(
+                        block, backup_period, backup_mode, backup_keep
+                    )
+                metrics.end_block()
+
+                if metrics_period > 0 and metrics.blocks % metrics_period == 0:
+                    print(f"\n{metrics.summary()}")
+
+                prev_block = block
+                prev_loopchain_block = loopchain_block
+
+                if next_main_preps:
+                    main_preps = next_main_preps
+                    next_main_preps = None
+
+                if main_preps_as_dict is not None:
+                    next_main_preps = NodeContainer.from_dict(main_preps_as_dict)
+        finally:
+            # Leave no handler on the global logger for the next run in this process
+            self._block_reader.close()
+            calculate_detector.uninstall()
+            metrics.close()
+
+        print(metrics.summary())
 
         Logger.debug(tag=self._TAG, msg=f"_run() end: {ret}")
         return ret
@@ -368,7 +407,12 @@ class IconServiceSyncer(object):
         else:
             self._engine.commit(block.height, block.hash, block.hash)
 
-    def _backup_iiss_db(self, iiss_db_backup_path: Optional[str], block_height: int):
+    def _backup_iiss_db(
+        self,
+        iiss_db_backup_path: Optional[str],
+        block_height: int,
+        backup_mode: str = "copy",
+    ):
         iiss_db_path: str = os.path.join(self._engine._state_db_root_path, "iiss")
 
         with os.scandir(iiss_db_path) as it:
@@ -380,7 +424,7 @@ class IconServiceSyncer(object):
                     )
                     if os.path.exists(dst_path):
                         remove_dir(dst_path)
-                    shutil.copytree(entry.path, dst_path)
+                    backup_dir(entry.path, dst_path, backup_mode)
                     break
 
     def _check_invoke_result(self, tx_results: list):
@@ -519,7 +563,9 @@ class IconServiceSyncer(object):
         return start_block == block.height
 
     @staticmethod
-    def _backup_state_db(block: "Block", backup_period: int):
+    def _backup_state_db(
+        block: "Block", backup_period: int, backup_mode: str = "copy", backup_keep: int = 0
+    ):
         if backup_period <= 0:
             return
         if block.height == 0:
@@ -527,12 +573,18 @@ class IconServiceSyncer(object):
 
         if block.height % backup_period == 0:
             print(f"----------- Backup statedb: {block.height} ------------")
-            dirname: str = f"block-{'%09d' % block.height}"
+            dirname: str = f"{STATE_DB_BACKUP_PREFIX}{'%09d' % block.height}"
+            stats = BackupStats()
             for basename in (".score", ".statedb"):
-                try:
-                    shutil.copytree(basename, f"{dirname}/{basename}/")
-                except FileExistsError:
-                    pass
+                dst_path: str = os.path.join(dirname, basename)
+                if os.path.exists(dst_path):
+                    continue
+                stats += backup_dir(basename, dst_path, backup_mode)
+            print(f"backup: {stats}")
+
+            if backup_keep > 0:
+                for path in remove_old_backups(".", STATE_DB_BACKUP_PREFIX, backup_keep):
+                    print(f"backup removed: {path}")
 
     def close(self):
         pass
@@ -16,10 +16,10 @@
 
 from typing import List
 
-import plyvel
-
 from iconservice.iiss.reward_calc.msg_data import TxData
 
+from ..utils.db import open_db
+
 
 class BPCountResult(object):
     def __init__(
@@ -94,7 +94,7 @@ class IISSDataReader(object):
         self._db = None
 
     def open(self, db_path: str):
-        self._db = plyvel.DB(db_path)
+        self._db = open_db(db_path)
 
     def close(self):
         if self._db:
@@ -103,11 +103,11 @@ class IISSDataReader(object):
 
     @property
     def iterator(self):
-        return self._db.iterator()
+        return self._db.iterator(fill_cache=False)
 
     @property
     def tx_iterator(self):
-        return self._db.iterator(prefix=TxData.PREFIX)
+        return self._db.iterator(prefix=TxData.PREFIX, fill_cache=False)
 
     def count_bp(self) -> "BPCountResult":
         prefix = b"BP"
@@ -116,7 +116,7 @@ class IISSDataReader(object):
         dropped_heights: List[int] = []
         count = 0
 
-        for key, value in self._db.iterator(prefix=prefix):
+        for key, value in self._db.iterator(prefix=prefix, fill_cache=False):
             height: int = int.from_bytes(key[len(prefix):], "big", signed=False)
 
             if start_height < 0:
@@ -137,7 +137,7 @@ class IISSDataReader(object):
         dropped_indices: List[int] = []
         count = 0
 
-        for key, value in self._db.iterator(prefix=prefix):
+        for key, value in self._db.iterator(prefix=prefix, fill_cache=False):
             index: int = int.from_bytes(key[len(prefix) :], "big", signed=False)
 
             if start_index < 0:
@@ -17,9 +17,10 @@ import json
 import logging
 import shutil
 
-import plyvel
 import timeit
 
+from ..utils.db import open_db
+
 HASH_LEN: int = 64
 PRT_SIZE: int = 100_000
 
@@ -38,25 +39,40 @@ class PruneDatabase:
         start_time = timeit.default_timer()
         self._ready()
         self._prune_db()
-        self._recover_blocks()
+
+        src_db = open_db(self._db_path)
+        try:
+            self._recover_blocks(src_db)
+        finally:
+            src_db.close()
         end_time = timeit.default_timer()
         logging.warning(f"run Done {end_time - start_time}sec")
 
     def run_new(self):
         logging.warning(f"run Start")
         start_time = timeit.default_timer()
-        self._move()
-        self._recover_blocks()
+
+        # Both steps read the db as of the last block at this point
+        # even if loopchain is writing to it
+        src_db = open_db(self._db_path)
+        snapshot = src_db.snapshot()
+        try:
+            logging.warning(f"snapshot last_block_bh: {self._get_last_block_bh(snapshot)}")
+            self._move(snapshot)
+            self._recover_blocks(snapshot)
+        finally:
+            snapshot.close()
+            src_db.close()
+
         end_time = timeit.default_timer()
         logging.warning(f"run Done {end_time - start_time}sec")
 
-    def _move(self):
-        src_db = plyvel.DB(name=self._db_path)
-        new_db = plyvel.DB(name=self._dest_db_path, create_if_missing=True)
+    def _move(self, src_db):
+        new_db = open_db(self._dest_db_path, create_if_missing=True, for_write=True)
 
         prune_cnt: int = 0
         total_cnt: int = 0
-        for k, v in src_db.iterator():
+        for k, v in src_db.iterator(fill_cache=False):
             if len(k) == HASH_LEN:
                 new_db.put(k, b'')
                 prune_cnt += 1
@@ -72,7 +88,6 @@ class PruneDatabase:
         logging.warning(f"test total_cnt: {total_cnt}")
 
         new_db.close()
-        src_db.close()
 
     def _ready(self):
         logging.warning(f"ready Init")
@@ -82,13 +97,13 @@ class PruneDatabase:
 
     def _prune_db(self):
         logging.warning(f"prune_db Init")
-        new_db = plyvel.DB(name=self._dest_db_path)
+        new_db = open_db(self._dest_db_path, for_write=True)
 
         prune_cnt: int = 0
         total_cnt: int = 0
         total_bytes: int = 0
 
-        for k, v in new_db.iterator():
+        for k, v in new_db.iterator(fill_cache=False):
             if len(k) == HASH_LEN and v != b'':
                 new_db.delete(k)
                 new_db.put(k, b'')
@@ -105,9 +120,8 @@ class PruneDatabase:
         logging.warning(f"prune_db total_cnt: {total_cnt}")
         logging.warning(f"prune_db Release")
 
-    def _recover_blocks(self):
-        src_db = plyvel.DB(name=self._db_path)
-        new_db = plyvel.DB(name=self._dest_db_path)
+    def _recover_blocks(self, src_db):
+        new_db = open_db(self._dest_db_path, for_write=True)
 
         last_block_bh: int = self._get_last_block_bh(src_db)
         logging.warning(f"last_block_bh: {last_block_bh}")
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Scan statedb by key ranges on parallel processes
+
+The key space is split into fixed ranges by the first 2 bytes of keys.
+leveldb can be opened by only one process. Each worker process opens its own clone
+of the db, whose table files are hardlinked to those of the original one
+"""
+
+import os
+import tempfile
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from .state_database_reader import StateDatabaseReader
+from ..utils.backup import backup_dir
+from ..utils.parallel import imap_ordered
+from ..utils.utils import remove_dir
+
+# The number of leading bytes of keys which ranges are split by
+RANGE_KEY_SIZE = 2
+MAX_CHUNKS = 256 ** RANGE_KEY_SIZE
+
+# (index, start, stop)
+RangeTask = Tuple[int, Optional[bytes], Optional[bytes]]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def create_ranges(chunks: int) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+    """Split the key space into chunks ranges by the first RANGE_KEY_SIZE bytes
+
+    :return: (start, stop) list
+    """
+    if not 1 <= chunks <= MAX_CHUNKS:
+        raise ValueError(f"Invalid chunks: {chunks}")
+
+    bounds: List[Optional[bytes]] = [
+        (i * MAX_CHUNKS // chunks).to_bytes(RANGE_KEY_SIZE, "big")
+        for i in range(chunks)
+    ]
+    # Keys shorter than RANGE_KEY_SIZE can be less than the first bound. e.g. b"\x00"
+    bounds[0] = None
+    bounds.append(None)
+
+    return [(bounds[i], bounds[i + 1]) for i in range(chunks)]
+
+
+# The reader opened on each worker process
+_reader: Optional[StateDatabaseReader] = None
+
+
+def get_reader() -> StateDatabaseReader:
+    """Return the reader of the clone opened on the current worker process"""
+    return _reader
+
+
+def _open_clone(base_path: str, clone_root_path: str):
+    global _reader
+
+    clone_path: str = os.path.join(clone_root_path, f"worker-{os.getpid()}")
+    backup_dir(base_path, clone_path, "hardlink")
+
+    _reader = StateDatabaseReader()
+    _reader.open(clone_path)
+
+
+def _close_clone():
+    global _reader
+
+    if _reader is not None:
+        _reader.close()
+        _reader = None
+
+
+def map_ranges(
+    db_path: str,
+    func: Callable[[RangeTask], R],
+    chunks: int,
+    workers: int,
+    read_base: Callable[[StateDatabaseReader], T],
+) -> Tuple[T, List[R]]:
+    """Apply func to each key range on worker processes
+
+    :param db_path: statedb path. It should not be written to while it is scanned
+    :param func: module-level function which reads a range with get_reader()
+    :param chunks: the number of key ranges
+    :param workers: the number of processes to scan ranges with.
+        1 scans ranges on the caller process from a snapshot of db_path without clones
+    :param read_base: called with the reader of db_path while nobody writes to it
+        e.g. StateDatabaseReader.get_last_block
+    :return: the result of read_base and the results of func in range order
+    """
+    tasks: List[RangeTask] = [
+        (i, start, stop) for i, (start, stop) in enumerate(create_ranges(chunks))
+    ]
+
+    if workers == 1:
+        return _map_ranges_in_place(db_path, func, tasks, read_base)
+
+    db_path = os.path.abspath(db_path)
+    # Hardlinks are only available on the same file system
+    clone_root_path: str = tempfile.mkdtemp(
+        prefix=".rangescan-", dir=os.path.dirname(db_path)
+    )
+    base_path: str = os.path.join(clone_root_path, "base")
+
+    reader = StateDatabaseReader()
+    try:
+        # Holding the lock of db, nobody writes to it while the base clone is made
+        reader.open(db_path)
+        backup_dir(db_path, base_path, "hardlink")
+        base = read_base(reader)
+        reader.close()
+
+        results: List[R] = list(
+            imap_ordered(
+                func,
+                tasks,
+                workers,
+                initializer=_open_clone,
+                initargs=(base_path, clone_root_path),
+            )
+        )
+    finally:
+        reader.close()
+        remove_dir(clone_root_path)
+
+    return base, results
+
+
+def _map_ranges_in_place(
+    db_path: str,
+    func: Callable[[RangeTask], R],
+    tasks: List[RangeTask],
+    read_base: Callable[[StateDatabaseReader], T],
+) -> Tuple[T, List[R]]:
+    global _reader
+
+    reader = StateDatabaseReader()
+    try:
+        reader.open(db_path)
+        # read_base and func see the db as of the same point
+        reader.take_snapshot()
+        _reader = reader
+
+        base = read_base(reader)
+        results: List[R] = [func(task) for task in tasks]
+    finally:
+        _reader = None
+        reader.close()
+
+    return base, results
@@ -1,7 +1,7 @@
-import plyvel
-
 from iconservice.base.address import Address
 
+from ..utils.db import open_db
+
 
 class ScoreDatabaseManager(object):
     def __init__(self):
@@ -9,7 +9,7 @@ class ScoreDatabaseManager(object):
         self._score_address = None
 
     def open(self, db_path: str, score_address: "Address"):
-        self._db = plyvel.DB(db_path, create_if_missing=False)
+        self._db = open_db(db_path, for_write=True)
         self._score_address: "Address" = score_address
 
     def read_from_dict_db(self, dict_db_name: str, address: "Address") -> bytes:
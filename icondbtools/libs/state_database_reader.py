@@ -14,9 +14,7 @@
 # limitations under the License.
 
 import hashlib
-from typing import Union, Optional, Iterator
-
-import plyvel
+from typing import Union, Optional, Iterator, Tuple
 
 from iconservice.base.address import Address
 from iconservice.base.block import Block
@@ -28,6 +26,7 @@ from iconservice.utils.msgpack_for_db import MsgPackForDB
 from iconservice.iconscore.db import (
     PrefixStorage, Key, KeyType
 )
+from ..utils.db import open_db
 
 
 class StateHash(object):
@@ -37,33 +36,59 @@ class StateHash(object):
         rows: int = 0,
         total_key_size: int = 0,
         total_value_size: int = 0,
+        block_height: int = -1,
     ):
         self.hash_data = hash_data
         self.rows = rows
         self.total_key_size = total_key_size
         self.total_value_size = total_value_size
+        # The last block committed to the db which the hash was created from
+        self.block_height = block_height
 
     def __str__(self):
         return (
             f"hash: {self.hash_data.hex()}\n"
             f"rows: {self.rows}\n"
             f"total_key_size: {self.total_key_size}\n"
-            f"total_value_size: {self.total_value_size}"
+            f"total_value_size: {self.total_value_size}\n"
+            f"block_height: {self.block_height}"
         )
 
 
 class StateDatabaseReader(object):
     def __init__(self):
         self._db = None
+        # Reads go to this snapshot instead of db while it exists
+        self._snapshot = None
 
     def open(self, db_path: str):
-        self._db = plyvel.DB(db_path)
+        self._db = open_db(db_path)
 
     def close(self):
+        self.release_snapshot()
+
         if self._db is not None:
             self._db.close()
             self._db = None
 
+    def take_snapshot(self):
+        """Make the following reads see the db at this point until release_snapshot()
+
+        Long scans over a db which iconservice is still writing to
+        see the state as of a single block with it
+        """
+        self.release_snapshot()
+        self._snapshot = self._db.snapshot()
+
+    def release_snapshot(self):
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    @property
+    def _reader(self):
+        return self._db if self._snapshot is None else self._snapshot
+
     def get_account(self, address: "Address", current_block_height: int, revision: int) -> Optional["Account"]:
         """Read the account from statedb
 
@@ -72,11 +97,31 @@ class StateDatabaseReader(object):
         :param revision:
         :return:
         """
-        value: bytes = self._db.get(address.to_bytes())
+        value: bytes = self._reader.get(address.to_bytes())
         if value is None:
             return None
 
-        coin_part = self._get_part(CoinPart, address)
+        return self.create_account(address, value, current_block_height, revision)
+
+    def create_account(
+        self,
+        address: "Address",
+        coin_part_value: bytes,
+        current_block_height: int,
+        revision: int,
+    ) -> "Account":
+        """Create the account from the value of its coin part which has been read
+
+        It saves a read while iterating statedb. Only stake and delegation parts are read
+
+        :param address:
+        :param coin_part_value: the value of address.to_bytes() in statedb
+        :param current_block_height:
+        :param revision:
+        :return:
+        """
+        coin_part = CoinPart.from_bytes(coin_part_value)
+        coin_part.set_complete(True)
         stake_part = self._get_part(StakePart, address)
         delegation_part = self._get_part(DelegationPart, address)
         # print("coinPart flag : ", coin_part.flags)
@@ -98,7 +143,28 @@ class StateDatabaseReader(object):
 
     @property
     def iterator(self):
-        return self._db.iterator()
+        # Full scans should not evict hot blocks from leveldb cache
+        return self._reader.iterator(fill_cache=False)
+
+    def iterate(
+        self,
+        prefix: Optional[bytes] = None,
+        start: Optional[bytes] = None,
+        stop: Optional[bytes] = None,
+    ) -> Iterator[Tuple[bytes, bytes]]:
+        """Iterate over key and value in ascending order of key
+
+        :param prefix: iterate only keys which start with it. Keys are not stripped
+        :param start: the first key, inclusive. It can not be used with prefix
+        :param stop: the last key, exclusive. It can not be used with prefix
+        """
+        if prefix is None:
+            return self._reader.iterator(start=start, stop=stop, fill_cache=False)
+
+        if start is not None or stop is not None:
+            raise ValueError("prefix can not be used with start or stop")
+
+        return self._reader.iterator(prefix=prefix, fill_cache=False)
 
     def get_coin_part(self, address: 'Address') -> CoinPart:
         return self._get_part(CoinPart, address)
@@ -113,32 +179,32 @@ class StateDatabaseReader(object):
                   part_class: Union[type(CoinPart), type(StakePart), type(DelegationPart)],
                   address: 'Address') -> Union['CoinPart', 'StakePart', 'DelegationPart']:
         key: bytes = part_class.make_key(address)
-        value: bytes = self._db.get(key)
+        value: bytes = self._reader.get(key)
 
         part = part_class.from_bytes(value) if value else part_class()
         part.set_complete(True)
         return part
 
     def get_by_key(self, key: bytes) -> bytes:
-        return self._db.get(key)
+        return self._reader.get(key)
 
     def get_last_block(self) -> "Block":
         """Read the last commited block from statedb
 
         :return: last block
         """
-        value: bytes = self._db.get(b"last_block")
+        value: bytes = self._reader.get(b"last_block")
         if value is None:
             return None
 
         return Block.from_bytes(value)
 
     def get_total_supply(self) -> int:
-        value: bytes = self._db.get(b'total_supply')
+        value: bytes = self._reader.get(b'total_supply')
         return int.from_bytes(value, 'big') if value else 0
 
     def get_total_stake(self) -> int:
-        value: bytes = self._db.get(b'iiss' + b'ts')
+        value: bytes = self._reader.get(b'iiss' + b'ts')
         if value:
             data = MsgPackForDB.loads(value)
             version: int = data[0]
@@ -155,17 +221,36 @@ class StateDatabaseReader(object):
         """
 
         if prefix is None:
-            db = self._db
+            it = self._reader.iterator(fill_cache=False)
         else:
-            db = self._db.prefixed_db(prefix)
+            it = self._reader.iterator(prefix=prefix, fill_cache=False)
+            # Keys are hashed without prefix, which is the way prefixed_db iterates
+            it = ((key[len(prefix):], value) for key, value in it)
+
+        state_hash, rows, total_key_size, total_value_size = self._create_state_hash(it)
+
+        block: Optional["Block"] = self.get_last_block()
+        block_height: int = -1 if block is None else block.height
 
-        state_hash, rows, total_key_size, total_value_size = self._create_state_hash(db)
-        return StateHash(state_hash, rows, total_key_size, total_value_size)
+        return StateHash(state_hash, rows, total_key_size, total_value_size, block_height)
+
+    def create_range_state_hash(
+        self, start: Optional[bytes], stop: Optional[bytes]
+    ) -> "StateHash":
+        """Create sha3 hash value from key and value in a key range
+
+        :param start: the first key, inclusive. None means the first key of db
+        :param stop: the last key, exclusive. None means the end of db
+        :return: StateHash object. block_height is not set
+        """
+        it = self._reader.iterator(start=start, stop=stop, fill_cache=False)
+        return StateHash(*self._create_state_hash(it))
 
     @staticmethod
-    def _create_state_hash(db) -> tuple:
+    def _create_state_hash(it) -> tuple:
         """Read key and value from state db and create sha3 hash value from them
 
+        :param it: iterator over key and value
         :return: StateHash object
         """
 
@@ -175,7 +260,7 @@ class StateDatabaseReader(object):
 
         sha3_256 = hashlib.sha3_256()
 
-        for key, value in db:
+        for key, value in it:
             sha3_256.update(key)
             sha3_256.update(value)
 
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from enum import Enum
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple
+
+
+class DiffType(Enum):
+    ADDED = "+"
+    REMOVED = "-"
+    CHANGED = "*"
+
+
+class StateDiff(NamedTuple):
+    type: DiffType
+    key: bytes
+    # None if the key is added
+    old_value: Optional[bytes]
+    # None if the key is removed
+    new_value: Optional[bytes]
+
+
+class DiffCounter(object):
+    def __init__(self):
+        self.rows = 0
+        self.added = 0
+        self.removed = 0
+        self.changed = 0
+
+    @property
+    def diffs(self) -> int:
+        return self.added + self.removed + self.changed
+
+    def __str__(self):
+        return (
+            f"rows: {self.rows}\n"
+            f"added: {self.added}\n"
+            f"removed: {self.removed}\n"
+            f"changed: {self.changed}"
+        )
+
+
+def diff_items(
+    old_items: Iterable[Tuple[bytes, bytes]],
+    new_items: Iterable[Tuple[bytes, bytes]],
+    counter: Optional[DiffCounter] = None,
+) -> Iterator[StateDiff]:
+    """Merge-join two key-value streams sorted by key and yield the differences
+
+    Only the current item of each stream is kept in memory
+
+    :param old_items: (key, value) in ascending order of key
+    :param new_items: (key, value) in ascending order of key
+    :param counter: updated as items are compared
+    """
+    if counter is None:
+        counter = DiffCounter()
+
+    old_it = iter(old_items)
+    new_it = iter(new_items)
+    old: Optional[Tuple[bytes, bytes]] = next(old_it, None)
+    new: Optional[Tuple[bytes, bytes]] = next(new_it, None)
+
+    while old is not None or new is not None:
+        counter.rows += 1
+
+        if new is None or (old is not None and old[0] < new[0]):
+            counter.removed += 1
+            yield StateDiff(DiffType.REMOVED, old[0], old[1], None)
+            old = next(old_it, None)
+        elif old is None or new[0] < old[0]:
+            counter.added += 1
+            yield StateDiff(DiffType.ADDED, new[0], None, new[1])
+            new = next(new_it, None)
+        else:
+            if old[1] != new[1]:
+                counter.changed += 1
+                yield StateDiff(DiffType.CHANGED, old[0], old[1], new[1])
+            old = next(old_it, None)
+            new = next(new_it, None)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sum up balances, stakes and deposits of statedb in a single sequential scan
+
+Each value is decoded by the prefix or length of its key as it is iterated,
+instead of reading coin and stake parts again by address
+"""
+
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple
+
+from iconservice.fee.deposit import Deposit
+from iconservice.icx.coin_part import CoinPart
+from iconservice.icx.stake_part import StakePart
+from iconservice.utils.msgpack_for_db import MsgPackForDB
+
+from .range_scan import RangeTask, get_reader, map_ranges
+from .state_database_reader import StateDatabaseReader
+
+if TYPE_CHECKING:
+    from iconservice.base.block import Block
+
+MSG_PACK_DEPOSIT_DATA_LENGTH = 11
+
+
+def is_account_key(key: bytes) -> bool:
+    key_length = len(key)
+    if key_length == 20:
+        return True
+    elif key_length == 21:
+        if key[0] == 1:
+            return True
+    return False
+
+
+def is_fee2_key(key: bytes) -> bool:
+    key_length = len(key)
+    if key_length == 33:
+        if key[0] == 2:
+            return True
+    return False
+
+
+def is_deposit(value: bytes) -> bool:
+    data = MsgPackForDB.loads(value)
+    if len(data) == MSG_PACK_DEPOSIT_DATA_LENGTH:
+        return True
+    return False
+
+
+class TotalBalance(object):
+    """Partial sums which can be merged with +="""
+
+    def __init__(self, block_height: int = -1, total_supply: int = 0):
+        self.block_height = block_height
+        self.total_supply = total_supply
+
+        self.balance = 0
+        self.staked = 0
+        self.deposit = 0
+        self.active_account_count = 0
+        self.staking_account_count = 0
+        self.deposit_count = 0
+        self.errors = 0
+
+    @property
+    def full_balance(self) -> int:
+        return self.balance + self.staked + self.deposit
+
+    def update(self, key: bytes, value: bytes):
+        try:
+            if is_account_key(key):
+                coin_part = CoinPart.from_bytes(value)
+                self.active_account_count += 1
+                self.balance += coin_part.balance
+            elif key.startswith(StakePart.PREFIX):
+                stake_part = StakePart.from_bytes(value)
+                stake_part.set_complete(True)
+                total_stake: int = stake_part.total_stake
+                if total_stake > 0:
+                    self.staking_account_count += 1
+                    self.staked += total_stake
+            elif is_fee2_key(key):
+                if is_deposit(value):
+                    deposit = Deposit.from_bytes(value)
+                    self.deposit += deposit.deposit_amount
+                    self.deposit_count += 1
+        except BaseException:
+            self.errors += 1
+
+    def scan(self, it: Iterable[Tuple[bytes, bytes]]):
+        for key, value in it:
+            self.update(key, value)
+
+    def __iadd__(self, other: "TotalBalance") -> "TotalBalance":
+        self.balance += other.balance
+        self.staked += other.staked
+        self.deposit += other.deposit
+        self.active_account_count += other.active_account_count
+        self.staking_account_count += other.staking_account_count
+        self.deposit_count += other.deposit_count
+        self.errors += other.errors
+        return self
+
+    def __str__(self):
+        return (
+            f"block height : {self.block_height}\n"
+            f"total supply : {self.total_supply:30,}\n"
+            f"total balance: {self.full_balance:30,}\n"
+            f"      balance: {self.balance:30,}\n"
+            f"      staked : {self.staked:30,}\n"
+            f"      deposit: {self.deposit:30,}\n"
+            f"diff         : {self.full_balance - self.total_supply:,}\n"
+            f"active account count : {self.active_account_count:,}\n"
+            f"staking account count : {self.staking_account_count:,}\n"
+            f"deposit         count : {self.deposit_count:,}\n"
+            f"errors: {self.errors}"
+        )
+
+
+def _read_base(reader: StateDatabaseReader) -> Tuple[int, int]:
+    block: Optional["Block"] = reader.get_last_block()
+    return -1 if block is None else block.height, reader.get_total_supply()
+
+
+def _sum_range(task: RangeTask) -> TotalBalance:
+    _, start, stop = task
+
+    total_balance = TotalBalance()
+    total_balance.scan(get_reader().iterate(start=start, stop=stop))
+    return total_balance
+
+
+def create_total_balance(
+    db_path: str, chunks: int = 1, workers: int = 1
+) -> TotalBalance:
+    """
+    :param db_path: statedb path
+    :param chunks: the number of key ranges. Used if workers > 1
+    :param workers: the number of processes to scan ranges with.
+        1 scans the whole db on a snapshot without clones
+    """
+    if workers == 1:
+        reader = StateDatabaseReader()
+        try:
+            reader.open(db_path)
+            # All values below are read as of the last block in the snapshot
+            reader.take_snapshot()
+            total_balance = TotalBalance(*_read_base(reader))
+            total_balance.scan(reader.iterate())
+        finally:
+            reader.close()
+
+        return total_balance
+
+    (block_height, total_supply), results = map_ranges(
+        db_path, _sum_range, chunks, workers, read_base=_read_base
+    )
+
+    total_balance = TotalBalance(block_height, total_supply)
+    for result in results:
+        total_balance += result
+
+    return total_balance
@@ -14,14 +14,18 @@
 # limitations under the License.
 
 from abc import ABCMeta, abstractmethod
-from typing import Iterable, Tuple
+from typing import TYPE_CHECKING, Iterable, Iterator, Tuple, Optional, List
 
 from ..data.transaction import Transaction
 from ..data.transaction_result import TransactionResult
+from ..fastsync.block_reader import create_block_reader
 from ..libs.block_database_raw_reader import BlockDatabaseRawReader
 from ..libs.loopchain_block import LoopchainBlock
 from ..utils.convert_type import hex_to_bytes
 
+if TYPE_CHECKING:
+    from ..migrate.block import Block
+
 
 class TransactionFilter(metaclass=ABCMeta):
     @abstractmethod
@@ -32,10 +36,12 @@ class TransactionFilter(metaclass=ABCMeta):
 class TransactionCollector(object):
     """Collect the transactions which satisfy a specific condition from loopchain DB
 
+    Subclasses read another kind of DB by overriding _create_reader(),
+    _iter_block_transactions() and _get_transaction()
     """
 
     def __init__(self):
-        self._reader = BlockDatabaseRawReader()
+        self._reader = self._create_reader()
 
         self._start_block_height = -1
         self._end_block_height = -1
@@ -72,44 +78,27 @@ class TransactionCollector(object):
         :param tx_filter:
         :return:
         """
-        if start_block_height > end_block_height:
+        if -1 < end_block_height < start_block_height:
             raise ValueError(
                 f"start_block_height({start_block_height}) > end_block_height({end_block_height})"
             )
 
         self._start_block_height = start_block_height
+        self._end_block_height = start_block_height - 1
+        print(f"BH-{start_block_height}")
 
-        block_height = start_block_height
-        print(f"BH-{block_height}")
-
-        while True:
-            if -1 < end_block_height < block_height:
-                break
-
-            block_data: bytes = self._reader.get_block_by_height(block_height)
-            if block_data is None:
-                break
-
+        for block_height, txs in self._iter_block_transactions(
+            start_block_height, end_block_height
+        ):
             if block_height % 1000 == 0:
                 print(f"BH-{block_height}")
 
-            block = LoopchainBlock.from_bytes(block_data)
-
-            for tx_data in block.transactions:
-                # Skip base transactions
-                if "from" not in tx_data:
-                    continue
-
-                tx = Transaction.from_dict(tx_data)
-                tx_result = self._get_transaction_result(tx.tx_hash)
-
+            for tx, tx_result in txs:
                 ret = tx_filter.run(tx, tx_result) if tx_filter else True
                 if ret:
                     yield tx, tx_result
 
-            block_height += 1
-
-        self._end_block_height = block_height - 1
+            self._end_block_height = block_height
 
     def run_with_file(self, path: str):
         with open(path, mode="r") as f:
@@ -119,23 +108,147 @@ class TransactionCollector(object):
                     continue
 
                 tx_hash = hex_to_bytes(line)
-                data: bytes = self._reader.get_transaction_by_hash(tx_hash)
-                if data is None:
+                item = self._get_transaction(tx_hash)
+                if item is None:
                     break
 
-                tx = Transaction.from_bytes(data)
-                tx_result = TransactionResult.from_json(data)
+                tx, tx_result = item
+                # Skip the results not compatible to protocol v3 as run() does
+                if tx_result is None:
+                    continue
+
                 yield tx, tx_result
 
+    def close(self):
+        self._reader.close()
+
+    def _clear(self):
+        self._start_block_height = -1
+        self._end_block_height = -1
+
+    def _create_reader(self):
+        return BlockDatabaseRawReader()
+
+    def _iter_block_transactions(
+        self, start_block_height: int, end_block_height: int
+    ) -> Iterator[Tuple[int, Iterator[Tuple["Transaction", "TransactionResult"]]]]:
+        """Yield block height and the transactions in the block with their results
+
+        Base transactions are excluded
+        """
+        for block_height, _, block_data in self._reader.iter_blocks(
+            start_block_height, end_block_height
+        ):
+            block = LoopchainBlock.from_bytes(block_data)
+            yield block_height, self._iter_transactions(block)
+
+    def _iter_transactions(
+        self, block: "LoopchainBlock"
+    ) -> Iterator[Tuple["Transaction", "TransactionResult"]]:
+        for tx_data in block.transactions:
+            # Skip base transactions
+            if "from" not in tx_data:
+                continue
+
+            tx = Transaction.from_dict(tx_data)
+            yield tx, self._get_transaction_result(tx.tx_hash)
+
+    def _get_transaction(
+        self, tx_hash: bytes
+    ) -> Optional[Tuple["Transaction", Optional["TransactionResult"]]]:
+        """
+        :return: None if tx_hash is not found
+        """
+        data: bytes = self._reader.get_transaction_by_hash(tx_hash)
+        if data is None:
+            return None
+
+        return Transaction.from_bytes(data), TransactionResult.from_json(data)
+
     def _get_transaction_result(self, tx_hash: bytes) -> "TransactionResult":
         data: bytes = self._reader.get_transaction_result_by_hash(tx_hash)
         assert isinstance(data, bytes)
 
         return TransactionResult.from_json(data)
 
-    def close(self):
-        self._reader.close()
 
-    def _clear(self):
-        self._start_block_height = -1
-        self._end_block_height = -1
+class CompactTransactionCollector(TransactionCollector):
+    """Collect the transactions which satisfy a specific condition from compact DB
+
+    Compact DB should be migrated with transaction results
+    """
+
+    NO_TX_RESULTS_MESSAGE = (
+        "compact db has no transaction results. Migrate the db with --tx-results"
+    )
+
+    def __init__(self, block_format: str = "leveldb"):
+        """
+        :param block_format: format of compact db. Segment archive has no tx results
+        """
+        self._block_format = block_format
+        super().__init__()
+
+    @property
+    def has_tx_results(self) -> bool:
+        """Probe the results of the last block. Call it after open()
+
+        migrate --tx-results writes the results of every block,
+        and segment archive has none of them
+        """
+        height: int = self._reader.get_end_block_height()
+        if height < 0:
+            return False
+
+        return self._reader.get_transaction_results_by_height(height) is not None
+
+    def _create_reader(self):
+        return create_block_reader(self._block_format)
+
+    def _iter_block_transactions(
+        self, start_block_height: int, end_block_height: int
+    ) -> Iterator[Tuple[int, Iterator[Tuple["Transaction", "TransactionResult"]]]]:
+        for block in self._reader.iter_blocks(start_block_height, end_block_height):
+            tx_results = self._get_transaction_results(block.height)
+            yield block.height, self._iter_transactions_with_results(
+                block, tx_results
+            )
+
+    @staticmethod
+    def _iter_transactions_with_results(
+        block: "Block", tx_results: List[Optional["TransactionResult"]]
+    ) -> Iterator[Tuple["Transaction", "TransactionResult"]]:
+        for params, tx_result in zip(block.transactions, tx_results):
+            # Skip base transactions and the results not compatible to protocol v3
+            if "from" not in params or tx_result is None:
+                continue
+
+            yield Transaction.from_params(params), tx_result
+
+    def _get_transaction(
+        self, tx_hash: bytes
+    ) -> Optional[Tuple["Transaction", Optional["TransactionResult"]]]:
+        block_height, index = self._reader.get_transaction_index_by_hash(tx_hash)
+        if block_height < 0:
+            return None
+
+        params: Optional[dict] = self._reader.get_transaction_by_hash(tx_hash)
+        if params is None:
+            return None
+
+        tx_results = self._get_transaction_results(block_height)
+        return Transaction.from_params(params), tx_results[index]
+
+    def _get_transaction_results(
+        self, block_height: int
+    ) -> List[Optional["TransactionResult"]]:
+        tx_results: Optional[
+            List[Optional["TransactionResult"]]
+        ] = self._reader.get_transaction_results_by_height(block_height)
+        if tx_results is None:
+            raise ValueError(
+                f"No transaction results: block_height={block_height}\n"
+                f"Migrate the db with --tx-results"
+            )
+
+        return tx_results
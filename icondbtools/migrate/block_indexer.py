@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+from typing import Iterator, Tuple
+
+from icondbtools.fastsync.block_reader import Bucket, make_dict_key
+from icondbtools.migrate.block import Block
+from icondbtools.migrate.block_migrator import make_block_index_entries
+from icondbtools.migrate.chunk import BlockChunk
+from icondbtools.migrate.codec import BlockDecompressor, decode_dict_value
+from icondbtools.utils.db import open_db
+from icondbtools.utils.timer import Timer
+
+TAG = "IDX"
+
+
+class BlockIndexer(object):
+    """Add indexes to a compact db which has already been migrated
+
+    Process
+    1. Iterate over binary blocks in block height order
+    2. Write index entries of each block to the same db
+    """
+
+    MAX_BYTES_TO_CACHE = 1_000_000
+    PRINT_PERIOD = 10_000
+
+    def __init__(self):
+        self._db = None
+        self._write_batch = None
+        self._decompressor = None
+
+        # Status
+        self._bytes_to_write = 0
+        self._blocks_done = 0
+        self._last_height = -1
+        self._timer = Timer()
+
+    def open(self, db_path: str):
+        # Never create a new db: backfill is meaningful only for an existing one
+        self._db = open_db(db_path, for_write=True)
+        self._write_batch = self._db.write_batch()
+        self._decompressor = BlockDecompressor(self._load_dict)
+        self._bytes_to_write = 0
+
+    def close(self):
+        self._bytes_to_write = 0
+
+        if self._db:
+            self._db.close()
+            self._db = None
+
+    def run(self):
+        self._timer.start()
+
+        try:
+            self._run()
+        finally:
+            self._flush()
+            self._timer.stop()
+            self._print_status()
+
+    def _run(self):
+        for _, block in self._iter_blocks():
+            self._index_block(block)
+
+            if self._bytes_to_write >= self.MAX_BYTES_TO_CACHE:
+                self._flush()
+
+            if self._blocks_done % self.PRINT_PERIOD == 0:
+                self._timer.stop()
+                self._print_status()
+
+    def _iter_blocks(self) -> Iterator[Tuple[int, Block]]:
+        """Iterate over blocks stored one by one and in chunks"""
+        it = self._db.iterator(prefix=Bucket.BLOCK_HEIGHT.value)
+        try:
+            for _, value in it:
+                block = Block.from_bytes(self._decompressor.decompress(value))
+                yield block.height, block
+        finally:
+            it.close()
+
+        it = self._db.iterator(prefix=Bucket.BLOCK_CHUNK.value, include_key=False)
+        try:
+            for value in it:
+                chunk = BlockChunk.from_bytes(self._decompressor.decompress(value))
+                for height, block_value in chunk:
+                    yield height, Block.from_bytes(block_value)
+        finally:
+            it.close()
+
+    def _load_dict(self, dict_id: int):
+        value = self._db.get(make_dict_key(dict_id))
+        return None if value is None else decode_dict_value(value)
+
+    def _index_block(self, block: Block):
+        for key, value in make_block_index_entries(block):
+            self._write_batch.put(key, value)
+            self._bytes_to_write += len(key) + len(value)
+
+        self._blocks_done += 1
+        self._last_height = block.height
+
+    def _flush(self):
+        if self._bytes_to_write > 0:
+            self._write_batch.write()
+            self._write_batch.clear()
+            self._bytes_to_write = 0
+
+    def _print_status(self):
+        elapsed = int(self._timer.duration())
+
+        status = (
+            f"{self._last_height}",
+            f"{self._blocks_done}",
+            f"{timedelta(seconds=elapsed)}",
+        )
+
+        print(" ".join(status), flush=True)
@@ -1,14 +1,40 @@
 # -*- coding: utf-8 -*-
 
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
+from typing import Iterator, List, NamedTuple, Tuple, Optional, Set
 
-import plyvel
-
+from icondbtools.data.transaction_result import TransactionResult
 from icondbtools.migrate.block import Block
-from icondbtools.fastsync.block_reader import Bucket
-from icondbtools.libs.block_database_raw_reader import BlockDatabaseRawReader
+from icondbtools.fastsync.block_reader import (
+    Bucket,
+    CHUNK_SIZE_KEY,
+    PROGRESS_KEY,
+    make_block_chunk_key,
+    make_dict_key,
+)
+from icondbtools.libs.block_database_raw_reader import (
+    BlockDatabaseRawReader,
+    TransactionParser,
+)
 from icondbtools.libs.loopchain_block import LoopchainBlock
+from icondbtools.migrate.chunk import BlockChunk, get_chunk_start
+from icondbtools.migrate.codec import (
+    BlockCompressor,
+    BlockDecompressor,
+    Codec,
+    decode_dict_value,
+    encode_dict_value,
+    train_dictionary,
+)
 from icondbtools.migrate.preps import PReps
+from icondbtools.fastsync.segment_reader import SegmentBlockReader
+from icondbtools.migrate.segment import SegmentWriter, DEFAULT_SEGMENT_SIZE
+from icondbtools.utils import pack
+from icondbtools.utils.db import open_db
+from icondbtools.utils.parallel import batched, imap_ordered
 from icondbtools.utils.timer import Timer
 
 TAG = "MGT"
@@ -18,10 +44,80 @@ def make_block_height_key(height: int) -> bytes:
     return Bucket.BLOCK_HEIGHT.value + int.to_bytes(height, 8, "big")
 
 
+def make_block_hash_key(block_hash: bytes) -> bytes:
+    return Bucket.BLOCK_HASH.value + block_hash
+
+
+def make_block_result_key(height: int) -> bytes:
+    return Bucket.BLOCK_RESULT.value + int.to_bytes(height, 8, "big")
+
+
+def make_tx_hash_key(tx_hash: bytes) -> bytes:
+    return Bucket.TX_HASH.value + tx_hash
+
+
+def make_tx_hash_value(height: int, index: int) -> bytes:
+    """height(8) + index of the transaction in the block(4)"""
+    return int.to_bytes(height, 8, "big") + int.to_bytes(index, 4, "big")
+
+
+def make_block_index_entries(block: Block) -> List[Tuple[bytes, bytes]]:
+    """Make index entries pointing to a given block
+
+    * block_hash -> height
+    * tx_hash -> height + index in block
+    """
+    height: bytes = int.to_bytes(block.height, 8, "big")
+    entries = [(make_block_hash_key(block.block_hash), height)]
+
+    for i, tx in enumerate(block.transactions):
+        tx_hash: Optional[bytes] = tx.get("txHash")
+        if tx_hash is not None:
+            entries.append(
+                (make_tx_hash_key(tx_hash), make_tx_hash_value(block.height, i))
+            )
+
+    return entries
+
+
 def make_preps_key(reps_hash: bytes) -> bytes:
     return Bucket.PREPS.value + reps_hash
 
 
+class ConvertedBlock(NamedTuple):
+    """A block converted from loopchain block, ready to be written to the target db"""
+
+    height: int
+    # Block.to_bytes()
+    value: bytes
+    index_entries: List[Tuple[bytes, bytes]]
+    # Keys to read transaction results from loopchain db. None for genesis transaction
+    tx_hash_keys: List[Optional[bytes]]
+
+
+def convert_block_data(data: bytes) -> ConvertedBlock:
+    """Convert a loopchain block data to a binary block
+
+    It is pure CPU work, so it can run on a worker process
+    """
+    loopchain_block = LoopchainBlock.from_bytes(data)
+    block = Block.from_loopchain_block(loopchain_block)
+
+    return ConvertedBlock(
+        height=block.height,
+        value=block.to_bytes(),
+        index_entries=make_block_index_entries(block),
+        tx_hash_keys=[
+            TransactionParser.get_tx_hash_key_from_transaction(tx_dict)
+            for tx_dict in loopchain_block.transactions
+        ],
+    )
+
+
+def convert_blocks(datas: List[bytes]) -> List[ConvertedBlock]:
+    return [convert_block_data(data) for data in datas]
+
+
 class BlockMigrator(object):
     """Migrate block data to a new db
 
@@ -29,14 +125,79 @@ class BlockMigrator(object):
     1. Read block data from loopchain db
     2. Convert loopchain block to binary block
     3. Write binary block data to a new db
+
+    The last block height written to the new db is saved with each flush
+    so that migration can resume from there after interruption
     """
 
     MAX_BYTES_TO_CACHE = 1_000_000
-
-    def __init__(self):
+    # The number of blocks a worker process converts at a time
+    BLOCKS_PER_TASK = 100
+
+    def __init__(
+        self,
+        tx_results: bool = False,
+        compression: Optional[str] = None,
+        dict_samples: int = 1000,
+        dict_size: int = 112_640,
+        chunk_size: int = 0,
+        block_format: str = "leveldb",
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        workers: int = 1,
+    ):
+        """
+        :param tx_results: migrate transaction results as well as blocks
+        :param compression: codec name to compress blocks with. None means no compression
+        :param dict_samples: the number of sample blocks to train a dictionary with
+            0 means no dictionary
+        :param dict_size: max dictionary size in bytes
+        :param chunk_size: the number of blocks to pack into one value
+            0 means one value per block
+        :param block_format: "leveldb" or "segment"
+            segment archive has neither indexes, transaction results, compression nor chunks
+        :param segment_size: max segment file size in bytes
+        :param workers: the number of processes to convert blocks with
+            1 means that blocks are converted on the main process
+        """
         self._block_reader = BlockDatabaseRawReader()
         self._new_db = None
         self._write_batch = None
+        self._tx_results = tx_results
+
+        self._codec: Optional[Codec] = (
+            Codec.from_name(compression) if compression else None
+        )
+        self._dict_samples = dict_samples
+        self._dict_size = dict_size
+        self._compressor: Optional[BlockCompressor] = None
+
+        if chunk_size < 0:
+            raise ValueError(f"Invalid chunk_size: {chunk_size}")
+        self._chunk_size = chunk_size
+        self._chunk: Optional[BlockChunk] = None
+
+        self._segment_writer: Optional[SegmentWriter] = None
+        if block_format == "segment":
+            if tx_results or compression or chunk_size > 0:
+                raise ValueError(
+                    "Segment format supports neither tx_results, compression nor chunks"
+                )
+            self._segment_writer = SegmentWriter(segment_size)
+        elif block_format != "leveldb":
+            raise ValueError(f"Unknown block format: {block_format}")
+
+        if workers < 1:
+            raise ValueError(f"Invalid workers: {workers}")
+        self._workers = workers
+        # Pool kept open across the polls of follow(). None creates one per run
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self._new_db_path: Optional[str] = None
+        # The last block height written to write_batch and the one flushed to the new db
+        self._last_height = -1
+        self._flushed_height = -1
+        # reps_hashes whose preps have already been written to the new db
+        self._migrated_reps_hashes: Set[bytes] = set()
 
         # Status
         self._bytes_to_write = 0
@@ -47,12 +208,24 @@ class BlockMigrator(object):
 
     def open(self, db_path: str, new_db_path: str):
         self._block_reader.open(db_path)
+        self._new_db_path = new_db_path
 
-        new_db = plyvel.DB(new_db_path, create_if_missing=True)
+        if self._segment_writer is not None:
+            self._segment_writer.open(new_db_path)
+            self._flushed_height = self._segment_writer.end_height
+            return
+
+        new_db = open_db(new_db_path, create_if_missing=True, for_write=True)
         self._write_batch = new_db.write_batch()
         self._bytes_to_write = 0
         self._new_db = new_db
 
+        self._init_chunk_size()
+
+        value: Optional[bytes] = new_db.get(PROGRESS_KEY)
+        if value is not None:
+            self._flushed_height = int.from_bytes(value, "big")
+
     def close(self):
         self._block_reader.close()
         self._bytes_to_write = 0
@@ -61,30 +234,192 @@ class BlockMigrator(object):
             self._new_db.close()
             self._new_db = None
 
-    def get_last_block(self) -> Block:
-        it = self._new_db.iterator(
-            prefix=Bucket.BLOCK_HEIGHT.value, reverse=True, include_key=False
-        )
-        v = next(it)
+        if self._segment_writer is not None:
+            self._segment_writer.close()
+
+    def get_last_block(self) -> Optional[Block]:
+        """Return the last block in the new db. None if no block is found"""
+        if self._segment_writer is not None:
+            return self._get_block(self._segment_writer.end_height)
+
+        bucket = Bucket.BLOCK_CHUNK if self._chunk_size > 0 else Bucket.BLOCK_HEIGHT
+        it = self._new_db.iterator(prefix=bucket.value, reverse=True, include_key=False)
+        v: Optional[bytes] = next(it, None)
         it.close()
 
+        if v is None:
+            return None
+
+        v = self._decompress(v)
+        if self._chunk_size > 0:
+            chunk = BlockChunk.from_bytes(v)
+            v = chunk.get(chunk.last_height)
+
         return Block.from_bytes(v)
 
+    @property
+    def blocks_done(self) -> int:
+        """The number of blocks migrated by the last run()"""
+        return self._blocks_done
+
+    def get_resume_height(self) -> int:
+        """Return the block height to resume migration from
+
+        The last flushed block in the new db is compared with the one in loopchain db
+        If the new db has no progress marker which is written by the previous version,
+        the last block in the new db is used instead
+
+        :return: 0 if the new db is empty
+        """
+        height: int = self._flushed_height
+        if height < 0:
+            last_block: Optional[Block] = self.get_last_block()
+            if last_block is None:
+                return 0
+            height = last_block.height
+
+        self._verify_block(height)
+        return height + 1
+
+    def _verify_block(self, height: int):
+        block: Optional[Block] = self._get_block(height)
+        if block is None:
+            raise ValueError(f"Block not found in new db: height={height}")
+
+        data: Optional[bytes] = self._block_reader.get_block_by_height(height)
+        if data is None:
+            raise ValueError(f"Block not found in loopchain db: height={height}")
+
+        loopchain_block = LoopchainBlock.from_bytes(data)
+        if block.block_hash != loopchain_block.block_hash:
+            raise ValueError(
+                f"Block hash mismatch: height={height} "
+                f"new_db={block.block_hash.hex()} "
+                f"loopchain_db={loopchain_block.block_hash.hex()}"
+            )
+
+    def _get_block(self, height: int) -> Optional[Block]:
+        """Read a block which has already been flushed to the new db"""
+        if height < 0:
+            return None
+
+        if self._segment_writer is not None:
+            reader = SegmentBlockReader()
+            reader.open(self._new_db_path)
+            try:
+                return reader.get_block_by_height(height)
+            finally:
+                reader.close()
+
+        if self._chunk_size > 0:
+            key: bytes = make_block_chunk_key(get_chunk_start(height, self._chunk_size))
+        else:
+            key: bytes = make_block_height_key(height)
+
+        value: Optional[bytes] = self._new_db.get(key)
+        if value is None:
+            return None
+
+        value = self._decompress(value)
+        if self._chunk_size > 0:
+            value = BlockChunk.from_bytes(value).get(height)
+            if value is None:
+                return None
+
+        return Block.from_bytes(value)
+
+    def _init_chunk_size(self):
+        """Chunk size can not be changed once blocks are written to the target db"""
+        value: Optional[bytes] = self._new_db.get(CHUNK_SIZE_KEY)
+        chunk_size: int = 0 if value is None else int.from_bytes(value, "big")
+        if chunk_size == self._chunk_size:
+            return
+
+        bucket = Bucket.BLOCK_CHUNK if chunk_size > 0 else Bucket.BLOCK_HEIGHT
+        it = self._new_db.iterator(prefix=bucket.value, include_value=False)
+        has_blocks: bool = next(it, None) is not None
+        it.close()
+
+        if has_blocks:
+            raise ValueError(
+                f"Chunk size mismatch: {self._chunk_size} != {chunk_size}(target db)"
+            )
+
+        if self._chunk_size > 0:
+            self._new_db.put(CHUNK_SIZE_KEY, self._chunk_size.to_bytes(4, "big"))
+        else:
+            self._new_db.delete(CHUNK_SIZE_KEY)
+
     def run(self, start: int, count: int):
         try:
             self._start_height = start
             self._blocks = count
+            self._blocks_done = 0
+
+            # In follow mode, the compressor created at the first run is reused
+            if self._codec is not None and self._compressor is None:
+                self._compressor = self._create_compressor(start, count)
+
+            if self._chunk_size > 0:
+                self._chunk = self._load_chunk(start)
 
             self._migrate_preps()
             self._run(start, end=start + count)
         except Exception as e:
             raise e
         finally:
+            # Write the last chunk which is not full
+            if self._chunk is not None:
+                self._write_chunk()
+
             # Write data remaining in write_batch to the target db
             self._flush()
             self._timer.stop()
             self._print_status()
 
+    def follow(self, start: int, interval: float = 1.0):
+        """Keep migrating new blocks as loopchain writes them to its db
+
+        Each poll reads the last block and the blocks before it from a snapshot of
+        loopchain db. It never returns until an exception like KeyboardInterrupt is raised
+
+        :param start: the first block to migrate
+        :param interval: seconds to wait between polls
+        """
+        height: int = start
+
+        if self._workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+
+        try:
+            while True:
+                self._block_reader.take_snapshot()
+                try:
+                    last_height: int = self._get_source_last_height()
+                    if last_height >= height:
+                        self.run(height, last_height - height + 1)
+                        height += self._blocks_done
+                finally:
+                    self._block_reader.release_snapshot()
+
+                time.sleep(interval)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _get_source_last_height(self) -> int:
+        """Return the last block height in loopchain db. -1 if no block is found"""
+        block_hash_key: Optional[bytes] = self._block_reader.get_last_block_hash_key()
+        if block_hash_key is None:
+            return -1
+
+        data: Optional[bytes] = self._block_reader.get_block_by_key(block_hash_key)
+        if data is None:
+            return -1
+
+        return LoopchainBlock.from_bytes(data).height
+
     def cp_preps(self):
         self._timer.start()
         try:
@@ -103,15 +438,17 @@ class BlockMigrator(object):
         """
         self._timer.start()
 
-        for height in range(start, end):
-            # Read an original block data from loopchain db
-            loopchain_block = self._read_loopchain_block(height)
-
-            # Convert loopchain block to binary block
-            block = self._convert_block(loopchain_block)
-
+        height: int = start
+        for converted in self._iter_converted_blocks(start, end):
             # Write binary block data to write_batch of target db
-            self._write_block(block)
+            self._write_block(converted)
+            height = converted.height + 1
+
+            if self._tx_results:
+                self._write_block_result(
+                    converted.height,
+                    self._read_transaction_results(converted.tx_hash_keys),
+                )
 
             # Write write_batch to the target db
             if self._bytes_to_write >= self.MAX_BYTES_TO_CACHE:
@@ -119,34 +456,255 @@ class BlockMigrator(object):
                 self._timer.stop()
                 self._print_status()
 
-    def _read_loopchain_block(self, height: int) -> LoopchainBlock:
-        data: bytes = self._block_reader.get_block_by_height(height)
-        if not data:
+        # Range scan stops at the first missing block.
+        # It is only expected at the end of loopchain db
+        if height < end and height <= self._get_source_last_height():
             raise TypeError(f"No block data: BH={height}")
 
-        return LoopchainBlock.from_bytes(data)
+    def _iter_converted_blocks(self, start: int, end: int) -> Iterator[ConvertedBlock]:
+        """Read loopchain blocks and convert them to binary blocks in height order
+
+        Reading loopchain db and writing the target db stay on the main process.
+        Only conversion is spread over worker processes
+
+        :param start: start block to convert
+        :param end: end block to convert, exclusive
+        """
+        if self._workers == 1:
+            for _, _, data in self._block_reader.iter_blocks(start, end - 1):
+                yield convert_block_data(data)
+            return
+
+        datas: Iterator[bytes] = (
+            data for _, _, data in self._block_reader.iter_blocks(start, end - 1)
+        )
+        for converted_blocks in imap_ordered(
+            convert_blocks,
+            batched(datas, self.BLOCKS_PER_TASK),
+            self._workers,
+            executor=self._executor,
+        ):
+            yield from converted_blocks
 
     @classmethod
     def _convert_block(cls, loopchain_block: LoopchainBlock) -> Block:
         block = Block.from_loopchain_block(loopchain_block)
         return block
 
-    def _write_block(self, block: Block):
-        key: bytes = make_block_height_key(block.height)
-        value: bytes = block.to_bytes()
+    def _create_compressor(self, start: int, count: int) -> BlockCompressor:
+        """Reuse the last dictionary in the target db or train a new one
+
+        A new dictionary is saved to the target db,
+        so resuming or following migration does not train another one
+        """
+        if self._dict_samples < 1:
+            return BlockCompressor(self._codec)
+
+        dict_id: int = self._get_last_dict_id()
+        if dict_id > 0:
+            codec, dictionary = self._load_dict(dict_id)
+            # The dictionary of another codec is not usable
+            if codec == self._codec:
+                print(f"dictionary: codec={codec.name} dict_id={dict_id} reused")
+                return BlockCompressor(self._codec, dict_id, dictionary)
+
+        samples: List[bytes] = self._read_samples(start, count)
+        if len(samples) == 0:
+            print("dictionary: no blocks in loopchain db to train with")
+            return BlockCompressor(self._codec)
+
+        dictionary: bytes = train_dictionary(self._codec, samples, self._dict_size)
+        dict_id += 1
+        self._new_db.put(
+            make_dict_key(dict_id), encode_dict_value(self._codec, dictionary)
+        )
+
+        print(
+            f"dictionary: codec={self._codec.name} dict_id={dict_id} "
+            f"samples={len(samples)} size={len(dictionary)}"
+        )
+        return BlockCompressor(self._codec, dict_id, dictionary)
+
+    def _read_samples(self, start: int, count: int) -> List[bytes]:
+        """Read binary blocks evenly spread between start and the last block"""
+        data: Optional[bytes] = self._block_reader.get_last_block()
+        if data is None:
+            return []
+
+        last_block = LoopchainBlock.from_bytes(data)
+        end: int = min(start + count - 1, last_block.height)
+
+        samples: List[bytes] = []
+        step: int = max((end - start + 1) // self._dict_samples, 1)
+        for height in range(start, end + 1, step):
+            data: Optional[bytes] = self._block_reader.get_block_by_height(height)
+            if data is None:
+                break
+
+            block = self._convert_block(LoopchainBlock.from_bytes(data))
+            samples.append(block.to_bytes())
+
+        return samples
+
+    def _get_last_dict_id(self) -> int:
+        """Return the id of the last dictionary in the target db. 0 if none
+
+        Dictionaries written before stay to read the blocks compressed with them
+        """
+        prefix: bytes = make_dict_key(0)[:-2]
+        it = self._new_db.iterator(prefix=prefix, reverse=True, include_value=False)
+        key: Optional[bytes] = next(it, None)
+        it.close()
+
+        return 0 if key is None else int.from_bytes(key[-2:], "big")
+
+    def _write_block(self, converted: ConvertedBlock):
+        height: int = converted.height
+
+        if self._segment_writer is not None:
+            self._segment_writer.append(height, converted.value)
+            self._bytes_to_write += len(converted.value)
+            self._blocks_done += 1
+            return
+
+        if self._chunk_size > 0:
+            self._append_to_chunk(height, converted.value)
+        else:
+            key: bytes = make_block_height_key(height)
+            value: bytes = self._compress(converted.value)
+            self._write_batch.put(key, value)
+            self._bytes_to_write += len(value)
+            self._last_height = height
+
+        for index_key, index_value in converted.index_entries:
+            self._write_batch.put(index_key, index_value)
+            self._bytes_to_write += len(index_key) + len(index_value)
+
+        self._blocks_done += 1
+
+    def _append_to_chunk(self, height: int, value: bytes):
+        if self._chunk is None:
+            self._chunk = BlockChunk(height, [])
+
+        self._chunk.append(height, value)
+
+        if (height + 1) % self._chunk_size == 0:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        chunk_start: int = get_chunk_start(self._chunk.first_height, self._chunk_size)
+        value: bytes = self._compress(self._chunk.to_bytes())
+        self._write_batch.put(make_block_chunk_key(chunk_start), value)
+
+        self._bytes_to_write += len(value)
+        # Blocks in a chunk which is not written yet are not regarded as migrated
+        self._last_height = self._chunk.last_height
+        self._chunk = None
+
+    def _load_chunk(self, start: int) -> Optional[BlockChunk]:
+        """Load the blocks followed by start from the chunk which start belongs to
+
+        It makes migration continue in the middle of a chunk
+        """
+        chunk_start: int = get_chunk_start(start, self._chunk_size)
+        if chunk_start == start:
+            return None
+
+        value: Optional[bytes] = self._new_db.get(make_block_chunk_key(chunk_start))
+        if value is None:
+            return None
+
+        old_chunk = BlockChunk.from_bytes(self._decompress(value))
+        chunk = BlockChunk(old_chunk.first_height, [])
+        for height, block_value in old_chunk:
+            if height >= start:
+                break
+            chunk.append(height, block_value)
+
+        if chunk.last_height != start - 1:
+            raise ValueError(
+                f"Blocks missing in chunk: chunk_start={chunk_start} "
+                f"last_height={chunk.last_height} start={start}"
+            )
+
+        return chunk
+
+    def _compress(self, value: bytes) -> bytes:
+        if self._compressor is None:
+            return value
+
+        return self._compressor.compress(value)
+
+    def _decompress(self, value: bytes) -> bytes:
+        decompressor = BlockDecompressor(self._load_dict)
+        return decompressor.decompress(value)
+
+    def _load_dict(self, dict_id: int):
+        value: Optional[bytes] = self._new_db.get(make_dict_key(dict_id))
+        return None if value is None else decode_dict_value(value)
+
+    def _read_transaction_results(
+        self, tx_hash_keys: List[Optional[bytes]]
+    ) -> List[Optional[TransactionResult]]:
+        """Read the results of all transactions in a block from loopchain db
+
+        An item is None if its original result is not compatible to protocol v3
+        """
+        tx_results: List[Optional[TransactionResult]] = []
+
+        for key in tx_hash_keys:
+            tx_result: Optional[TransactionResult] = None
+
+            data: Optional[bytes] = (
+                self._block_reader.get_transaction_by_key(key) if key else None
+            )
+            if data is not None:
+                tx_result_dict: dict = json.loads(data).get("result", {})
+                if "status" in tx_result_dict:
+                    tx_result = TransactionResult.from_dict(tx_result_dict)
+
+            tx_results.append(tx_result)
+
+        return tx_results
+
+    def _write_block_result(
+        self, height: int, tx_results: List[Optional[TransactionResult]]
+    ):
+        key: bytes = make_block_result_key(height)
+        value: bytes = self._compress(pack.encode(tx_results))
         self._write_batch.put(key, value)
 
         self._bytes_to_write += len(value)
-        self._blocks_done += 1
 
     def _flush(self):
+        if self._segment_writer is not None:
+            # meta.json written on flush plays the role of progress marker
+            self._segment_writer.flush()
+            self._bytes_to_write = 0
+            return
+
         if self._bytes_to_write > 0:
+            # Progress marker is written atomically with the blocks in the same batch
+            # It is not advanced over the blocks skipped by a run starting
+            # beyond the marker
+            if (
+                self._last_height > self._flushed_height
+                and self._start_height <= self._flushed_height + 1
+            ):
+                self._write_batch.put(
+                    PROGRESS_KEY, self._last_height.to_bytes(8, "big")
+                )
+                self._flushed_height = self._last_height
+
             self._write_batch.write()
             self._write_batch.clear()
             self._bytes_to_write = 0
 
     def _print_status(self):
         blocks_done = self._blocks_done
+        if blocks_done == 0:
+            return
+
         height = self._start_height + (blocks_done - 1)
 
         percent: float = blocks_done * 100.0 / self._blocks
@@ -162,13 +720,25 @@ class BlockMigrator(object):
         print(" ".join(status), flush=True)
 
     def _migrate_preps(self):
+        """Write preps which have not been migrated yet
+
+        follow() calls this on every poll, so only reps_hashes found since
+        the previous call are written to the new db
+        """
         reps_data: dict = self._block_reader.get_reps_data()
         for key, value in reps_data.items():
+            if key in self._migrated_reps_hashes:
+                continue
+
             preps_key: bytes = make_preps_key(key)
             preps = PReps.from_json_bytes(value)
             value = preps.to_bytes()
-            self._write_batch.put(preps_key, value)
+            if self._segment_writer is not None:
+                self._segment_writer.put_preps(key, value)
+            else:
+                self._write_batch.put(preps_key, value)
             self._bytes_to_write += len(value)
+            self._migrated_reps_hashes.add(key)
 
 
 if __name__ == '__main__':
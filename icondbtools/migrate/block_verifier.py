@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from icondbtools.fastsync.block_reader import create_block_reader
+from icondbtools.libs.block_database_raw_reader import BlockDatabaseRawReader
+from icondbtools.libs.loopchain_block import LoopchainBlock
+from icondbtools.migrate.block import Block
+from icondbtools.utils.parallel import batched, imap_ordered
+from icondbtools.utils.timer import Timer
+
+TAG = "VRF"
+
+
+class BlockCheck(NamedTuple):
+    height: int
+    block_hash: bytes
+    prev_block_hash: bytes
+    # None if the block passed the check
+    error: Optional[str]
+
+
+def check_block(height: int, value: bytes, loopchain_data: Optional[bytes]) -> BlockCheck:
+    """Compare a binary block with the one converted from loopchain block again
+
+    :param height: block height expected
+    :param value: Block.to_bytes() read from compact db
+    :param loopchain_data: block data read from loopchain db
+        None means that the block is not sampled for comparison
+    """
+    block = Block.from_bytes(value)
+    error: Optional[str] = None
+
+    if block.height != height:
+        error = f"Height mismatch: {block.height}"
+    elif loopchain_data is not None:
+        expected = Block.from_loopchain_block(LoopchainBlock.from_bytes(loopchain_data))
+        attrs: List[str] = [
+            attr for attr in dir(block) if getattr(block, attr) != getattr(expected, attr)
+        ]
+        if attrs:
+            error = f"Block mismatch: {','.join(attrs)}"
+
+    return BlockCheck(height, block.block_hash, block.prev_block_hash, error)
+
+
+def check_blocks(items: List[Tuple[int, bytes, Optional[bytes]]]) -> List[BlockCheck]:
+    return [check_block(*item) for item in items]
+
+
+class BlockVerifier(object):
+    """Verify a compact db against the loopchain db it was migrated from
+
+    * Blocks at sampled heights are converted from loopchain db again and compared
+    * prev_block_hash of every block is compared with block_hash of the previous block
+    * Heights missing in compact db are reported as gaps
+
+    Both dbs are read on the main process. Decoding and comparison run on worker processes
+    """
+
+    BLOCKS_PER_TASK = 100
+    MAX_ERRORS_TO_PRINT = 100
+    PRINT_PERIOD = 100_000
+
+    def __init__(self, block_format: str = "leveldb", step: int = 1, workers: int = 1):
+        """
+        :param block_format: format of compact db. "leveldb" or "segment"
+        :param step: compare every step-th block with loopchain db
+            Links and gaps are checked for every block regardless of step
+        :param workers: the number of processes to compare blocks with
+        """
+        if step < 1:
+            raise ValueError(f"Invalid step: {step}")
+        if workers < 1:
+            raise ValueError(f"Invalid workers: {workers}")
+
+        self._loopchain_reader = BlockDatabaseRawReader()
+        self._block_reader = create_block_reader(block_format)
+        self._step = step
+        self._workers = workers
+
+        # Result
+        self._blocks = 0
+        self._blocks_compared = 0
+        self._gaps: List[Tuple[int, int]] = []
+        self._errors: List[str] = []
+        self._timer = Timer()
+
+    @property
+    def errors(self) -> List[str]:
+        return self._errors
+
+    @property
+    def gaps(self) -> List[Tuple[int, int]]:
+        """Ranges of missing block heights. Both ends are inclusive"""
+        return self._gaps
+
+    def open(self, db_path: str, compact_db_path: str):
+        self._loopchain_reader.open(db_path)
+        self._block_reader.open(compact_db_path)
+
+    def close(self):
+        self._loopchain_reader.close()
+        self._block_reader.close()
+
+    def run(self, start: int = -1, end: int = -1) -> bool:
+        """
+        :param start: start block height. -1 means the first block in compact db
+        :param end: end block height, inclusive. -1 means the last block in compact db
+        :return: True if no error and no gap is found
+        """
+        if start < 0:
+            start = self._block_reader.get_start_block_height()
+        if end < 0:
+            end = self._block_reader.get_end_block_height()
+        if start < 0 or end < start:
+            raise ValueError(f"No blocks to verify: start={start} end={end}")
+
+        self._timer.start()
+
+        prev: Optional[BlockCheck] = None
+        for checks in imap_ordered(
+            check_blocks,
+            batched(self._iter_items(start, end), self.BLOCKS_PER_TASK),
+            self._workers,
+        ):
+            for check in checks:
+                self._on_block_checked(check, prev)
+                prev = check
+
+        self._timer.stop()
+        self._print_result(start, end)
+
+        return not (self._errors or self._gaps)
+
+    def _iter_items(
+        self, start: int, end: int
+    ) -> Iterator[Tuple[int, bytes, Optional[bytes]]]:
+        """Read blocks to check in block height order, recording gaps on the way
+
+        Both dbs are scanned in step with range iterators instead of a lookup per height
+        """
+        loopchain_blocks: Iterator[Tuple[int, bytes, bytes]] = (
+            self._loopchain_reader.iter_blocks(start, end)
+        )
+        loopchain_block: Optional[Tuple[int, bytes, bytes]] = next(
+            loopchain_blocks, None
+        )
+        expected_height = start
+
+        for height, value in self._block_reader.iter_block_datas(start, end):
+            if height > expected_height:
+                self._gaps.append((expected_height, height - 1))
+            expected_height = height + 1
+
+            loopchain_data: Optional[bytes] = None
+            if (height - start) % self._step == 0:
+                while loopchain_block is not None and loopchain_block[0] < height:
+                    loopchain_block = next(loopchain_blocks, None)
+
+                if loopchain_block is None or loopchain_block[0] != height:
+                    self._errors.append(f"BH-{height}: Block not found in loopchain db")
+                    # loopchain db iteration stops at its first missing block
+                    if height < end:
+                        loopchain_blocks = self._loopchain_reader.iter_blocks(
+                            height + 1, end
+                        )
+                        loopchain_block = next(loopchain_blocks, None)
+                else:
+                    loopchain_data = loopchain_block[2]
+                    self._blocks_compared += 1
+
+            yield height, value, loopchain_data
+
+        if expected_height <= end:
+            self._gaps.append((expected_height, end))
+
+    def _on_block_checked(self, check: BlockCheck, prev: Optional[BlockCheck]):
+        self._blocks += 1
+
+        if check.error is not None:
+            self._errors.append(f"BH-{check.height}: {check.error}")
+
+        # The link to the previous block can not be checked across a gap
+        if prev is not None and prev.height + 1 == check.height:
+            if check.prev_block_hash != prev.block_hash:
+                self._errors.append(
+                    f"BH-{check.height}: prev_block_hash mismatch: "
+                    f"{check.prev_block_hash.hex()} != {prev.block_hash.hex()}"
+                )
+
+        if self._blocks % self.PRINT_PERIOD == 0:
+            print(f"{check.height} {self._blocks} errors={len(self._errors)}", flush=True)
+
+    def _print_result(self, start: int, end: int):
+        for error in self._errors[: self.MAX_ERRORS_TO_PRINT]:
+            print(error)
+        if len(self._errors) > self.MAX_ERRORS_TO_PRINT:
+            print(f"... {len(self._errors) - self.MAX_ERRORS_TO_PRINT} more errors")
+
+        for gap_start, gap_end in self._gaps:
+            print(f"gap: {gap_start} ~ {gap_end} ({gap_end - gap_start + 1} blocks)")
+
+        print(
+            f"range: {start} ~ {end}\n"
+            f"blocks: {self._blocks}\n"
+            f"compared: {self._blocks_compared}\n"
+            f"gaps: {len(self._gaps)}\n"
+            f"errors: {len(self._errors)}\n"
+            f"duration: {self._timer.duration():.3f}s"
+        )
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List, Optional, Iterator, Tuple
+
+
+class BlockChunk(object):
+    """Consecutive blocks packed into one value
+
+    Format
+    first_height(8) + count(4) + offsets((count + 1) * 4) + block values
+
+    The i-th block value is data[offsets[i]:offsets[i + 1]]
+    and offsets are relative to the beginning of block values.
+    """
+
+    HEADER_SIZE = 12
+    OFFSET_SIZE = 4
+
+    def __init__(self, first_height: int, values: List[bytes]):
+        self._first_height = first_height
+        self._values = values
+
+    @property
+    def first_height(self) -> int:
+        return self._first_height
+
+    @property
+    def last_height(self) -> int:
+        return self._first_height + len(self._values) - 1
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, height: int) -> bool:
+        return self._first_height <= height <= self.last_height
+
+    def __iter__(self) -> Iterator[Tuple[int, bytes]]:
+        for i, value in enumerate(self._values):
+            yield self._first_height + i, value
+
+    def get(self, height: int) -> Optional[bytes]:
+        if height not in self:
+            return None
+
+        return self._values[height - self._first_height]
+
+    def append(self, height: int, value: bytes):
+        if height != self._first_height + len(self._values):
+            raise ValueError(
+                f"Block not in sequence: height={height} last_height={self.last_height}"
+            )
+
+        self._values.append(value)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BlockChunk":
+        first_height: int = int.from_bytes(data[:8], "big")
+        count: int = int.from_bytes(data[8 : cls.HEADER_SIZE], "big")
+
+        offset_table_end: int = cls.HEADER_SIZE + (count + 1) * cls.OFFSET_SIZE
+        offsets: List[int] = [
+            int.from_bytes(data[i : i + cls.OFFSET_SIZE], "big")
+            for i in range(cls.HEADER_SIZE, offset_table_end, cls.OFFSET_SIZE)
+        ]
+
+        body = data[offset_table_end:]
+        values: List[bytes] = [
+            body[offsets[i] : offsets[i + 1]] for i in range(count)
+        ]
+        return cls(first_height, values)
+
+    def to_bytes(self) -> bytes:
+        offsets: List[bytes] = []
+        offset = 0
+        for value in self._values:
+            offsets.append(offset.to_bytes(self.OFFSET_SIZE, "big"))
+            offset += len(value)
+        offsets.append(offset.to_bytes(self.OFFSET_SIZE, "big"))
+
+        return b"".join(
+            [
+                self._first_height.to_bytes(8, "big"),
+                len(self._values).to_bytes(4, "big"),
+                *offsets,
+                *self._values,
+            ]
+        )
+
+
+def get_chunk_start(height: int, chunk_size: int) -> int:
+    """Return the first block height of the chunk which a given block belongs to"""
+    return height - height % chunk_size
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compression for values stored in compact db
+
+Compressed value format
+TAG(1) + codec(1) + dict_id.to_bytes(2, "big") + compressed data
+
+TAG is 0xc1 which msgpack never uses, so values written without compression
+are told apart from compressed ones and old compact dbs stay readable.
+dict_id 0 means that no dictionary is used.
+"""
+
+import zlib
+from enum import IntEnum
+from typing import Optional, List, Callable, Dict, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TAG = 0xC1
+HEADER_SIZE = 4
+NO_DICT_ID = 0
+
+
+class Codec(IntEnum):
+    ZLIB = 0
+    ZSTD = 1
+
+    @classmethod
+    def from_name(cls, name: str) -> "Codec":
+        codec = cls[name.upper()]
+        if codec == cls.ZSTD and zstandard is None:
+            raise ValueError("zstd needs zstandard package: pip install zstandard")
+
+        return codec
+
+
+def is_compressed(value: bytes) -> bool:
+    return len(value) > 0 and value[0] == TAG
+
+
+def train_dictionary(codec: Codec, samples: List[bytes], dict_size: int) -> bytes:
+    """Make a dictionary with sample values
+
+    zlib has no dictionary trainer. It prefers the strings placed at the end of zdict
+    and looks back 32KB at most, so the tails of samples are used as they are.
+    """
+    if len(samples) == 0:
+        raise ValueError("No samples to train a dictionary")
+
+    if codec == Codec.ZSTD:
+        return zstandard.train_dictionary(dict_size, samples).as_bytes()
+
+    dict_size = min(dict_size, 32 * 1024)
+    return b"".join(samples)[-dict_size:]
+
+
+class BlockCompressor(object):
+    def __init__(
+        self,
+        codec: Codec,
+        dict_id: int = NO_DICT_ID,
+        dictionary: Optional[bytes] = None,
+        level: int = -1,
+    ):
+        self._codec = codec
+        self._dict_id = dict_id
+        self._dictionary = dictionary
+        self._header = bytes([TAG, codec]) + dict_id.to_bytes(2, "big")
+
+        if codec == Codec.ZSTD:
+            dict_data = (
+                zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            )
+            self._zstd = zstandard.ZstdCompressor(
+                level=3 if level < 0 else level, dict_data=dict_data
+            )
+        else:
+            self._level = level
+
+    @property
+    def codec(self) -> Codec:
+        return self._codec
+
+    @property
+    def dict_id(self) -> int:
+        return self._dict_id
+
+    def compress(self, data: bytes) -> bytes:
+        """Return the original data if compression does not make it smaller"""
+        if self._codec == Codec.ZSTD:
+            compressed: bytes = self._zstd.compress(data)
+        else:
+            if self._dictionary:
+                c = zlib.compressobj(self._level, zdict=self._dictionary)
+            else:
+                c = zlib.compressobj(self._level)
+            compressed: bytes = c.compress(data) + c.flush()
+
+        if HEADER_SIZE + len(compressed) >= len(data):
+            return data
+
+        return self._header + compressed
+
+
+class BlockDecompressor(object):
+    def __init__(self, load_dict: Callable[[int], Optional[Tuple[Codec, bytes]]]):
+        """
+        :param load_dict: function returning (codec, dictionary) of a given dict_id
+        """
+        self._load_dict = load_dict
+        self._dicts: Dict[int, bytes] = {}
+        self._zstd_decompressors = {}
+
+    def decompress(self, value: bytes) -> bytes:
+        """Return the value as it is if it is not compressed"""
+        if not is_compressed(value):
+            return value
+
+        codec = Codec(value[1])
+        dict_id: int = int.from_bytes(value[2:HEADER_SIZE], "big")
+        data = value[HEADER_SIZE:]
+
+        if codec == Codec.ZSTD:
+            return self._get_zstd_decompressor(dict_id).decompress(data)
+
+        dictionary: Optional[bytes] = self._get_dict(dict_id)
+        if dictionary:
+            d = zlib.decompressobj(zdict=dictionary)
+        else:
+            d = zlib.decompressobj()
+        return d.decompress(data) + d.flush()
+
+    def _get_dict(self, dict_id: int) -> Optional[bytes]:
+        if dict_id == NO_DICT_ID:
+            return None
+
+        dictionary: Optional[bytes] = self._dicts.get(dict_id)
+        if dictionary is None:
+            ret = self._load_dict(dict_id)
+            if ret is None:
+                raise ValueError(f"Dictionary not found: dict_id={dict_id}")
+
+            _, dictionary = ret
+            self._dicts[dict_id] = dictionary
+
+        return dictionary
+
+    def _get_zstd_decompressor(self, dict_id: int):
+        if zstandard is None:
+            raise ValueError("zstd needs zstandard package: pip install zstandard")
+
+        decompressor = self._zstd_decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary: Optional[bytes] = self._get_dict(dict_id)
+            dict_data = (
+                zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            )
+            decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+            self._zstd_decompressors[dict_id] = decompressor
+
+        return decompressor
+
+
+def encode_dict_value(codec: Codec, dictionary: bytes) -> bytes:
+    return bytes([codec]) + dictionary
+
+
+def decode_dict_value(value: bytes) -> Tuple[Codec, bytes]:
+    return Codec(value[0]), value[1:]
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Append-only segment archive for binary blocks
+
+Directory structure
+meta.json: version, start_height, count and segment_size
+index: dense index entries of 12 bytes, the i-th entry is for block start_height + i
+    segment_no.to_bytes(4, "big") + offset.to_bytes(4, "big") + length.to_bytes(4, "big")
+segment_{segment_no:06d}.dat: Block.to_bytes() records appended back to back
+preps.dat: {reps_hash: PReps.to_bytes()} in msgpack format
+
+meta.json is written atomically on every flush and it decides which records are valid.
+Records written after the last flush are truncated on the next open.
+"""
+
+import json
+import os
+from typing import Optional, Dict, Tuple
+
+from ..utils import pack
+from ..utils.utils import write_file_atomically
+
+META_FILE = "meta.json"
+INDEX_FILE = "index"
+PREPS_FILE = "preps.dat"
+
+FORMAT_VERSION = 1
+INDEX_ENTRY_SIZE = 12
+DEFAULT_SEGMENT_SIZE = 1024 * 1024 * 1024
+MAX_SEGMENT_SIZE = 0xFFFFFFFF
+
+
+def get_segment_file_name(segment_no: int) -> str:
+    return f"segment_{segment_no:06d}.dat"
+
+
+def encode_index_entry(segment_no: int, offset: int, length: int) -> bytes:
+    return (
+        segment_no.to_bytes(4, "big")
+        + offset.to_bytes(4, "big")
+        + length.to_bytes(4, "big")
+    )
+
+
+def decode_index_entry(data: bytes) -> Tuple[int, int, int]:
+    """
+    :return: segment_no, offset, length
+    """
+    return (
+        int.from_bytes(data[:4], "big"),
+        int.from_bytes(data[4:8], "big"),
+        int.from_bytes(data[8:12], "big"),
+    )
+
+
+def load_meta(path: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(path, META_FILE), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_preps(path: str) -> Dict[bytes, bytes]:
+    try:
+        with open(os.path.join(path, PREPS_FILE), "rb") as f:
+            return pack.decode(f.read())
+    except FileNotFoundError:
+        return {}
+
+
+class SegmentWriter(object):
+    def __init__(self, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+            raise ValueError(f"Invalid segment_size: {segment_size}")
+
+        self._path: Optional[str] = None
+        self._segment_size = segment_size
+
+        self._start_height = -1
+        self._count = 0
+        self._preps: Dict[bytes, bytes] = {}
+        self._preps_dirty = False
+
+        self._index_file = None
+        self._segment_file = None
+        self._segment_no = 0
+        self._segment_offset = 0
+
+    @property
+    def start_height(self) -> int:
+        """-1 means that the archive is empty"""
+        return self._start_height
+
+    @property
+    def end_height(self) -> int:
+        if self._count == 0:
+            return -1
+
+        return self._start_height + self._count - 1
+
+    def open(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+
+        meta: Optional[dict] = load_meta(path)
+        if meta is not None:
+            if meta["version"] != FORMAT_VERSION:
+                raise ValueError(f"Unsupported segment format: {meta['version']}")
+
+            self._segment_size = meta["segmentSize"]
+            self._start_height = meta["startHeight"]
+            self._count = meta["count"]
+
+        self._preps = load_preps(path)
+        self._recover()
+
+        self._index_file = open(os.path.join(path, INDEX_FILE), "ab")
+        self._open_segment(self._segment_no)
+
+    def close(self):
+        if self._path is None:
+            return
+
+        self.flush()
+
+        self._index_file.close()
+        self._segment_file.close()
+        self._path = None
+
+    def append(self, height: int, value: bytes):
+        if self._count == 0:
+            self._start_height = height
+        elif height != self._start_height + self._count:
+            raise ValueError(
+                f"Block not in sequence: height={height} end_height={self.end_height}"
+            )
+
+        size = len(value)
+        if size > self._segment_size:
+            raise ValueError(f"Too big block: height={height} size={size}")
+
+        if self._segment_offset + size > self._segment_size:
+            self._segment_file.close()
+            self._open_segment(self._segment_no + 1)
+
+        self._segment_file.write(value)
+        self._index_file.write(
+            encode_index_entry(self._segment_no, self._segment_offset, size)
+        )
+
+        self._segment_offset += size
+        self._count += 1
+
+    def put_preps(self, reps_hash: bytes, value: bytes):
+        if self._preps.get(reps_hash) != value:
+            self._preps[reps_hash] = value
+            self._preps_dirty = True
+
+    def flush(self):
+        for f in (self._segment_file, self._index_file):
+            f.flush()
+            os.fsync(f.fileno())
+
+        if self._preps_dirty:
+            write_file_atomically(
+                os.path.join(self._path, PREPS_FILE), pack.encode(self._preps)
+            )
+            self._preps_dirty = False
+
+        meta = {
+            "version": FORMAT_VERSION,
+            "startHeight": self._start_height,
+            "count": self._count,
+            "segmentSize": self._segment_size,
+        }
+        write_file_atomically(
+            os.path.join(self._path, META_FILE), json.dumps(meta).encode()
+        )
+
+    def _open_segment(self, segment_no: int):
+        path = os.path.join(self._path, get_segment_file_name(segment_no))
+        self._segment_file = open(path, "ab")
+        self._segment_no = segment_no
+        self._segment_offset = self._segment_file.tell()
+
+    def _recover(self):
+        """Drop the records written after the last flush"""
+        index_path = os.path.join(self._path, INDEX_FILE)
+        index_size = self._count * INDEX_ENTRY_SIZE
+
+        with open(index_path, "ab") as f:
+            f.truncate(index_size)
+
+        if self._count > 0:
+            with open(index_path, "rb") as f:
+                f.seek(index_size - INDEX_ENTRY_SIZE)
+                segment_no, offset, length = decode_index_entry(f.read())
+            segment_end = offset + length
+        else:
+            segment_no, segment_end = 0, 0
+
+        for name in os.listdir(self._path):
+            if not (name.startswith("segment_") and name.endswith(".dat")):
+                continue
+
+            no = int(name[len("segment_") : -len(".dat")])
+            if no > segment_no:
+                os.remove(os.path.join(self._path, name))
+            elif no == segment_no:
+                with open(os.path.join(self._path, name), "ab") as f:
+                    f.truncate(segment_end)
+
+        self._segment_no = segment_no
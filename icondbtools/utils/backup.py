@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Back up leveldb directories
+
+leveldb never modifies a table file once it is written. It only creates new ones
+and deletes obsolete ones, so a backup can share table files with the live db
+through hardlinks and copy only MANIFEST, CURRENT, LOG and the write-ahead logs
+"""
+
+import os
+import shutil
+from typing import List
+
+from .utils import remove_dir
+
+BACKUP_MODES = ("copy", "hardlink")
+
+# sync and fastsync back up statedb to "block-{height:09d}" in the working directory
+STATE_DB_BACKUP_PREFIX = "block-"
+
+# Suffixes of leveldb table files which are immutable
+TABLE_FILE_SUFFIXES = (".ldb", ".sst")
+
+
+class BackupStats(object):
+    def __init__(self):
+        self.files_copied = 0
+        self.bytes_copied = 0
+        self.files_linked = 0
+        self.bytes_linked = 0
+
+    def __iadd__(self, other: "BackupStats") -> "BackupStats":
+        self.files_copied += other.files_copied
+        self.bytes_copied += other.bytes_copied
+        self.files_linked += other.files_linked
+        self.bytes_linked += other.bytes_linked
+        return self
+
+    def __str__(self):
+        return (
+            f"copied={self.files_copied} files, {self.bytes_copied} bytes "
+            f"linked={self.files_linked} files, {self.bytes_linked} bytes"
+        )
+
+
+def backup_dir(src_path: str, dst_path: str, mode: str = "copy") -> BackupStats:
+    """Back up src_path to dst_path which must not exist
+
+    :param src_path:
+    :param dst_path:
+    :param mode: "copy" copies every file
+        "hardlink" hardlinks leveldb table files and copies the others.
+        Table files are copied if hardlinks are not available
+        e.g. dst_path is on another file system
+    :return: the number of files and bytes copied or linked
+    """
+    if mode not in BACKUP_MODES:
+        raise ValueError(f"Unknown backup mode: {mode}")
+
+    stats = BackupStats()
+    os.makedirs(dst_path)
+
+    for dir_path, dir_names, file_names in os.walk(src_path):
+        rel_path: str = os.path.relpath(dir_path, src_path)
+        dst_dir_path: str = os.path.normpath(os.path.join(dst_path, rel_path))
+
+        for name in dir_names:
+            os.makedirs(os.path.join(dst_dir_path, name), exist_ok=True)
+
+        for name in file_names:
+            src: str = os.path.join(dir_path, name)
+            dst: str = os.path.join(dst_dir_path, name)
+            size: int = os.path.getsize(src)
+
+            if (
+                mode == "hardlink"
+                and name.endswith(TABLE_FILE_SUFFIXES)
+                and _link(src, dst)
+            ):
+                stats.files_linked += 1
+                stats.bytes_linked += size
+            else:
+                shutil.copy2(src, dst)
+                stats.files_copied += 1
+                stats.bytes_copied += size
+
+    return stats
+
+
+def _link(src: str, dst: str) -> bool:
+    if os.path.islink(src):
+        return False
+
+    try:
+        os.link(src, dst)
+    except OSError:
+        return False
+
+    return True
+
+
+def list_backups(root_path: str, prefix: str) -> List[str]:
+    """Return the names of backups in root_path in ascending order of their numbers
+
+    A backup is a directory whose name is prefix followed by a number. e.g. block-000000100
+    """
+    names: List[str] = []
+
+    with os.scandir(root_path) as it:
+        for entry in it:
+            if (
+                entry.is_dir(follow_symlinks=False)
+                and entry.name.startswith(prefix)
+                and entry.name[len(prefix):].isdigit()
+            ):
+                names.append(entry.name)
+
+    names.sort(key=lambda x: int(x[len(prefix):]))
+    return names
+
+
+def remove_old_backups(root_path: str, prefix: str, keep: int) -> List[str]:
+    """Remove backups except for the last keep ones
+
+    :return: the paths of removed backups
+    """
+    if keep < 1:
+        raise ValueError(f"Invalid keep: {keep}")
+
+    removed: List[str] = []
+
+    for name in list_backups(root_path, prefix)[:-keep]:
+        path: str = os.path.join(root_path, name)
+        remove_dir(path)
+        removed.append(path)
+
+    return removed
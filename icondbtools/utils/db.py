@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Open leveldb with the options shared by all readers and writers
+
+Options are given with common command line arguments and configured once in main()
+"""
+
+from typing import Any, Dict, Optional
+
+import plyvel
+
+COMPRESSIONS = ("snappy", "none")
+
+
+class DBOptions(object):
+    """Options passed to plyvel.DB()
+
+    None means the default value of leveldb
+    """
+
+    def __init__(
+        self,
+        lru_cache_size: Optional[int] = None,
+        bloom_filter_bits: int = 0,
+        max_open_files: Optional[int] = None,
+        write_buffer_size: Optional[int] = None,
+        block_size: Optional[int] = None,
+        compression: str = "snappy",
+        read_only: bool = False,
+    ):
+        """
+        :param lru_cache_size: block cache size of leveldb in bytes
+        :param bloom_filter_bits: bits per key for bloom filter. 0 means no bloom filter
+        :param max_open_files: max number of files leveldb keeps open
+        :param write_buffer_size: memtable size in bytes
+        :param block_size: approximate size of user data packed per block in bytes
+        :param compression: "snappy" or "none". It applies to the data written from now on
+        :param read_only: reject writes to the dbs opened for read
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+
+        self.lru_cache_size = lru_cache_size
+        self.bloom_filter_bits = bloom_filter_bits
+        self.max_open_files = max_open_files
+        self.write_buffer_size = write_buffer_size
+        self.block_size = block_size
+        self.compression = compression
+        self.read_only = read_only
+
+    def __str__(self):
+        return " ".join(f"{k}={v}" for k, v in self.__dict__.items())
+
+    @classmethod
+    def from_args(cls, args) -> "DBOptions":
+        """Create DBOptions from the arguments added by add_db_arguments()"""
+        return cls(
+            lru_cache_size=getattr(args, "db_lru_cache_size", None),
+            bloom_filter_bits=getattr(args, "db_bloom_filter_bits", 0),
+            max_open_files=getattr(args, "db_max_open_files", None),
+            write_buffer_size=getattr(args, "db_write_buffer_size", None),
+            block_size=getattr(args, "db_block_size", None),
+            compression=getattr(args, "db_compression", "snappy"),
+            read_only=getattr(args, "db_read_only", False),
+        )
+
+    def to_kwargs(self) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {
+            "bloom_filter_bits": self.bloom_filter_bits,
+            "compression": None if self.compression == "none" else self.compression,
+        }
+
+        for name in (
+            "lru_cache_size",
+            "max_open_files",
+            "write_buffer_size",
+            "block_size",
+        ):
+            value: Optional[int] = getattr(self, name)
+            if value is not None:
+                kwargs[name] = value
+
+        return kwargs
+
+
+class ReadOnlyDB(object):
+    """plyvel.DB wrapper which rejects writes
+
+    leveldb has no read-only mode, so writes are blocked on this side
+    """
+
+    WRITE_METHODS = ("put", "delete", "write_batch", "compact_range")
+
+    def __init__(self, db: plyvel.DB):
+        self._db = db
+
+    def __getattr__(self, name: str):
+        if name in self.WRITE_METHODS:
+            raise PermissionError(f"Write to read-only db: {name}")
+
+        return getattr(self._db, name)
+
+    def __iter__(self):
+        return iter(self._db)
+
+    def prefixed_db(self, prefix: bytes) -> "ReadOnlyDB":
+        # PrefixedDB shares the underlying db, so it is blocked from writes as well
+        return ReadOnlyDB(self._db.prefixed_db(prefix))
+
+
+_default_db_options = DBOptions()
+
+
+def configure_db_options(options: DBOptions):
+    global _default_db_options
+    _default_db_options = options
+
+
+def get_default_db_options() -> DBOptions:
+    return _default_db_options
+
+
+def open_db(
+    db_path: str,
+    create_if_missing: bool = False,
+    for_write: bool = False,
+    options: Optional[DBOptions] = None,
+):
+    """Open leveldb with the options configured by configure_db_options()
+
+    :param db_path:
+    :param create_if_missing:
+    :param for_write: the caller writes to the db. read_only option is ignored
+    :param options: options to use instead of the default ones
+    :return: plyvel.DB or ReadOnlyDB
+    """
+    if options is None:
+        options = _default_db_options
+
+    db = plyvel.DB(db_path, create_if_missing=create_if_missing, **options.to_kwargs())
+    if options.read_only and not for_write:
+        return ReadOnlyDB(db)
+
+    return db
+
+
+def add_db_arguments(parser):
+    parser.add_argument(
+        "--db-lru-cache-size",
+        dest="db_lru_cache_size",
+        type=int,
+        default=None,
+        help="leveldb block cache size in bytes",
+    )
+    parser.add_argument(
+        "--db-bloom-filter-bits",
+        dest="db_bloom_filter_bits",
+        type=int,
+        default=0,
+        help="Bits per key for leveldb bloom filter. 0 disables it",
+    )
+    parser.add_argument(
+        "--db-max-open-files",
+        dest="db_max_open_files",
+        type=int,
+        default=None,
+        help="Max number of files leveldb keeps open",
+    )
+    parser.add_argument(
+        "--db-write-buffer-size",
+        dest="db_write_buffer_size",
+        type=int,
+        default=None,
+        help="leveldb memtable size in bytes",
+    )
+    parser.add_argument(
+        "--db-block-size",
+        dest="db_block_size",
+        type=int,
+        default=None,
+        help="leveldb block size in bytes",
+    )
+    parser.add_argument(
+        "--db-compression",
+        dest="db_compression",
+        choices=COMPRESSIONS,
+        default="snappy",
+        help="leveldb compression for the data written from now on",
+    )
+    parser.add_argument(
+        "--db-read-only",
+        dest="db_read_only",
+        action="store_true",
+        default=False,
+        help="Reject writes to the dbs opened for read",
+    )
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import heapq
+import pickle
+import tempfile
+from typing import IO, Any, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def dump_items(items: Iterable[T], f: IO[bytes]):
+    """Append items to a binary file which load_items() reads back one by one"""
+    for item in items:
+        pickle.dump(item, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_items(f: IO[bytes]) -> Iterator[T]:
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
+
+
+def _write_run(items: List[T], dir_path: Optional[str]) -> IO[bytes]:
+    f = tempfile.TemporaryFile(dir=dir_path)
+    dump_items(items, f)
+    f.seek(0)
+    return f
+
+
+def external_sort(
+    items: Iterable[T],
+    key: Callable[[T], Any],
+    run_size: int = 100_000,
+    dir_path: Optional[str] = None,
+) -> Iterator[T]:
+    """Sort items with at most run_size items in memory
+
+    Items are sorted by runs of run_size items, which are spilled to temporary files
+    and merged. Items should be picklable
+
+    :param dir_path: the directory of temporary files. None means the default one
+    """
+    if run_size < 1:
+        raise ValueError(f"Invalid run size: {run_size}")
+
+    runs: List[IO[bytes]] = []
+    try:
+        items = iter(items)
+        while True:
+            buf: List[T] = [item for _, item in zip(range(run_size), items)]
+            buf.sort(key=key)
+
+            if len(buf) < run_size and not runs:
+                # No need to spill items which fit in memory
+                yield from buf
+                return
+            if buf:
+                runs.append(_write_run(buf, dir_path))
+            if len(buf) < run_size:
+                break
+
+        del buf
+        yield from heapq.merge(*[load_items(f) for f in runs], key=key)
+    finally:
+        for f in runs:
+            f.close()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Read and write huge JSON objects member by member
+
+json.load() and json.dump() hold the whole document in memory
+"""
+
+import json
+import re
+import shutil
+from typing import Any, Iterator, TextIO, Tuple
+
+_WHITESPACE = re.compile(r"\s*")
+# Chars which can follow a value
+_DELIMITERS = " \t\n\r,:]}"
+
+
+class _Scanner(object):
+    def __init__(self, fp: TextIO, buffer_size: int):
+        self._fp = fp
+        self._buffer_size = buffer_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+
+        data: str = self._fp.read(self._buffer_size)
+        if not data:
+            self._eof = True
+            return False
+
+        # Consumed data is dropped not to grow the buffer
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespaces and return the next char. Empty string at the end"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        c: str = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"Expected one of {chars!r} but got {c!r}")
+
+        self._pos += 1
+        return c
+
+    def decode(self) -> Any:
+        self.peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number can continue in the next read. e.g. "12" + "3.5"
+                complete = end < len(self._buf) and self._buf[end] in _DELIMITERS
+                if complete or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+
+            self._fill()
+
+
+def iter_json_object(
+    fp: TextIO, buffer_size: int = 64 * 1024
+) -> Iterator[Tuple[str, Any]]:
+    """Yield key and value of the top-level JSON object in fp one by one
+
+    :param fp: text file which contains a JSON object
+    :param buffer_size: the number of chars read from fp at a time
+    """
+    scanner = _Scanner(fp, buffer_size)
+
+    scanner.expect("{")
+    if scanner.peek() == "}":
+        return
+
+    while True:
+        key = scanner.decode()
+        if not isinstance(key, str):
+            raise ValueError(f"Invalid key: {key!r}")
+        scanner.expect(":")
+
+        yield key, scanner.decode()
+
+        if scanner.expect(",}") == "}":
+            return
+
+
+class JsonObjectWriter(object):
+    """Write a JSON object member by member
+
+    The output is the same as json.dump() with indent
+    """
+
+    def __init__(
+        self, fp: TextIO, indent: int = 2, level: int = 0, fragment: bool = False
+    ):
+        """
+        :param fragment: write only members without braces,
+            which are copied to the writer at the same level with copy_members()
+        """
+        self._fp = fp
+        self._indent = indent
+        self._level = level
+        self._fragment = fragment
+        self._members = 0
+        self._member_newline = "\n" + " " * (indent * (level + 1))
+
+        if not fragment:
+            fp.write("{")
+
+    @property
+    def members(self) -> int:
+        return self._members
+
+    def _write_key(self, key: str):
+        if self._members > 0:
+            self._fp.write(",")
+        self._fp.write(f"{self._member_newline}{json.dumps(key)}: ")
+        self._members += 1
+
+    def write(self, key: str, value: Any):
+        self._write_key(key)
+
+        # Newlines in strings are escaped by json.dumps()
+        text: str = json.dumps(value, indent=self._indent)
+        self._fp.write(text.replace("\n", self._member_newline))
+
+    def begin_object(self, key: str) -> "JsonObjectWriter":
+        """Start a nested object which should be closed before the next member"""
+        self._write_key(key)
+        return JsonObjectWriter(self._fp, self._indent, self._level + 1)
+
+    def copy_members(self, fp: TextIO, members: int):
+        """Copy the output of a fragment writer
+
+        :param fp: the output of the fragment writer
+        :param members: the number of members in fp
+        """
+        if members == 0:
+            return
+
+        if self._members > 0:
+            self._fp.write(",")
+        shutil.copyfileobj(fp, self._fp)
+        self._members += members
+
+    def close(self):
+        if self._fragment:
+            return
+
+        if self._members > 0:
+            self._fp.write("\n" + " " * (self._indent * self._level))
+        self._fp.write("}")
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+# Stages of a block replayed by sync and fastsync
+# wait: waiting for the block prefetcher
+# read: reading and decoding a block from block db
+# build: building an iconservice block and transaction requests
+# invoke: IconServiceEngine.invoke()
+# verify: comparing state_root_hash and transaction results
+# commit: IconServiceEngine.commit()
+# calc_wait: waiting for rc to finish the calculation
+# backup: backing up statedb and iiss db
+SYNC_STAGES = (
+    "wait",
+    "read",
+    "build",
+    "invoke",
+    "verify",
+    "commit",
+    "calc_wait",
+    "backup",
+)
+
+
+class Histogram(object):
+    """Log-scale histogram of durations in seconds
+
+    Bucket i covers [2 ** (i / BUCKETS_PER_OCTAVE), 2 ** ((i + 1) / BUCKETS_PER_OCTAVE))
+    microseconds, so a percentile is off by less than 5% from the exact one
+    while memory does not grow with the number of samples
+    """
+
+    BUCKETS_PER_OCTAVE = 16
+
+    def __init__(self):
+        self._buckets: Dict[int, int] = {}
+        self._count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = 0.0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count > 0 else 0.0
+
+    @property
+    def min(self) -> float:
+        return self._min if self._count > 0 else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    def add(self, seconds: float):
+        us: float = seconds * 1_000_000
+        index: int = (
+            int(math.log2(us) * self.BUCKETS_PER_OCTAVE) if us >= 1.0 else 0
+        )
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+        self._count += 1
+        self._sum += seconds
+        self._min = min(self._min, seconds)
+        self._max = max(self._max, seconds)
+
+    def percentile(self, p: float) -> float:
+        """
+        :param p: 0 ~ 100
+        :return: the upper bound of the bucket which the p-th percentile belongs to
+        """
+        if self._count == 0:
+            return 0.0
+
+        rank: float = self._count * p / 100
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                us: float = 2 ** ((index + 1) / self.BUCKETS_PER_OCTAVE)
+                return min(max(us / 1_000_000, self.min), self._max)
+
+        return self._max
+
+
+class StageMetrics(object):
+    """Collect the time spent in each stage of block processing
+
+    Durations recorded for the same stage in a block are summed up
+    and added to the stage histogram when the block ends.
+    Each block can be dumped to a file: CSV if its name ends with ".csv", otherwise JSONL
+    """
+
+    def __init__(self, stages: Sequence[str], dump_path: Optional[str] = None):
+        self._stages: List[str] = list(stages)
+        self._histograms: Dict[str, Histogram] = {
+            stage: Histogram() for stage in stages
+        }
+
+        self._height = -1
+        self._durations: Dict[str, float] = {}
+        self._blocks = 0
+
+        self._dump_path = dump_path
+        self._dump_file = None
+        self._csv_writer = None
+
+    @property
+    def blocks(self) -> int:
+        return self._blocks
+
+    def get_histogram(self, stage: str) -> Histogram:
+        return self._histograms[stage]
+
+    def open(self):
+        if self._dump_path is None:
+            return
+
+        self._dump_file = open(self._dump_path, "w", newline="")
+        if self._dump_path.endswith(".csv"):
+            self._csv_writer = csv.writer(self._dump_file)
+            self._csv_writer.writerow(["height"] + self._stages)
+
+    def close(self):
+        if self._dump_file is not None:
+            self._dump_file.close()
+            self._dump_file = None
+            self._csv_writer = None
+
+    def begin_block(self, height: int):
+        self._height = height
+        self._durations = {}
+
+    def end_block(self):
+        for stage, seconds in self._durations.items():
+            self._histograms[stage].add(seconds)
+        self._blocks += 1
+
+        if self._dump_file is not None:
+            self._dump_block()
+
+    @contextmanager
+    def measure(self, stage: str):
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        if stage not in self._histograms:
+            raise KeyError(f"Unknown stage: {stage}")
+
+        self._durations[stage] = self._durations.get(stage, 0.0) + seconds
+
+    def summary(self) -> str:
+        total: float = sum(h.sum for h in self._histograms.values())
+
+        lines = [
+            f"{'stage':<10} {'count':>9} {'total(s)':>10} {'share':>6} "
+            f"{'mean(ms)':>9} {'p50(ms)':>9} {'p90(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9}"
+        ]
+        for stage in self._stages:
+            h: Histogram = self._histograms[stage]
+            share: float = h.sum * 100 / total if total > 0 else 0.0
+            lines.append(
+                f"{stage:<10} {h.count:>9} {h.sum:>10.3f} {share:>5.1f}% "
+                f"{h.mean * 1000:>9.3f} {h.percentile(50) * 1000:>9.3f} "
+                f"{h.percentile(90) * 1000:>9.3f} {h.percentile(99) * 1000:>9.3f} "
+                f"{h.max * 1000:>9.3f}"
+            )
+
+        return "\n".join(lines)
+
+    def _dump_block(self):
+        if self._csv_writer is not None:
+            self._csv_writer.writerow(
+                [self._height]
+                + [f"{self._durations.get(stage, 0.0):.6f}" for stage in self._stages]
+            )
+        else:
+            row = {"height": self._height}
+            row.update(self._durations)
+            self._dump_file.write(json.dumps(row) + "\n")
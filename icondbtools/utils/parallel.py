@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group items into lists of size items. The last list can be shorter"""
+    if size < 1:
+        raise ValueError(f"Invalid size: {size}")
+
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def imap_ordered(
+    func: Callable[[T], R],
+    tasks: Iterable[T],
+    workers: int,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    executor: Optional[Executor] = None,
+) -> Iterator[R]:
+    """Apply func to each task on worker processes and yield results in task order
+
+    Unlike ProcessPoolExecutor.map(), tasks are consumed lazily
+    and at most workers * 2 tasks are in flight,
+    so that memory stays bounded while the caller is reading a huge db
+
+    :param func: module-level function which can be pickled
+    :param tasks: the arguments passed to func
+    :param workers: the number of processes. 1 means that func runs on the caller process
+    :param initializer: called with initargs once on each process before func
+    :param executor: pool to run func on instead of a new one, which is left open.
+        It is for callers which map tasks repeatedly. initializer is not used with it
+    """
+    if workers < 1:
+        raise ValueError(f"Invalid workers: {workers}")
+
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield func(task)
+        return
+
+    max_pending_tasks: int = workers * 2
+
+    if executor is not None:
+        yield from _submit_ordered(executor, func, tasks, max_pending_tasks)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        yield from _submit_ordered(executor, func, tasks, max_pending_tasks)
+
+
+def _submit_ordered(
+    executor: Executor,
+    func: Callable[[T], R],
+    tasks: Iterable[T],
+    max_pending_tasks: int,
+) -> Iterator[R]:
+    futures: Deque[Future] = deque()
+
+    for task in tasks:
+        futures.append(executor.submit(func, task))
+        if len(futures) >= max_pending_tasks:
+            yield futures.popleft().result()
+
+    while futures:
+        yield futures.popleft().result()
@@ -132,3 +132,18 @@ def remove_dir(path: str):
         shutil.rmtree(path)
     except FileNotFoundError:
         pass
+
+
+def write_file_atomically(path: str, data: bytes, sync: bool = True):
+    """
+    :param sync: fsync the data before replacing the file.
+        Without it, the file still survives the crash of the process but not that of the OS
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
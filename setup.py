@@ -29,7 +29,10 @@ with open("README.md", "r") as f:
 with open("requirements.txt") as requirements:
     requires = list(requirements)
 
-extras_require = {"test": ["hypothesis", "coverage", "pytest",]}
+extras_require = {
+    "test": ["hypothesis", "coverage", "pytest",],
+    "zstd": ["zstandard"],
+}
 
 tests_require = extras_require["test"]
 
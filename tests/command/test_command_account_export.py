@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import os
+from typing import List, Optional, Tuple
+
+import pytest
+
+from icondbtools.command.command_account_export import (
+    _get_shard_path,
+    concat_account_shards,
+    split_iscores,
+    write_account_shard,
+    write_json,
+    write_jsonl,
+)
+from icondbtools.libs.range_scan import create_ranges
+from icondbtools.utils.external_sort import load_items
+
+HEADER = {
+    "blockHeight": 100,
+    "termHeight": 80,
+    "status": {"totalSupply": 10 ** 27, "totalStake": 10 ** 26},
+}
+
+
+def in_range(key: bytes, start: Optional[bytes], stop: Optional[bytes]) -> bool:
+    return (start is None or start <= key) and (stop is None or key < stop)
+
+
+def create_keys(prefixes: List[int]) -> List[bytes]:
+    """Create sorted keys whose first bytes are given prefixes"""
+    keys = {bytes([prefix]) + os.urandom(20) for prefix in prefixes for _ in range(3)}
+    return sorted(keys)
+
+
+def test_split_iscores(tmp_path):
+    shard_path = str(tmp_path)
+    ranges = create_ranges(16)
+    # Ranges 0, 1, 3, 15 have keys and the others are empty
+    keys = create_keys([0x00, 0x10, 0x15, 0x30, 0xFF])
+    iscores = [(key, hex(i)) for i, key in enumerate(keys)]
+
+    split_iscores(iter(iscores), ranges, shard_path)
+
+    for index, (start, stop) in enumerate(ranges):
+        expected = [item for item in iscores if in_range(item[0], start, stop)]
+        path = _get_shard_path(shard_path, "iscore", index)
+        if not expected:
+            assert not os.path.exists(path)
+            continue
+
+        with open(path, "rb") as f:
+            assert list(load_items(f)) == expected
+
+    assert sorted(os.listdir(shard_path)) == [
+        os.path.basename(_get_shard_path(shard_path, "iscore", index))
+        for index in (0, 1, 3, 15)
+    ]
+
+
+def test_split_iscores_without_iscores(tmp_path):
+    split_iscores(iter(()), create_ranges(4), str(tmp_path))
+    assert os.listdir(str(tmp_path)) == []
+
+
+def create_accounts(keys: List[bytes]) -> List[Tuple[bytes, str, dict]]:
+    accounts = []
+    for i, key in enumerate(keys):
+        info = {"balance": i * 10 ** 18}
+        if i % 2 == 0:
+            info["stake"] = i
+            info["unstakes"] = [{"unstake": 1, "unstakeBlockHeight": 200 + i}]
+        accounts.append((key, f"hx{key[1:].hex()}", info))
+
+    return accounts
+
+
+@pytest.mark.parametrize("export_format", ["json", "jsonl"])
+@pytest.mark.parametrize(
+    "prefixes",
+    [
+        [0x00, 0x10, 0x15, 0x30, 0xFF],
+        # Only the last range has accounts
+        [0xF0],
+        [],
+    ],
+)
+def test_concat_account_shards(tmp_path, export_format, prefixes):
+    shard_path = str(tmp_path)
+    ranges = create_ranges(16)
+    accounts = create_accounts(create_keys(prefixes))
+
+    paths: List[str] = []
+    counts: List[int] = []
+    for index, (start, stop) in enumerate(ranges):
+        shard = [
+            (address, info)
+            for key, address, info in accounts
+            if in_range(key, start, stop)
+        ]
+        path = _get_shard_path(shard_path, "account", index)
+        with open(path, "w", encoding="utf-8") as f:
+            write_account_shard(f, shard, export_format)
+        paths.append(path)
+        counts.append(len(shard))
+
+    out = io.StringIO()
+    concat_account_shards(out, HEADER, paths, counts, export_format)
+
+    expected = io.StringIO()
+    write = write_jsonl if export_format == "jsonl" else write_json
+    write(expected, HEADER, [(address, info) for _, address, info in accounts])
+
+    assert out.getvalue() == expected.getvalue()
+    if export_format == "json":
+        data = json.loads(out.getvalue())
+        assert len(data["accounts"]) == len(accounts)
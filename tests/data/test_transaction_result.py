@@ -13,11 +13,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import unittest
 
 from iconservice.base.address import Address
 
+from icondbtools.data.event_log import EventLog
 from icondbtools.data.transaction_result import TransactionResult
+from icondbtools.utils import pack
 from icondbtools.utils.convert_type import convert_hex_str_to_bytes, bytes_to_hex
 
 
@@ -125,6 +128,44 @@ class TestTransactionResult(unittest.TestCase):
         assert event_log.data[0] == iscore
         assert event_log.data[1] == icx
 
+    def test_pack_block_result(self):
+        score_address = Address.from_string(
+            "cx0000000000000000000000000000000000000000"
+        )
+        event_log = EventLog(
+            score_address,
+            ["IScoreClaimed(int,int)"],
+            [0x147F175D36CD5737754E38, 0x53F415F8AF514478A93],
+        )
+        tx_result = TransactionResult(
+            tx_hash=os.urandom(32),
+            status=TransactionResult.Status.SUCCESS,
+            tx_index=1,
+            to=score_address,
+            block_height=0xDE2CF7,
+            block_hash=os.urandom(32),
+            step_price=0x2540BE400,
+            step_used=0x1A2C0,
+            event_logs=[event_log],
+        )
+
+        # None stands for a result which is not compatible to protocol v3
+        data: bytes = pack.encode([None, tx_result])
+        tx_results = pack.decode(data)
+
+        assert tx_results[0] is None
+        ret = tx_results[1]
+        assert isinstance(ret, TransactionResult)
+        assert ret.tx_hash == tx_result.tx_hash
+        assert ret.status == tx_result.status
+        assert ret.to == tx_result.to
+        assert ret.block_hash == tx_result.block_hash
+        assert ret.fee == tx_result.fee
+        assert len(ret.event_logs) == 1
+        assert isinstance(ret.event_logs[0], EventLog)
+        assert ret.event_logs[0] == event_log
+        assert ret.event_logs[0].signature == "IScoreClaimed(int,int)"
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from typing import Optional
+
+import pytest
+from iconservice.base.address import Address, AddressPrefix
+
+from icondbtools.fastsync.block_prefetcher import BlockPrefetcher
+from icondbtools.migrate.block import Block
+
+
+def create_block(height: int) -> Block:
+    return Block(
+        version="0.5",
+        height=height,
+        timestamp=1_600_000_000_000_000 + height,
+        block_hash=os.urandom(32),
+        prev_block_hash=os.urandom(32),
+        leader=Address(AddressPrefix.EOA, os.urandom(20)),
+        state_hash=os.urandom(32),
+        transactions=[],
+    )
+
+
+class FakeBlockReader(object):
+    def __init__(self, count: int, error_height: int = -1):
+        self.blocks = [create_block(height) for height in range(count)]
+        self._error_height = error_height
+
+    def get_block_by_height(self, height: int) -> Optional[Block]:
+        if height == self._error_height:
+            raise IOError(f"Failed to read a block: {height}")
+
+        return self.blocks[height] if height < len(self.blocks) else None
+
+
+@pytest.fixture
+def create_prefetcher():
+    prefetchers = []
+
+    def func(*args, **kwargs) -> BlockPrefetcher:
+        prefetcher = BlockPrefetcher(*args, **kwargs)
+        prefetchers.append(prefetcher)
+        return prefetcher
+
+    yield func
+
+    for prefetcher in prefetchers:
+        prefetcher.stop()
+
+
+@pytest.mark.parametrize("depth", [1, 3, 16])
+def test_get_in_height_order(create_prefetcher, depth):
+    block_reader = FakeBlockReader(20)
+    prefetcher = create_prefetcher(block_reader, depth=depth)
+    prefetcher.start(5, 14, block_reader.blocks[4])
+
+    prev_block: Block = block_reader.blocks[4]
+    for height in range(5, 15):
+        item = prefetcher.get()
+        assert item.bin_block is block_reader.blocks[height]
+        assert item.block.height == height
+        assert item.prev_block_generator is not None
+        assert item.prev_block_generator == prev_block.leader
+        prev_block = item.bin_block
+
+    assert prefetcher.gets == 10
+    # The worker stops after the last block height without putting anything
+    prefetcher._thread.join(timeout=5)
+    assert not prefetcher._thread.is_alive()
+    assert prefetcher._queue.empty()
+
+
+def test_get_none_at_missing_block(create_prefetcher):
+    block_reader = FakeBlockReader(3)
+    prefetcher = create_prefetcher(block_reader, depth=4)
+    prefetcher.start(0, 10, None)
+
+    heights = [prefetcher.get().block.height for _ in range(3)]
+    assert heights == [0, 1, 2]
+    assert prefetcher.get() is None
+
+
+def test_get_raises_reader_exception(create_prefetcher):
+    block_reader = FakeBlockReader(10, error_height=2)
+    prefetcher = create_prefetcher(block_reader, depth=4)
+    prefetcher.start(0, 9, None)
+
+    assert prefetcher.get().block.height == 0
+    assert prefetcher.get().block.height == 1
+    with pytest.raises(IOError, match="Failed to read a block: 2"):
+        prefetcher.get()
+
+
+def test_stop_while_worker_waits(create_prefetcher):
+    block_reader = FakeBlockReader(100)
+    prefetcher = create_prefetcher(block_reader, depth=2)
+    prefetcher.start(0, 99, None)
+
+    assert prefetcher.get().block.height == 0
+    # The worker is blocked on the full queue
+    prefetcher.stop()
+    assert prefetcher._thread is None
+    assert prefetcher._queue.empty()
+
+
+def test_invalid_depth():
+    with pytest.raises(ValueError):
+        BlockPrefetcher(FakeBlockReader(1), depth=0)
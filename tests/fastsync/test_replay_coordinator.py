@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+
+import pytest
+
+from icondbtools.fastsync import replay_coordinator
+from icondbtools.fastsync.replay_coordinator import (
+    DB_CLONE_DIR,
+    ReplayCoordinator,
+    ReplayResult,
+    ReplayTask,
+    find_checkpoints,
+    plan_tasks,
+)
+from icondbtools.utils.db import open_db
+
+CHECKPOINTS = [(100, "block-000000100"), (200, "block-000000200"), (300, "block-000000300")]
+
+
+def test_find_checkpoints(tmp_path):
+    for height in (300, 100, 200):
+        (tmp_path / f"block-{height:09d}").mkdir()
+    (tmp_path / "replay").mkdir()
+
+    assert find_checkpoints(str(tmp_path)) == [
+        (100, os.path.join(str(tmp_path), "block-000000100")),
+        (200, os.path.join(str(tmp_path), "block-000000200")),
+        (300, os.path.join(str(tmp_path), "block-000000300")),
+    ]
+
+
+@pytest.mark.parametrize(
+    "end_height,expected",
+    [
+        (-1, [(101, 200), (201, 300), (301, -1)]),
+        (350, [(101, 200), (201, 300), (301, 350)]),
+        (300, [(101, 200), (201, 300)]),
+        (250, [(101, 200), (201, 250)]),
+        (100, []),
+    ],
+)
+def test_plan_tasks(end_height, expected):
+    tasks = plan_tasks(CHECKPOINTS, end_height, "replay")
+
+    assert [(task.start_height, task.end_height) for task in tasks] == expected
+    for i, task in enumerate(tasks):
+        assert task.index == i
+        assert task.checkpoint_path == CHECKPOINTS[i][1]
+        assert task.work_path == os.path.join("replay", f"replay-{task.start_height:09d}")
+
+
+@pytest.mark.parametrize(
+    "end_height,returncode,last_height,error,ok",
+    [
+        (200, 0, 200, None, True),
+        (200, 0, 150, None, False),
+        (200, 1, 200, None, False),
+        (-1, 0, 1000, None, True),
+        (200, -1, 100, "Invalid checkpoint", False),
+    ],
+)
+def test_replay_result_ok(end_height, returncode, last_height, error, ok):
+    task = ReplayTask(0, "block-000000100", 101, end_height, "replay-000000101")
+    result = ReplayResult(task, returncode, last_height, 1.0, error)
+
+    assert result.ok == ok
+    assert result.to_dict()["ok"] == ok
+
+
+def test_run_with_bad_checkpoints(tmp_path):
+    # A checkpoint without .score and .statedb
+    (tmp_path / "block-000000100").mkdir()
+    # A checkpoint whose working directory is left by the previous run
+    (tmp_path / "block-000000200" / ".score").mkdir(parents=True)
+    (tmp_path / "block-000000200" / ".statedb").mkdir()
+    (tmp_path / "replay" / "replay-000000201").mkdir(parents=True)
+
+    checkpoints = find_checkpoints(str(tmp_path))
+    tasks = plan_tasks(checkpoints, 300, str(tmp_path / "replay"))
+    coordinator = ReplayCoordinator(str(tmp_path / "db"), workers=2)
+
+    results = coordinator.run(tasks)
+    assert [result.task for result in results] == tasks
+    for result in results:
+        assert not result.ok
+        assert result.error.startswith("Failed to prepare")
+    assert "FileNotFoundError" in results[0].error
+    assert "FileExistsError" in results[1].error
+
+
+def test_run_tasks_on_one_leveldb_compact_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "db")
+    db = open_db(db_path, create_if_missing=True, for_write=True)
+    db.put(b"key", b"value")
+    db.close()
+
+    for height in (100, 200):
+        for basename in (".score", ".statedb"):
+            (tmp_path / f"block-{height:09d}" / basename).mkdir(parents=True)
+
+    tasks = plan_tasks(find_checkpoints(str(tmp_path)), 300, str(tmp_path / "replay"))
+    barrier = threading.Barrier(len(tasks))
+    db_paths = []
+
+    def call(command, cwd, stdout, stderr):
+        task_db_path: str = command[command.index("--db") + 1]
+        db_paths.append(task_db_path)
+
+        # Every fastsync process holds its compact db open at the same time
+        task_db = open_db(task_db_path)
+        try:
+            assert task_db.get(b"key") == b"value"
+            barrier.wait(timeout=10)
+        finally:
+            task_db.close()
+
+        with open(os.path.join(cwd, "last_height"), "w") as f:
+            f.write(command[command.index("--end") + 1])
+        return 0
+
+    def get_last_height(work_path: str) -> int:
+        path = os.path.join(work_path, "last_height")
+        if not os.path.exists(path):
+            return int(os.path.basename(work_path)[len("replay-") :]) - 1
+
+        with open(path) as f:
+            return int(f.read())
+
+    monkeypatch.setattr(replay_coordinator.subprocess, "call", call)
+    monkeypatch.setattr(
+        ReplayCoordinator, "_get_last_height", staticmethod(get_last_height)
+    )
+
+    coordinator = ReplayCoordinator(db_path, workers=2)
+    results = coordinator.run(tasks)
+
+    assert [result.ok for result in results] == [True, True]
+    assert sorted(db_paths) == [
+        os.path.join(task.work_path, DB_CLONE_DIR) for task in tasks
+    ]
+    # Clones are removed and compact db is left as it is
+    for path in db_paths:
+        assert not os.path.exists(path)
+    db = open_db(db_path)
+    assert db.get(b"key") == b"value"
+    db.close()
+
+
+def test_segment_compact_db_is_shared(tmp_path):
+    task = ReplayTask(0, "block-000000100", 101, 200, str(tmp_path / "replay"))
+    coordinator = ReplayCoordinator(str(tmp_path / "db"), 2, block_format="segment")
+
+    command = coordinator._create_command(task)
+    assert command[command.index("--db") + 1] == str(tmp_path / "db")
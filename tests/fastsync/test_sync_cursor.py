@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+from iconservice.base.block import Block
+
+from icondbtools.fastsync.sync_cursor import SyncCursor
+
+
+@pytest.mark.parametrize("main_preps_hash", [os.urandom(32), None])
+@pytest.mark.parametrize("next_main_preps_pending", [True, False])
+def test_save_and_load(tmp_path, main_preps_hash, next_main_preps_pending):
+    path = str(tmp_path / ".statedb" / "cursor.json")
+    assert SyncCursor.load(path) is None
+
+    cursor = SyncCursor(
+        height=100,
+        block_hash=os.urandom(32),
+        main_preps_hash=main_preps_hash,
+        next_main_preps_pending=next_main_preps_pending,
+    )
+    cursor.save(path)
+    assert SyncCursor.load(path) == cursor
+
+    cursor.height = 101
+    cursor.save(path)
+    assert SyncCursor.load(path) == cursor
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_check():
+    block_hash = os.urandom(32)
+    cursor = SyncCursor(100, block_hash, os.urandom(32), False)
+
+    cursor.check(Block(100, block_hash, 0, os.urandom(32), 0))
+
+    with pytest.raises(ValueError):
+        cursor.check(Block(101, block_hash, 0, os.urandom(32), 0))
+    with pytest.raises(ValueError):
+        cursor.check(Block(100, os.urandom(32), 0, os.urandom(32), 0))
+
+
+def test_from_dict_with_unknown_version():
+    data = SyncCursor(100, os.urandom(32), None, False).to_dict()
+    data["version"] = SyncCursor.VERSION + 1
+
+    with pytest.raises(ValueError):
+        SyncCursor.from_dict(data)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from icondbtools.libs.block_cache import (
+    BlockCache,
+    configure_block_cache,
+    get_default_block_cache,
+)
+
+
+class TestBlockCache(object):
+    def test_get_and_put(self):
+        cache = BlockCache(max_bytes=100)
+        assert cache.get(1) is None
+        assert cache.misses == 1
+
+        cache.put(1, b"a" * 10)
+        assert cache.get(1) == b"a" * 10
+        assert cache.hits == 1
+        assert cache.bytes == 10
+        assert len(cache) == 1
+
+        # Overwrite
+        cache.put(1, b"b" * 20)
+        assert cache.get(1) == b"b" * 20
+        assert cache.bytes == 20
+        assert len(cache) == 1
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_bytes=30)
+        for i in range(3):
+            cache.put(i, bytes(10))
+        assert cache.bytes == 30
+
+        # 0 becomes the most recently used one
+        assert cache.get(0) is not None
+
+        cache.put(3, bytes(10))
+        assert cache.evictions == 1
+        assert 1 not in cache
+        assert 0 in cache
+        assert cache.bytes == 30
+
+        cache.put(4, bytes(25))
+        assert cache.bytes == 25
+        assert len(cache) == 1
+        assert cache.evictions == 4
+
+    def test_put_too_big_value(self):
+        cache = BlockCache(max_bytes=10)
+        cache.put(0, bytes(5))
+        cache.put(1, bytes(11))
+
+        assert 1 not in cache
+        assert 0 in cache
+        assert cache.evictions == 0
+
+    def test_get_or_load(self):
+        cache = BlockCache(max_bytes=100)
+        loaded = []
+
+        def load():
+            loaded.append(1)
+            return b"block"
+
+        assert cache.get_or_load("key", load) == b"block"
+        assert cache.get_or_load("key", load) == b"block"
+        assert len(loaded) == 1
+
+        assert cache.get_or_load("none", lambda: None) is None
+        assert "none" not in cache
+
+    def test_invalid_max_bytes(self):
+        with pytest.raises(ValueError):
+            BlockCache(max_bytes=0)
+
+
+def test_configure_block_cache():
+    cache = configure_block_cache(1024)
+    assert isinstance(cache, BlockCache)
+    assert get_default_block_cache() is cache
+    assert cache.max_bytes == 1024
+
+    assert configure_block_cache(0) is None
+    assert get_default_block_cache() is None
+
+    with pytest.raises(ValueError):
+        configure_block_cache(-1)
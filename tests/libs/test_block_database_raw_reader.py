@@ -13,8 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
+import plyvel
 import pytest
 
+from icondbtools.libs import BLOCK_HEIGHT_KEY_PREFIX, PREPS_KEY_PREFIX
 from icondbtools.libs.block_database_raw_reader import BlockDatabaseRawReader
 
 
@@ -41,3 +45,104 @@ class TestBlockDatabaseRawReader(object):
         block_hash_key = reader.get_last_block_hash_key()
         assert isinstance(block_hash_key, bytes)
         assert len(block_hash_key) == 64
+
+
+def test_get_reps_data_from_snapshot(tmp_path):
+    path = str(tmp_path)
+    reps_hash = os.urandom(32)
+    db = plyvel.DB(path, create_if_missing=True)
+    db.put(PREPS_KEY_PREFIX + reps_hash, b"[]")
+    db.close()
+
+    reader = BlockDatabaseRawReader()
+    reader.open(path)
+    try:
+        reader.take_snapshot()
+        # Reps written after the snapshot is taken are not visible until it is released
+        reader._db.put(PREPS_KEY_PREFIX + os.urandom(32), b"[]")
+        assert reader.get_reps_data() == {reps_hash: b"[]"}
+        assert reader.get_reps(reps_hash) == b"[]"
+
+        reader.release_snapshot()
+        assert len(reader.get_reps_data()) == 2
+    finally:
+        reader.close()
+
+
+def write_blocks(path: str, count: int, missing_bodies=()) -> list:
+    """Write dummy blocks keyed by loopchain-style block height and hash keys"""
+    block_hash_keys = []
+    db = plyvel.DB(path, create_if_missing=True)
+    for height in range(count):
+        block_hash_key = os.urandom(32).hex().encode()
+        block_hash_keys.append(block_hash_key)
+        db.put(BLOCK_HEIGHT_KEY_PREFIX + height.to_bytes(12, "big"), block_hash_key)
+        if height not in missing_bodies:
+            db.put(block_hash_key, f"block-{height}".encode())
+    db.close()
+
+    return block_hash_keys
+
+
+@pytest.fixture
+def open_reader(tmp_path):
+    readers = []
+
+    def func(*args, **kwargs) -> BlockDatabaseRawReader:
+        path = str(tmp_path)
+        write_blocks(path, *args, **kwargs)
+        reader = BlockDatabaseRawReader()
+        reader.open(path)
+        readers.append(reader)
+        return reader
+
+    yield func
+
+    for reader in readers:
+        reader.close()
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 10, 1000])
+@pytest.mark.parametrize("start,end,heights", [(0, -1, range(10)), (2, 7, range(2, 8))])
+def test_iter_blocks(open_reader, batch_size, start, end, heights):
+    reader = open_reader(10)
+
+    blocks = list(reader.iter_blocks(start, end, batch_size=batch_size))
+
+    assert [height for height, _, _ in blocks] == list(heights)
+    for height, block_hash_key, block in blocks:
+        assert block == f"block-{height}".encode()
+        assert reader.get_block_hash_key_by_height(height) == block_hash_key
+
+
+def test_iter_blocks_in_batches(open_reader, monkeypatch):
+    reader = open_reader(10)
+    batch_sizes = []
+    get_blocks_in_batch = reader._get_blocks_in_batch
+
+    def spy(batch):
+        batch_sizes.append(len(batch))
+        return get_blocks_in_batch(batch)
+
+    monkeypatch.setattr(reader, "_get_blocks_in_batch", spy)
+
+    assert len(list(reader.iter_blocks(0, batch_size=4))) == 10
+    assert batch_sizes == [4, 4, 2]
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 1000])
+def test_iter_blocks_stops_at_missing_block(open_reader, batch_size):
+    reader = open_reader(10, missing_bodies=(5,))
+
+    heights = [h for h, _, _ in reader.iter_blocks(0, batch_size=batch_size)]
+    assert heights == list(range(5))
+
+    # Iteration starting beyond the end of the chain yields nothing
+    assert list(reader.iter_blocks(10, batch_size=batch_size)) == []
+
+
+def test_iter_blocks_with_invalid_range(open_reader):
+    reader = open_reader(3)
+
+    with pytest.raises(ValueError):
+        list(reader.iter_blocks(2, 1))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+
+import pytest
+
+from icondbtools.libs.calculate_detector import CalculateDetector
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("test_calculate_detector")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
+
+
+@pytest.fixture
+def detector(logger):
+    detector = CalculateDetector()
+    detector.install(logger)
+    yield detector
+    detector.uninstall()
+
+
+def test_calculate_and_done(logger, detector):
+    assert not detector.calculating
+    assert detector.wait(timeout=0)
+
+    logger.debug("calculate() end: CALCULATE(1, 0, 100)")
+    assert detector.calculating
+    assert not detector.wait(timeout=0.01)
+
+    logger.info("unrelated log")
+    assert detector.calculating
+
+    logger.debug("calculate_done_handler() start CALCULATE_DONE(2, True, 100, 0, 0x00)")
+    assert not detector.calculating
+    assert detector.wait(timeout=0)
+
+
+def test_wait_for_done_logged_on_another_thread(logger, detector):
+    logger.debug("CALCULATE(1, 0, 100)")
+
+    timer = threading.Timer(0.05, logger.debug, args=("CALCULATE_DONE(2, True, 100)",))
+    timer.start()
+    try:
+        assert detector.wait(timeout=5)
+    finally:
+        timer.cancel()
+
+
+def test_uninstall(logger, detector):
+    detector.uninstall()
+
+    logger.debug("CALCULATE(1, 0, 100)")
+    assert not detector.calculating
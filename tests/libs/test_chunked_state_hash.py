@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+
+from icondbtools.libs.chunked_state_hash import merkle_root
+
+
+def sha3(data: bytes) -> bytes:
+    return hashlib.sha3_256(data).digest()
+
+
+def test_merkle_root():
+    a, b, c = sha3(b"a"), sha3(b"b"), sha3(b"c")
+
+    assert merkle_root([]) == sha3(b"")
+    assert merkle_root([a]) == a
+    assert merkle_root([a, b]) == sha3(a + b)
+    # c has no pair and is carried to the upper level
+    assert merkle_root([a, b, c]) == sha3(sha3(a + b) + c)
+    assert merkle_root([a, b, c, a]) == sha3(sha3(a + b) + sha3(c + a))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import plyvel
+import pytest
+
+from icondbtools.libs.range_scan import (
+    MAX_CHUNKS,
+    RangeTask,
+    create_ranges,
+    get_reader,
+    map_ranges,
+)
+
+
+@pytest.mark.parametrize("chunks", [1, 3, 16, 256, 1000, MAX_CHUNKS])
+def test_create_ranges(chunks):
+    ranges = create_ranges(chunks)
+
+    assert len(ranges) == chunks
+    assert ranges[0][0] is None
+    assert ranges[-1][1] is None
+    for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+        assert stop == start
+        assert len(start) == 2
+    bounds = [start for start, _ in ranges[1:]]
+    assert bounds == sorted(set(bounds))
+
+
+@pytest.mark.parametrize("chunks", [0, MAX_CHUNKS + 1])
+def test_create_ranges_with_invalid_chunks(chunks):
+    with pytest.raises(ValueError):
+        create_ranges(chunks)
+
+
+def read_keys(task: RangeTask) -> list:
+    _, start, stop = task
+    it = get_reader().iterate(start=start, stop=stop)
+    try:
+        return [key for key, _ in it]
+    finally:
+        it.close()
+
+
+def test_map_ranges_in_place(tmp_path):
+    db_path = os.path.join(str(tmp_path), "db")
+    keys = sorted({os.urandom(8) for _ in range(100)} | {b"\x00", b"\xff" * 3})
+
+    db = plyvel.DB(db_path, create_if_missing=True)
+    for key in keys:
+        db.put(key, b"value")
+    db.close()
+    files = os.listdir(str(tmp_path))
+
+    base, results = map_ranges(
+        db_path, read_keys, chunks=4, workers=1, read_base=lambda reader: "base"
+    )
+
+    assert base == "base"
+    assert len(results) == 4
+    assert [key for result in results for key in result] == keys
+    # No clone is made next to the db
+    assert os.listdir(str(tmp_path)) == files
+    assert get_reader() is None
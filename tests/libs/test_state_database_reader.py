@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+
+import plyvel
+import pytest
+
+from icondbtools.libs.state_database_reader import StateDatabaseReader
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "statedb")
+    db = plyvel.DB(path, create_if_missing=True)
+    for i in range(10):
+        db.put(b"a" + bytes([i]), bytes([i]) * 4)
+        db.put(b"b" + bytes([i]), bytes([i]) * 8)
+    db.close()
+
+    return path
+
+
+def sha3(items) -> bytes:
+    h = hashlib.sha3_256()
+    for key, value in items:
+        h.update(key)
+        h.update(value)
+    return h.digest()
+
+
+def test_create_state_hash_with_prefix(db_path):
+    reader = StateDatabaseReader()
+    reader.open(db_path)
+    try:
+        state_hash = reader.create_state_hash(b"b")
+    finally:
+        reader.close()
+
+    # Keys are hashed without prefix
+    expected = sha3((bytes([i]), bytes([i]) * 8) for i in range(10))
+    assert state_hash.hash_data == expected
+    assert state_hash.rows == 10
+    assert state_hash.total_key_size == 10
+    assert state_hash.total_value_size == 80
+    assert state_hash.block_height == -1
+
+
+def test_create_state_hash_from_snapshot(db_path):
+    reader = StateDatabaseReader()
+    reader.open(db_path)
+    try:
+        expected = reader.create_state_hash()
+
+        reader.take_snapshot()
+        # Writes after the snapshot is taken are not visible to the reader
+        reader._db.put(b"c", b"new")
+        reader._db.delete(b"a\x00")
+        assert reader.get_by_key(b"c") is None
+        assert reader.create_state_hash().hash_data == expected.hash_data
+
+        reader.release_snapshot()
+        assert reader.get_by_key(b"c") == b"new"
+        assert reader.create_state_hash().hash_data != expected.hash_data
+    finally:
+        reader.close()
+
+
+def test_create_range_state_hash(db_path):
+    reader = StateDatabaseReader()
+    reader.open(db_path)
+    try:
+        first = reader.create_range_state_hash(None, b"a\x05")
+        second = reader.create_range_state_hash(b"a\x05", None)
+    finally:
+        reader.close()
+
+    # Keys are hashed as they are
+    assert first.hash_data == sha3((b"a" + bytes([i]), bytes([i]) * 4) for i in range(5))
+    assert first.rows == 5
+    assert second.rows == 15
+    assert first.total_key_size + second.total_key_size == 40
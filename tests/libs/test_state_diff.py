@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from icondbtools.libs.state_diff import DiffCounter, DiffType, StateDiff, diff_items
+
+
+def test_diff_items():
+    old_items = [(b"a", b"1"), (b"b", b"2"), (b"c", b"3"), (b"e", b"5")]
+    new_items = [(b"b", b"2"), (b"c", b"30"), (b"d", b"4"), (b"e", b"5"), (b"f", b"6")]
+    counter = DiffCounter()
+
+    diffs = list(diff_items(iter(old_items), iter(new_items), counter))
+    assert diffs == [
+        StateDiff(DiffType.REMOVED, b"a", b"1", None),
+        StateDiff(DiffType.CHANGED, b"c", b"3", b"30"),
+        StateDiff(DiffType.ADDED, b"d", None, b"4"),
+        StateDiff(DiffType.ADDED, b"f", None, b"6"),
+    ]
+
+    assert counter.rows == 6
+    assert counter.added == 2
+    assert counter.removed == 1
+    assert counter.changed == 1
+    assert counter.diffs == 4
+
+
+def test_diff_items_with_same_items():
+    items = [(b"a", b"1"), (b"b", b"2")]
+    counter = DiffCounter()
+
+    assert list(diff_items(items, list(items), counter)) == []
+    assert counter.rows == 2
+    assert counter.diffs == 0
+
+
+def test_diff_items_with_empty_items():
+    items = [(b"a", b"1"), (b"b", b"2")]
+
+    assert list(diff_items([], [])) == []
+    assert [diff.type for diff in diff_items(items, [])] == [DiffType.REMOVED] * 2
+    assert [diff.type for diff in diff_items([], items)] == [DiffType.ADDED] * 2
+
+
+def test_diff_items_is_lazy():
+    def items():
+        yield b"a", b"1"
+        raise AssertionError("Read too far")
+
+    diffs = diff_items(items(), [(b"a", b"2")])
+    assert next(diffs) == StateDiff(DiffType.CHANGED, b"a", b"1", b"2")
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+
+from iconservice.base.address import Address, AddressPrefix
+from iconservice.fee.deposit import Deposit
+from iconservice.icon_constant import Revision
+from iconservice.icx.coin_part import CoinPart
+from iconservice.icx.stake_part import StakePart
+
+from icondbtools.libs.total_balance import TotalBalance, is_account_key, is_fee2_key
+
+
+def create_address(prefix: AddressPrefix = AddressPrefix.EOA) -> Address:
+    return Address(prefix, os.urandom(20))
+
+
+def coin_part_bytes(balance: int) -> bytes:
+    return CoinPart(balance=balance).to_bytes(Revision.IISS.value)
+
+
+def stake_part_bytes(stake: int, unstake: int) -> bytes:
+    stake_part = StakePart(stake=stake, unstake=unstake)
+    stake_part.set_complete(True)
+    return stake_part.to_bytes()
+
+
+def test_is_account_key():
+    assert is_account_key(create_address().to_bytes())
+    assert is_account_key(create_address(AddressPrefix.CONTRACT).to_bytes())
+    assert not is_account_key(StakePart.make_key(create_address()))
+    assert not is_account_key(b"\x02" + os.urandom(20))
+
+
+def test_update():
+    total_balance = TotalBalance()
+    address = create_address()
+
+    total_balance.update(address.to_bytes(), coin_part_bytes(100))
+    total_balance.update(
+        create_address(AddressPrefix.CONTRACT).to_bytes(), coin_part_bytes(10)
+    )
+    total_balance.update(StakePart.make_key(address), stake_part_bytes(30, 20))
+    # A stake part which has been fully unstaked and withdrawn
+    total_balance.update(StakePart.make_key(create_address()), stake_part_bytes(0, 0))
+
+    deposit_key: bytes = b"\x02" + os.urandom(32)
+    assert is_fee2_key(deposit_key)
+    deposit = Deposit(
+        deposit_id=os.urandom(32),
+        score_address=create_address(AddressPrefix.CONTRACT),
+        sender=address,
+        deposit_amount=5,
+    )
+    total_balance.update(deposit_key, deposit.to_bytes())
+
+    # Other keys are ignored
+    total_balance.update(b"total_supply", (1000).to_bytes(32, "big"))
+
+    assert total_balance.balance == 110
+    assert total_balance.active_account_count == 2
+    assert total_balance.staked == 50
+    assert total_balance.staking_account_count == 1
+    assert total_balance.deposit == 5
+    assert total_balance.deposit_count == 1
+    assert total_balance.full_balance == 165
+    assert total_balance.errors == 0
+
+
+def test_update_with_invalid_value():
+    total_balance = TotalBalance()
+
+    total_balance.update(create_address().to_bytes(), b"invalid")
+    assert total_balance.errors == 1
+    assert total_balance.active_account_count == 0
+
+
+def test_merge():
+    total_balance = TotalBalance(block_height=10, total_supply=300)
+    total_balance.scan([(create_address().to_bytes(), coin_part_bytes(100))])
+
+    other = TotalBalance()
+    other.scan(
+        [
+            (create_address().to_bytes(), coin_part_bytes(200)),
+            (create_address().to_bytes(), b"invalid"),
+        ]
+    )
+
+    total_balance += other
+    assert total_balance.block_height == 10
+    assert total_balance.balance == 300
+    assert total_balance.active_account_count == 2
+    assert total_balance.errors == 1
+    assert total_balance.full_balance - total_balance.total_supply == 0
@@ -13,11 +13,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+from types import SimpleNamespace
 from typing import TYPE_CHECKING
 
 import pytest
 
 from icondbtools.libs.transaction_collector import (
+    CompactTransactionCollector,
     TransactionCollector,
     TransactionFilter,
 )
@@ -59,3 +62,114 @@ class TestTransactionCollector(object):
     def test_run_with_file(self, tx_collector):
         path = "/Users/goldworm/transactions.txt"
         tx_collector.run_with_file(path)
+
+
+def create_params(from_: "Address", to: "Address") -> dict:
+    return {
+        "version": 3,
+        "from": from_,
+        "to": to,
+        "value": 1,
+        "txHash": os.urandom(32),
+        "timestamp": 0,
+    }
+
+
+class FakeCompactBlockReader(object):
+    """Compact block reader which has blocks and their results in memory"""
+
+    def __init__(self, blocks: list, tx_results: dict):
+        self._blocks = blocks
+        self._tx_results = tx_results
+
+    def close(self):
+        pass
+
+    def iter_blocks(self, start: int, end: int = -1):
+        for block in self._blocks:
+            if block.height >= start and (end < 0 or block.height <= end):
+                yield block
+
+    def get_transaction_index_by_hash(self, tx_hash: bytes):
+        for block in self._blocks:
+            for i, params in enumerate(block.transactions):
+                if params.get("txHash") == tx_hash:
+                    return block.height, i
+        return -1, -1
+
+    def get_transaction_by_hash(self, tx_hash: bytes):
+        height, index = self.get_transaction_index_by_hash(tx_hash)
+        return None if height < 0 else self._blocks[height].transactions[index]
+
+    def get_transaction_results_by_height(self, block_height: int):
+        return self._tx_results.get(block_height)
+
+
+class TestCompactTransactionCollector(object):
+    @pytest.fixture
+    def addresses(self):
+        return [Address.from_prefix_and_int(AddressPrefix.EOA, i) for i in range(3)]
+
+    @pytest.fixture
+    def blocks(self, addresses):
+        a, b, c = addresses
+        return [
+            # The first transaction is a base transaction
+            SimpleNamespace(height=0, transactions=[{}, create_params(a, b)]),
+            SimpleNamespace(
+                height=1, transactions=[create_params(b, c), create_params(c, a)]
+            ),
+        ]
+
+    @staticmethod
+    def create_collector(
+        blocks: list, tx_results: dict
+    ) -> CompactTransactionCollector:
+        tx_collector = CompactTransactionCollector()
+        tx_collector._reader = FakeCompactBlockReader(blocks, tx_results)
+        return tx_collector
+
+    def test_run(self, blocks, addresses):
+        # The result of c -> a is not compatible to protocol v3
+        tx_results = {0: [None, "result-0-1"], 1: ["result-1-0", None]}
+        tx_collector = self.create_collector(blocks, tx_results)
+
+        items = list(tx_collector.run(0, -1))
+        assert [(tx.tx_hash, tx_result) for tx, tx_result in items] == [
+            (blocks[0].transactions[1]["txHash"], "result-0-1"),
+            (blocks[1].transactions[0]["txHash"], "result-1-0"),
+        ]
+        assert tx_collector.end_block_height == 1
+
+        tx_filter = TransactionFilterByAddress(addresses[1])
+        items = list(tx_collector.run(1, 1, tx_filter))
+        assert [tx_result for _, tx_result in items] == ["result-1-0"]
+
+    def test_run_with_file(self, tmp_path, blocks):
+        tx_results = {0: [None, "result-0-1"], 1: ["result-1-0", None]}
+        tx_collector = self.create_collector(blocks, tx_results)
+
+        path = tmp_path / "transactions.txt"
+        path.write_text(
+            "# comment\n"
+            f"0x{blocks[1].transactions[0]['txHash'].hex()}\n"
+            f"0x{blocks[1].transactions[1]['txHash'].hex()}\n"
+            f"0x{blocks[0].transactions[1]['txHash'].hex()}\n"
+        )
+
+        items = list(tx_collector.run_with_file(str(path)))
+        assert [tx_result for _, tx_result in items] == ["result-1-0", "result-0-1"]
+
+    @pytest.mark.parametrize("with_file", [False, True])
+    def test_run_without_tx_results(self, tmp_path, blocks, with_file):
+        tx_collector = self.create_collector(blocks, {})
+
+        if with_file:
+            path = tmp_path / "transactions.txt"
+            path.write_text(f"0x{blocks[0].transactions[1]['txHash'].hex()}\n")
+            it = tx_collector.run_with_file(str(path))
+        else:
+            it = tx_collector.run(0, -1)
+
+        with pytest.raises(ValueError, match="--tx-results"):
+            list(it)
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import os
+
+import pytest
+
+from icondbtools.command.command_cdb import CommandCDB
+from icondbtools.command.command_index import CommandIndex
+from icondbtools.fastsync.block_reader import Bucket, create_block_reader
+from icondbtools.libs.loopchain_block import LoopchainBlock
+from icondbtools.migrate.block import Block
+from icondbtools.migrate.block_migrator import (
+    make_block_index_entries,
+    make_tx_hash_key,
+    make_tx_hash_value,
+)
+from icondbtools.utils.db import open_db
+from .test_block_migrator import loopchain_reader, open_migrator  # noqa: F401
+
+MIGRATOR_OPTIONS = [
+    {},
+    {"chunk_size": 4},
+    {"chunk_size": 4, "compression": "zlib", "dict_samples": 5},
+]
+
+
+@pytest.fixture(params=MIGRATOR_OPTIONS)
+def new_db_path(request, tmp_path, loopchain_reader) -> str:
+    """Migrate blocks in loopchain_reader to a new db with its indexes"""
+    path = str(tmp_path)
+    migrator = open_migrator(path, loopchain_reader, **request.param)
+    try:
+        migrator.run(0, 10)
+    finally:
+        migrator.close()
+
+    return os.path.join(path, "new")
+
+
+def delete_indexes(db_path: str):
+    """Make the db look like the one migrated before indexes were added"""
+    db = open_db(db_path, for_write=True)
+    try:
+        for bucket in (Bucket.BLOCK_HASH, Bucket.TX_HASH):
+            it = db.iterator(prefix=bucket.value, include_value=False)
+            keys = list(it)
+            it.close()
+            for key in keys:
+                db.delete(key)
+    finally:
+        db.close()
+
+
+def run_command(command_class, argv: list):
+    parser = argparse.ArgumentParser()
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument("--db", type=str)
+    command_class(parser.add_subparsers(), common_parser)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+def check_block_hash_index(db_path: str, loopchain_reader, indexed: bool = True):
+    reader = create_block_reader("leveldb")
+    reader.open(db_path)
+    try:
+        for height in range(10):
+            block_hash = loopchain_reader.get_block_hash(height)
+            if not indexed:
+                assert reader.get_block_height_by_hash(block_hash) == -1
+                assert reader.get_block_by_hash(block_hash) is None
+                continue
+
+            assert reader.get_block_height_by_hash(block_hash) == height
+            block = reader.get_block_by_hash(block_hash)
+            assert block.height == height
+            assert block.block_hash == block_hash
+
+        assert reader.get_block_height_by_hash(os.urandom(32)) == -1
+        assert reader.get_block_by_hash(os.urandom(32)) is None
+    finally:
+        reader.close()
+
+
+def check_tx_hash_index(db_path: str, loopchain_reader, indexed: bool = True):
+    reader = create_block_reader("leveldb")
+    reader.open(db_path)
+    try:
+        for height in range(10):
+            block = reader.get_block_by_height(height)
+            tx_hashes = loopchain_reader.get_tx_hashes(height)
+            assert len(tx_hashes) == len(block.transactions) > 0
+
+            for index, tx_hash in enumerate(tx_hashes):
+                if not indexed:
+                    assert reader.get_transaction_index_by_hash(tx_hash) == (-1, -1)
+                    continue
+
+                assert reader.get_transaction_index_by_hash(tx_hash) == (height, index)
+                tx = reader.get_transaction_by_hash(tx_hash)
+                assert tx == block.transactions[index]
+                assert tx["txHash"] == tx_hash
+
+        assert reader.get_transaction_index_by_hash(os.urandom(32)) == (-1, -1)
+        assert reader.get_transaction_by_hash(os.urandom(32)) is None
+    finally:
+        reader.close()
+
+
+def test_make_block_index_entries(loopchain_reader):
+    data: bytes = loopchain_reader.get_block_by_height(3)
+    block = Block.from_loopchain_block(LoopchainBlock.from_bytes(data))
+
+    entries = make_block_index_entries(block)
+
+    assert entries[0] == (
+        Bucket.BLOCK_HASH.value + loopchain_reader.get_block_hash(3),
+        (3).to_bytes(8, "big"),
+    )
+    assert entries[1:] == [
+        (make_tx_hash_key(tx_hash), make_tx_hash_value(3, index))
+        for index, tx_hash in enumerate(loopchain_reader.get_tx_hashes(3))
+    ]
+    assert make_tx_hash_value(3, 1) == (3).to_bytes(8, "big") + (1).to_bytes(4, "big")
+
+
+def test_block_hash_index(new_db_path, loopchain_reader):
+    check_block_hash_index(new_db_path, loopchain_reader)
+
+
+def test_index_command(new_db_path, loopchain_reader):
+    delete_indexes(new_db_path)
+    check_block_hash_index(new_db_path, loopchain_reader, indexed=False)
+    check_tx_hash_index(new_db_path, loopchain_reader, indexed=False)
+
+    run_command(CommandIndex, ["index", "--db", new_db_path])
+    check_block_hash_index(new_db_path, loopchain_reader)
+    check_tx_hash_index(new_db_path, loopchain_reader)
+
+
+def test_tx_hash_index(new_db_path, loopchain_reader):
+    check_tx_hash_index(new_db_path, loopchain_reader)
+
+
+def test_cdb_lookup_by_tx_hash(new_db_path, loopchain_reader, capsys):
+    tx_hash: bytes = loopchain_reader.get_tx_hashes(7)[1]
+
+    argv = ["cdb", "--db", new_db_path, "--tx-hash", f"0x{tx_hash.hex()}"]
+    run_command(CommandCDB, argv)
+    out = capsys.readouterr().out
+    assert "block_height=7 index=1" in out
+
+    delete_indexes(new_db_path)
+    run_command(CommandCDB, argv)
+    assert "transaction not found" in capsys.readouterr().out
@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional
+
+import pytest
+
+from icondbtools.command.command_migrate import CommandMigrate
+from icondbtools.command.command_transactions import CommandTransactions
+from icondbtools.fastsync.block_reader import (
+    Bucket,
+    PROGRESS_KEY,
+    create_block_reader,
+    make_dict_key,
+)
+from icondbtools.libs.transaction_collector import CompactTransactionCollector
+from icondbtools.migrate import block_migrator
+from icondbtools.migrate.block_migrator import BlockMigrator
+from icondbtools.utils import parallel
+
+
+def create_address() -> str:
+    return f"hx{os.urandom(20).hex()}"
+
+
+def create_loopchain_block(height: int, prev_hash: str, tx_count: int = 2) -> dict:
+    transactions = [
+        {
+            "version": "0x3",
+            "from": create_address(),
+            "to": create_address(),
+            "value": hex(i + 1),
+            "stepLimit": "0x100000",
+            "timestamp": hex(1_600_000_000_000_000 + height),
+            "nid": "0x1",
+            "signature": "c2lnbmF0dXJl",
+            "txHash": os.urandom(32).hex(),
+        }
+        for i in range(tx_count)
+    ]
+
+    return {
+        "version": "0.5",
+        "height": hex(height),
+        "hash": f"0x{os.urandom(32).hex()}",
+        "prevHash": f"0x{prev_hash}",
+        "leader": create_address(),
+        "timestamp": hex(1_600_000_000_000_000 + height),
+        "stateHash": f"0x{os.urandom(32).hex()}",
+        "transactions": transactions,
+        "prevVotes": None,
+    }
+
+
+def create_preps_data() -> bytes:
+    preps = [{"id": create_address(), "p2pEndpoint": "1.2.3.4:7100"}]
+    return json.dumps(preps).encode()
+
+
+class FakeLoopchainReader(object):
+    """In-memory loopchain db which can grow between polls
+
+    take_snapshot() freezes the blocks and reps visible to the following reads
+    """
+
+    def __init__(self):
+        self._blocks: List[bytes] = []
+        self._reps: Dict[bytes, bytes] = {}
+        self._snapshot = None
+
+    def grow(self, count: int):
+        for _ in range(count):
+            height = len(self._blocks)
+            prev_hash = "0" * 64
+            if height > 0:
+                prev_hash = json.loads(self._blocks[-1])["hash"][2:]
+            block = create_loopchain_block(height, prev_hash)
+            self._blocks.append(json.dumps(block).encode())
+
+    def add_reps(self) -> bytes:
+        reps_hash = os.urandom(32)
+        self._reps[reps_hash] = create_preps_data()
+        return reps_hash
+
+    def remove(self, height: int):
+        self._blocks[height] = None
+
+    def get_block_hash(self, height: int) -> bytes:
+        return bytes.fromhex(json.loads(self._blocks[height])["hash"][2:])
+
+    def get_tx_hashes(self, height: int) -> List[bytes]:
+        transactions = json.loads(self._blocks[height])["transactions"]
+        return [bytes.fromhex(tx["txHash"]) for tx in transactions]
+
+    def open(self, db_path: str):
+        pass
+
+    def close(self):
+        pass
+
+    def take_snapshot(self):
+        self._snapshot = list(self._blocks), dict(self._reps)
+
+    def release_snapshot(self):
+        self._snapshot = None
+
+    @property
+    def _view(self):
+        return (self._blocks, self._reps) if self._snapshot is None else self._snapshot
+
+    def get_last_block_hash_key(self) -> Optional[bytes]:
+        blocks, _ = self._view
+        return str(len(blocks) - 1).encode() if blocks else None
+
+    def get_last_block(self) -> Optional[bytes]:
+        blocks, _ = self._view
+        return blocks[-1] if blocks else None
+
+    def get_block_by_key(self, key: bytes) -> Optional[bytes]:
+        return self.get_block_by_height(int(key))
+
+    def get_block_by_height(self, height: int) -> Optional[bytes]:
+        blocks, _ = self._view
+        return blocks[height] if 0 <= height < len(blocks) else None
+
+    def iter_blocks(self, start: int, end: int = -1):
+        blocks, _ = self._view
+        end = len(blocks) - 1 if end < 0 else min(end, len(blocks) - 1)
+        for height in range(start, end + 1):
+            # Range scan stops at the first missing block like the real one
+            if blocks[height] is None:
+                return
+            yield height, str(height).encode(), blocks[height]
+
+    def get_reps_data(self) -> Dict[bytes, bytes]:
+        _, reps = self._view
+        return dict(reps)
+
+    def get_transaction_by_key(self, tx_hash_key: bytes) -> Optional[bytes]:
+        # No result is compatible to protocol v3
+        return None
+
+
+@pytest.fixture
+def loopchain_reader() -> FakeLoopchainReader:
+    reader = FakeLoopchainReader()
+    reader.grow(10)
+    reader.add_reps()
+    return reader
+
+
+def open_migrator(
+    path: str, loopchain_reader: FakeLoopchainReader, **kwargs
+) -> BlockMigrator:
+    migrator = BlockMigrator(**kwargs)
+    migrator._block_reader = loopchain_reader
+    migrator.open(os.path.join(path, "loopchain"), os.path.join(path, "new"))
+    return migrator
+
+
+def read_heights(path: str) -> List[int]:
+    reader = create_block_reader("leveldb")
+    reader.open(os.path.join(path, "new"))
+    try:
+        return [block.height for block in reader.iter_blocks(0)]
+    finally:
+        reader.close()
+
+
+def test_follow(tmp_path, monkeypatch, loopchain_reader):
+    path = str(tmp_path)
+    reps_hashes = set(loopchain_reader.get_reps_data())
+
+    def grow():
+        # Blocks and reps are added while follow() waits for the next poll
+        loopchain_reader.grow(15)
+        reps_hashes.add(loopchain_reader.add_reps())
+        yield
+        loopchain_reader.grow(5)
+        yield
+        yield
+        raise KeyboardInterrupt
+
+    polls = grow()
+    monkeypatch.setattr(block_migrator.time, "sleep", lambda _: next(polls))
+
+    migrated_preps = []
+    from_json_bytes = block_migrator.PReps.from_json_bytes
+
+    def count_preps(data: bytes):
+        migrated_preps.append(data)
+        return from_json_bytes(data)
+
+    monkeypatch.setattr(block_migrator.PReps, "from_json_bytes", count_preps)
+
+    migrator = open_migrator(path, loopchain_reader)
+    try:
+        with pytest.raises(KeyboardInterrupt):
+            migrator.follow(migrator.get_resume_height(), interval=0)
+    finally:
+        migrator.close()
+
+    assert read_heights(path) == list(range(30))
+    # Each preps is migrated once, not on every poll
+    assert len(migrated_preps) == len(reps_hashes)
+
+    migrator = open_migrator(path, loopchain_reader)
+    try:
+        assert migrator.get_resume_height() == 30
+        for reps_hash in reps_hashes:
+            key = Bucket.PREPS.value + reps_hash
+            assert migrator._new_db.get(key) is not None
+    finally:
+        migrator.close()
+
+
+def get_progress(migrator: BlockMigrator) -> int:
+    value = migrator._new_db.get(PROGRESS_KEY)
+    return -1 if value is None else int.from_bytes(value, "big")
+
+
+@pytest.mark.parametrize("chunk_size", [0, 4])
+def test_get_resume_height(tmp_path, loopchain_reader, chunk_size):
+    path = str(tmp_path)
+
+    migrator = open_migrator(path, loopchain_reader, chunk_size=chunk_size)
+    try:
+        assert migrator.get_resume_height() == 0
+        migrator.run(0, 6)
+        assert get_progress(migrator) == 5
+        assert migrator.get_resume_height() == 6
+    finally:
+        migrator.close()
+
+    # The last block is used if the new db has no progress marker
+    migrator = open_migrator(path, loopchain_reader, chunk_size=chunk_size)
+    try:
+        migrator._new_db.delete(PROGRESS_KEY)
+        migrator._flushed_height = -1
+        assert migrator.get_resume_height() == 6
+    finally:
+        migrator.close()
+
+
+def test_verify_block(tmp_path, loopchain_reader):
+    path = str(tmp_path)
+
+    migrator = open_migrator(path, loopchain_reader)
+    try:
+        migrator.run(0, 5)
+        migrator._verify_block(4)
+
+        with pytest.raises(ValueError, match="not found in new db"):
+            migrator._verify_block(5)
+    finally:
+        migrator.close()
+
+    # Loopchain db which has different blocks from the ones migrated
+    other_reader = FakeLoopchainReader()
+    other_reader.grow(3)
+    migrator = open_migrator(path, other_reader)
+    try:
+        with pytest.raises(ValueError, match="not found in loopchain db"):
+            migrator._verify_block(4)
+        with pytest.raises(ValueError, match="hash mismatch"):
+            migrator._verify_block(2)
+    finally:
+        migrator.close()
+
+
+def test_progress_marker_not_advanced_over_gap(tmp_path, loopchain_reader):
+    path = str(tmp_path)
+
+    migrator = open_migrator(path, loopchain_reader)
+    try:
+        migrator.run(0, 3)
+        assert get_progress(migrator) == 2
+
+        # Blocks 3 and 4 are skipped
+        migrator.run(5, 3)
+        assert get_progress(migrator) == 2
+        assert migrator.get_resume_height() == 3
+
+        migrator.run(3, 7)
+        assert get_progress(migrator) == 9
+    finally:
+        migrator.close()
+
+    assert read_heights(path) == list(range(10))
+
+
+def test_run_stops_at_missing_block(tmp_path, loopchain_reader):
+    path = str(tmp_path)
+    loopchain_reader.remove(6)
+
+    migrator = open_migrator(path, loopchain_reader)
+    try:
+        with pytest.raises(TypeError, match="BH=6"):
+            migrator.run(0, 10)
+        assert migrator.blocks_done == 6
+    finally:
+        migrator.close()
+
+    assert read_heights(path) == list(range(6))
+
+
+@pytest.mark.parametrize(
+    "options,returncode",
+    [
+        ([], None),
+        (["--end", "9"], None),
+        (["--end", "14"], 1),
+        (["--count", "15"], 1),
+    ],
+)
+def test_migrate_command_range(
+    tmp_path, monkeypatch, capsys, loopchain_reader, options, returncode
+):
+    path = str(tmp_path)
+    monkeypatch.setattr(
+        block_migrator, "BlockDatabaseRawReader", lambda: loopchain_reader
+    )
+
+    parser = argparse.ArgumentParser()
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument("--db", type=str)
+    CommandMigrate(parser.add_subparsers(), common_parser)
+
+    args = parser.parse_args(
+        ["migrate", "--db", os.path.join(path, "loopchain")]
+        + ["--new-db", os.path.join(path, "new"), "--start", "0"]
+        + options
+    )
+    assert args.func(args) == returncode
+    assert read_heights(path) == list(range(10))
+    if returncode is not None:
+        assert "Only 10/15 blocks migrated" in capsys.readouterr().out
+
+
+def test_iter_converted_blocks_with_workers(loopchain_reader):
+    loopchain_reader.grow(40)
+
+    migrator = BlockMigrator()
+    migrator._block_reader = loopchain_reader
+    expected = list(migrator._iter_converted_blocks(0, 50))
+
+    migrator = BlockMigrator(workers=2)
+    migrator._block_reader = loopchain_reader
+    # Spread blocks over several tasks to check the order of results
+    migrator.BLOCKS_PER_TASK = 7
+    converted = list(migrator._iter_converted_blocks(0, 50))
+
+    assert [block.height for block in expected] == list(range(50))
+    assert converted == expected
+
+
+def test_follow_with_workers_keeps_one_pool(tmp_path, monkeypatch, loopchain_reader):
+    path = str(tmp_path)
+
+    def grow():
+        for _ in range(3):
+            loopchain_reader.grow(3)
+            yield
+        raise KeyboardInterrupt
+
+    polls = grow()
+    monkeypatch.setattr(block_migrator.time, "sleep", lambda _: next(polls))
+
+    executors = []
+    process_pool_executor = block_migrator.ProcessPoolExecutor
+
+    def create_executor(*args, **kwargs):
+        executor = process_pool_executor(*args, **kwargs)
+        executors.append(executor)
+        return executor
+
+    monkeypatch.setattr(block_migrator, "ProcessPoolExecutor", create_executor)
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", create_executor)
+
+    migrator = open_migrator(path, loopchain_reader, workers=2)
+    try:
+        with pytest.raises(KeyboardInterrupt):
+            migrator.follow(0, interval=0)
+        assert migrator._executor is None
+    finally:
+        migrator.close()
+
+    assert read_heights(path) == list(range(19))
+    # Every poll converts blocks on the pool created by follow()
+    assert len(executors) == 1
+    assert executors[0]._shutdown_thread
+
+
+@pytest.mark.parametrize("tx_results", [True, False])
+def test_compact_transaction_collector_has_tx_results(
+    tmp_path, capsys, loopchain_reader, tx_results
+):
+    path = str(tmp_path)
+    migrator = open_migrator(path, loopchain_reader, tx_results=tx_results)
+    try:
+        migrator.run(0, 10)
+    finally:
+        migrator.close()
+
+    new_db_path = os.path.join(path, "new")
+    tx_collector = CompactTransactionCollector()
+    tx_collector.open(new_db_path)
+    try:
+        assert tx_collector.has_tx_results == tx_results
+    finally:
+        tx_collector.close()
+
+    if tx_results:
+        return
+
+    parser = argparse.ArgumentParser()
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument("--db", type=str)
+    CommandTransactions(parser.add_subparsers(), common_parser)
+
+    args = parser.parse_args(
+        ["txs", "--db", new_db_path, "--compact", "--start", "0", "--end", "9"]
+        + ["--from", create_address(), "--to", create_address()]
+        + ["--output", os.path.join(path, "txs.txt")]
+    )
+    assert args.func(args) == 1
+    assert CompactTransactionCollector.NO_TX_RESULTS_MESSAGE in capsys.readouterr().out
+
+
+def get_dict_ids(migrator: BlockMigrator) -> List[int]:
+    prefix: bytes = make_dict_key(0)[:-2]
+    it = migrator._new_db.iterator(prefix=prefix, include_value=False)
+    try:
+        return [int.from_bytes(key[-2:], "big") for key in it]
+    finally:
+        it.close()
+
+
+def test_dictionary_reused_on_resume(tmp_path, loopchain_reader):
+    path = str(tmp_path)
+    kwargs = {"compression": "zlib", "dict_samples": 5}
+
+    migrator = open_migrator(path, loopchain_reader, **kwargs)
+    try:
+        migrator.run(0, 5)
+        assert get_dict_ids(migrator) == [1]
+    finally:
+        migrator.close()
+
+    migrator = open_migrator(path, loopchain_reader, **kwargs)
+    try:
+        migrator.run(migrator.get_resume_height(), 5)
+        assert get_dict_ids(migrator) == [1]
+    finally:
+        migrator.close()
+
+    assert read_heights(path) == list(range(10))
+
+
+def test_compression_with_empty_loopchain_db(tmp_path, capsys):
+    path = str(tmp_path)
+
+    migrator = open_migrator(
+        path, FakeLoopchainReader(), compression="zlib", dict_samples=5
+    )
+    try:
+        migrator.run(0, 10)
+        assert migrator.blocks_done == 0
+        assert get_dict_ids(migrator) == []
+    finally:
+        migrator.close()
+
+    assert "no blocks in loopchain db" in capsys.readouterr().out
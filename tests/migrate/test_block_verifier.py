@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+from icondbtools.command.command_verify_cdb import CommandVerifyCDB
+from icondbtools.fastsync.block_reader import Bucket, create_block_reader
+from icondbtools.migrate import block_verifier
+from icondbtools.migrate.block import Block
+from icondbtools.migrate.block_verifier import BlockVerifier, check_block
+from icondbtools.utils.db import open_db
+from .test_block_indexer import run_command
+from .test_block_migrator import loopchain_reader, open_migrator  # noqa: F401
+
+
+@pytest.fixture
+def new_db_path(request, tmp_path, loopchain_reader) -> str:
+    """Compact db migrated from the 10 blocks in loopchain_reader"""
+    path = str(tmp_path)
+    options: dict = getattr(request, "param", {})
+    migrator = open_migrator(path, loopchain_reader, **options)
+    try:
+        migrator.run(0, 10)
+    finally:
+        migrator.close()
+
+    return os.path.join(path, "new")
+
+
+def get_block(db_path: str, height: int) -> Block:
+    reader = create_block_reader("leveldb")
+    reader.open(db_path)
+    try:
+        return reader.get_block_by_height(height)
+    finally:
+        reader.close()
+
+
+def put_block(db_path: str, block: Block):
+    db = open_db(db_path, for_write=True)
+    try:
+        key: bytes = Bucket.BLOCK_HEIGHT.value + block.height.to_bytes(8, "big")
+        db.put(key, block.to_bytes())
+    finally:
+        db.close()
+
+
+def delete_blocks(db_path: str, *heights: int):
+    db = open_db(db_path, for_write=True)
+    try:
+        for height in heights:
+            db.delete(Bucket.BLOCK_HEIGHT.value + height.to_bytes(8, "big"))
+    finally:
+        db.close()
+
+
+def run_verifier(db_path: str, loopchain_reader, *args, **kwargs) -> BlockVerifier:
+    verifier = BlockVerifier(**kwargs)
+    verifier._loopchain_reader = loopchain_reader
+    verifier.open("loopchain", db_path)
+    try:
+        verifier.run(*args)
+    finally:
+        verifier.close()
+
+    return verifier
+
+
+def test_check_block(new_db_path, loopchain_reader):
+    value: bytes = get_block(new_db_path, 3).to_bytes()
+    block_hash: bytes = loopchain_reader.get_block_hash(3)
+
+    check = check_block(3, value, loopchain_reader.get_block_by_height(3))
+    assert check.error is None
+    assert check.block_hash == block_hash
+    assert check.prev_block_hash == loopchain_reader.get_block_hash(2)
+
+    # Not sampled for comparison
+    assert check_block(3, value, None).error is None
+
+    check = check_block(4, value, loopchain_reader.get_block_by_height(4))
+    assert check.error == "Height mismatch: 3"
+
+    check = check_block(3, value, loopchain_reader.get_block_by_height(4))
+    assert check.error.startswith("Block mismatch: ")
+    assert "block_hash" in check.error
+
+
+@pytest.mark.parametrize(
+    "new_db_path",
+    [{}, {"chunk_size": 4, "compression": "zlib", "dict_samples": 5}],
+    indirect=True,
+)
+@pytest.mark.parametrize("step", [1, 3])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run(new_db_path, loopchain_reader, step, workers):
+    verifier = run_verifier(new_db_path, loopchain_reader, step=step, workers=workers)
+
+    assert verifier.errors == []
+    assert verifier.gaps == []
+    assert verifier._blocks == 10
+    assert verifier._blocks_compared == len(range(0, 10, step))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_corrupted_block(new_db_path, loopchain_reader, workers):
+    block: Block = get_block(new_db_path, 4)
+    block.state_hash = os.urandom(32)
+    put_block(new_db_path, block)
+
+    verifier = run_verifier(new_db_path, loopchain_reader, workers=workers)
+
+    assert verifier.errors == ["BH-4: Block mismatch: state_hash"]
+    assert verifier.gaps == []
+
+
+def test_broken_prev_hash_link(new_db_path, loopchain_reader):
+    block: Block = get_block(new_db_path, 6)
+    block.prev_block_hash = os.urandom(32)
+    put_block(new_db_path, block)
+
+    # Block 6 is not compared with loopchain db. Only its link is broken
+    verifier = run_verifier(new_db_path, loopchain_reader, step=4)
+
+    assert verifier.errors == [
+        f"BH-6: prev_block_hash mismatch: {block.prev_block_hash.hex()} != "
+        f"{loopchain_reader.get_block_hash(5).hex()}"
+    ]
+    assert verifier.gaps == []
+
+
+def test_missing_heights(new_db_path, loopchain_reader):
+    delete_blocks(new_db_path, 3, 4, 7)
+
+    verifier = run_verifier(new_db_path, loopchain_reader, 0, 11)
+
+    # Links across gaps are not checked
+    assert verifier.errors == []
+    assert verifier.gaps == [(3, 4), (7, 7), (10, 11)]
+    assert verifier._blocks == 7
+
+    verifier = run_verifier(new_db_path, loopchain_reader, 1, 5)
+    assert verifier.gaps == [(3, 4)]
+    assert verifier._blocks == 3
+
+
+def test_block_missing_in_loopchain_db(new_db_path, loopchain_reader):
+    loopchain_reader.remove(5)
+
+    verifier = run_verifier(new_db_path, loopchain_reader)
+
+    # Blocks after the missing one are still compared
+    assert verifier.errors == ["BH-5: Block not found in loopchain db"]
+    assert verifier._blocks_compared == 9
+
+
+def test_verify_cdb_command(monkeypatch, capsys, new_db_path, loopchain_reader):
+    monkeypatch.setattr(
+        block_verifier, "BlockDatabaseRawReader", lambda: loopchain_reader
+    )
+    argv = ["verify-cdb", "--db", "loopchain", "--cdb", new_db_path, "--workers", "2"]
+
+    assert run_command(CommandVerifyCDB, argv) == 0
+    out = capsys.readouterr().out
+    assert "blocks: 10\n" in out
+    assert "errors: 0\n" in out
+
+    block: Block = get_block(new_db_path, 2)
+    block.prev_block_hash = os.urandom(32)
+    put_block(new_db_path, block)
+    delete_blocks(new_db_path, 8)
+
+    assert run_command(CommandVerifyCDB, argv) == 1
+    out = capsys.readouterr().out
+    assert "BH-2: Block mismatch: prev_block_hash" in out
+    assert "BH-2: prev_block_hash mismatch" in out
+    assert "gap: 8 ~ 8 (1 blocks)" in out
+    assert "errors: 2\n" in out
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+from icondbtools.migrate.chunk import BlockChunk, get_chunk_start
+
+
+def test_chunk_to_bytes_and_from_bytes():
+    first_height = 1000
+    values = [os.urandom(i * 10) for i in range(16)]
+
+    chunk = BlockChunk(first_height, [])
+    for i, value in enumerate(values):
+        chunk.append(first_height + i, value)
+
+    assert len(chunk) == 16
+    assert chunk.first_height == first_height
+    assert chunk.last_height == first_height + 15
+
+    chunk2 = BlockChunk.from_bytes(chunk.to_bytes())
+    assert chunk2.first_height == first_height
+    assert len(chunk2) == len(values)
+    assert list(chunk2) == [(first_height + i, v) for i, v in enumerate(values)]
+
+    # An empty value (i == 0) is kept as it is
+    assert chunk2.get(first_height) == b""
+    assert chunk2.get(first_height + 7) == values[7]
+    assert chunk2.get(first_height - 1) is None
+    assert chunk2.get(first_height + 16) is None
+
+
+def test_empty_chunk():
+    chunk = BlockChunk.from_bytes(BlockChunk(10, []).to_bytes())
+    assert len(chunk) == 0
+    assert 10 not in chunk
+    assert list(chunk) == []
+
+
+def test_append_out_of_sequence():
+    chunk = BlockChunk(0, [b"a"])
+    with pytest.raises(ValueError):
+        chunk.append(2, b"c")
+
+
+@pytest.mark.parametrize(
+    "height,chunk_size,expected",
+    [(0, 100, 0), (99, 100, 0), (100, 100, 100), (12345, 64, 12288)],
+)
+def test_get_chunk_start(height, chunk_size, expected):
+    assert get_chunk_start(height, chunk_size) == expected
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import msgpack
+import pytest
+
+from icondbtools.migrate.codec import (
+    BlockCompressor,
+    BlockDecompressor,
+    Codec,
+    decode_dict_value,
+    encode_dict_value,
+    is_compressed,
+    train_dictionary,
+    zstandard,
+)
+
+
+def create_value(i: int) -> bytes:
+    tx = {
+        "from": f"hx{os.urandom(20).hex()}",
+        "to": f"hx{os.urandom(20).hex()}",
+        "stepLimit": 100_000,
+        "version": 3,
+        "nid": 1,
+        "timestamp": 1_600_000_000_000_000 + i,
+        "dataType": "call",
+        "data": {"method": "transfer", "params": {"_value": hex(i)}},
+    }
+    return msgpack.packb(["0.5", i, [tx] * 5])
+
+
+CODECS = [Codec.ZLIB]
+if zstandard is not None:
+    CODECS.append(Codec.ZSTD)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("use_dict", [True, False])
+def test_compress_and_decompress(codec, use_dict):
+    samples = [create_value(i) for i in range(200)]
+    dict_id = 0
+    dictionary = None
+    dicts = {}
+
+    if use_dict:
+        dict_id = 1
+        dictionary = train_dictionary(codec, samples, dict_size=16 * 1024)
+        dicts[dict_id] = decode_dict_value(encode_dict_value(codec, dictionary))
+
+    compressor = BlockCompressor(codec, dict_id, dictionary)
+    decompressor = BlockDecompressor(dicts.get)
+
+    for i in range(200, 210):
+        value = create_value(i)
+        compressed = compressor.compress(value)
+        assert is_compressed(compressed)
+        assert len(compressed) < len(value)
+        assert compressed[1] == codec
+        assert int.from_bytes(compressed[2:4], "big") == dict_id
+        assert decompressor.decompress(compressed) == value
+
+
+def test_incompressible_value_stays_raw():
+    compressor = BlockCompressor(Codec.ZLIB)
+    value = msgpack.packb(os.urandom(16))
+
+    assert compressor.compress(value) == value
+    assert not is_compressed(value)
+
+    # Values written without compression pass through
+    decompressor = BlockDecompressor(lambda dict_id: None)
+    assert decompressor.decompress(value) == value
+
+
+def test_missing_dictionary():
+    samples = [create_value(i) for i in range(10)]
+    dictionary = train_dictionary(Codec.ZLIB, samples, dict_size=1024)
+    compressor = BlockCompressor(Codec.ZLIB, 3, dictionary)
+    compressed = compressor.compress(create_value(100))
+
+    decompressor = BlockDecompressor(lambda dict_id: None)
+    with pytest.raises(ValueError):
+        decompressor.decompress(compressed)
+
+
+def test_train_dictionary_without_samples():
+    with pytest.raises(ValueError):
+        train_dictionary(Codec.ZLIB, [], dict_size=1024)
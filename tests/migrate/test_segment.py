@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import os
+
+import pytest
+
+from icondbtools.command.command_cdb import CommandCDB
+from icondbtools.fastsync.segment_reader import NO_INDEX_MESSAGE, SegmentBlockReader
+from icondbtools.libs.transaction_collector import CompactTransactionCollector
+from icondbtools.migrate.block import Block
+from icondbtools.migrate.segment import SegmentWriter, get_segment_file_name
+
+
+def create_block(height: int) -> Block:
+    return Block(
+        version="0.5",
+        height=height,
+        timestamp=1_600_000_000_000_000 + height,
+        block_hash=os.urandom(32),
+        prev_block_hash=os.urandom(32),
+        state_hash=os.urandom(32),
+        transactions=[],
+    )
+
+
+def write_blocks(path: str, start: int, count: int, segment_size: int) -> list:
+    blocks = [create_block(height) for height in range(start, start + count)]
+
+    writer = SegmentWriter(segment_size)
+    writer.open(path)
+    for block in blocks:
+        writer.append(block.height, block.to_bytes())
+    writer.close()
+
+    return blocks
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path)
+    blocks = write_blocks(path, start=100, count=50, segment_size=1024)
+
+    # Small segment size makes blocks spread over several segments
+    assert os.path.exists(os.path.join(path, get_segment_file_name(1)))
+
+    reader = SegmentBlockReader()
+    reader.open(path)
+    try:
+        assert reader.get_start_block_height() == 100
+        assert reader.get_end_block_height() == 149
+        assert reader.get_block_by_height(99) is None
+        assert reader.get_block_by_height(150) is None
+
+        for block in blocks:
+            assert reader.get_block_by_height(block.height) == block
+
+        assert list(reader.iter_blocks(120, 124)) == blocks[20:25]
+        assert list(reader.iter_blocks(140)) == blocks[40:]
+    finally:
+        reader.close()
+
+
+def test_append_after_reopen(tmp_path):
+    path = str(tmp_path)
+    blocks = write_blocks(path, start=0, count=10, segment_size=1024)
+
+    writer = SegmentWriter()
+    writer.open(path)
+    assert writer.end_height == 9
+    with pytest.raises(ValueError):
+        writer.append(11, b"")
+
+    block = create_block(10)
+    writer.append(10, block.to_bytes())
+    writer.close()
+
+    reader = SegmentBlockReader()
+    reader.open(path)
+    assert reader.get_end_block_height() == 10
+    assert reader.get_block_by_height(9) == blocks[9]
+    assert reader.get_block_by_height(10) == block
+    reader.close()
+
+
+def test_recover_records_not_flushed(tmp_path):
+    path = str(tmp_path)
+    write_blocks(path, start=0, count=10, segment_size=1024)
+
+    writer = SegmentWriter()
+    writer.open(path)
+    writer.append(10, create_block(10).to_bytes())
+    # Simulate a crash: the meta file is not updated
+    writer._index_file.close()
+    writer._segment_file.close()
+
+    writer2 = SegmentWriter()
+    writer2.open(path)
+    assert writer2.end_height == 9
+
+    block = create_block(10)
+    writer2.append(10, block.to_bytes())
+    writer2.close()
+
+    reader = SegmentBlockReader()
+    reader.open(path)
+    assert reader.get_block_by_height(10) == block
+    reader.close()
+
+
+def test_lookup_by_hash(tmp_path):
+    path = str(tmp_path)
+    blocks = write_blocks(path, start=0, count=3, segment_size=1024)
+
+    reader = SegmentBlockReader()
+    reader.open(path)
+    try:
+        # Segment archive has no hash index and returns what a missing index does
+        assert reader.get_block_by_hash(blocks[0].block_hash) is None
+        assert reader.get_block_height_by_hash(blocks[0].block_hash) == -1
+        assert reader.get_transaction_index_by_hash(os.urandom(32)) == (-1, -1)
+        assert reader.get_transaction_by_hash(os.urandom(32)) is None
+        assert reader.get_transaction_results_by_height(0) is None
+        assert reader.get_transaction_result_by_hash(os.urandom(32)) is None
+    finally:
+        reader.close()
+
+
+@pytest.mark.parametrize("option", ["--block-hash", "--tx-hash"])
+def test_cdb_lookup_by_hash(tmp_path, capsys, option):
+    path = str(tmp_path)
+    write_blocks(path, start=0, count=3, segment_size=1024)
+
+    parser = argparse.ArgumentParser()
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument("--db", type=str)
+    CommandCDB(parser.add_subparsers(), common_parser)
+
+    args = parser.parse_args(
+        ["cdb", "--db", path, "--format", "segment", option, f"0x{'00' * 32}"]
+    )
+    assert args.func(args) == 1
+    assert NO_INDEX_MESSAGE in capsys.readouterr().out
+
+
+def test_compact_transaction_collector(tmp_path):
+    path = str(tmp_path)
+    write_blocks(path, start=0, count=3, segment_size=1024)
+
+    tx_collector = CompactTransactionCollector("segment")
+    tx_collector.open(path)
+    try:
+        assert not tx_collector.has_tx_results
+    finally:
+        tx_collector.close()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+from icondbtools.utils.backup import (
+    backup_dir,
+    list_backups,
+    remove_old_backups,
+)
+
+FILES = {
+    "CURRENT": b"MANIFEST-000002\n",
+    "MANIFEST-000002": b"manifest",
+    "000003.log": b"log",
+    "000004.ldb": b"table" * 100,
+    "sub/000005.sst": b"table" * 10,
+}
+
+
+@pytest.fixture
+def src_path(tmp_path) -> str:
+    path = tmp_path / "src"
+    for name, data in FILES.items():
+        file_path = path / name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(data)
+
+    return str(path)
+
+
+def _read_files(path: str) -> dict:
+    return {name: open(os.path.join(path, name), "rb").read() for name in FILES}
+
+
+def test_backup_dir_with_copy(tmp_path, src_path):
+    dst_path = str(tmp_path / "dst")
+    stats = backup_dir(src_path, dst_path, "copy")
+
+    assert _read_files(dst_path) == FILES
+    assert stats.files_copied == len(FILES)
+    assert stats.bytes_copied == sum(len(data) for data in FILES.values())
+    assert stats.files_linked == 0
+    assert not os.path.samefile(
+        os.path.join(src_path, "000004.ldb"), os.path.join(dst_path, "000004.ldb")
+    )
+
+
+def test_backup_dir_with_hardlink(tmp_path, src_path):
+    dst_path = str(tmp_path / "dst")
+    stats = backup_dir(src_path, dst_path, "hardlink")
+
+    assert _read_files(dst_path) == FILES
+    assert stats.files_linked == 2
+    assert stats.bytes_linked == len(FILES["000004.ldb"]) + len(FILES["sub/000005.sst"])
+    assert stats.files_copied == 3
+    for name in ("000004.ldb", "sub/000005.sst"):
+        assert os.path.samefile(
+            os.path.join(src_path, name), os.path.join(dst_path, name)
+        )
+
+    # A table file deleted by leveldb remains in the backup
+    os.remove(os.path.join(src_path, "000004.ldb"))
+    assert _read_files(dst_path) == FILES
+
+
+def test_backup_dir_with_invalid_mode(tmp_path, src_path):
+    with pytest.raises(ValueError):
+        backup_dir(src_path, str(tmp_path / "dst"), "move")
+
+
+def test_remove_old_backups(tmp_path):
+    for height in (100, 1000, 200, 300):
+        (tmp_path / f"block-{height:09d}").mkdir()
+    (tmp_path / "block-latest").mkdir()
+    (tmp_path / "block-000000050").write_bytes(b"")
+
+    assert list_backups(str(tmp_path), "block-") == [
+        "block-000000100",
+        "block-000000200",
+        "block-000000300",
+        "block-000001000",
+    ]
+
+    removed = remove_old_backups(str(tmp_path), "block-", 2)
+    assert removed == [
+        os.path.join(str(tmp_path), "block-000000100"),
+        os.path.join(str(tmp_path), "block-000000200"),
+    ]
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "block-000000050",
+        "block-000000300",
+        "block-000001000",
+        "block-latest",
+    ]
+
+    with pytest.raises(ValueError):
+        remove_old_backups(str(tmp_path), "block-", 0)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+
+import pytest
+
+from icondbtools.utils.db import DBOptions, ReadOnlyDB, add_db_arguments
+
+
+def test_db_options_to_kwargs():
+    options = DBOptions()
+    assert options.to_kwargs() == {"bloom_filter_bits": 0, "compression": "snappy"}
+
+    options = DBOptions(
+        lru_cache_size=64 * 1024 * 1024,
+        bloom_filter_bits=10,
+        max_open_files=500,
+        compression="none",
+    )
+    assert options.to_kwargs() == {
+        "bloom_filter_bits": 10,
+        "compression": None,
+        "lru_cache_size": 64 * 1024 * 1024,
+        "max_open_files": 500,
+    }
+
+
+def test_db_options_from_args():
+    parser = argparse.ArgumentParser()
+    add_db_arguments(parser)
+
+    args = parser.parse_args(
+        ["--db-bloom-filter-bits", "10", "--db-block-size", "16384", "--db-read-only"]
+    )
+    options = DBOptions.from_args(args)
+    assert options.bloom_filter_bits == 10
+    assert options.block_size == 16384
+    assert options.read_only
+
+    # Commands which have no db arguments
+    options = DBOptions.from_args(argparse.Namespace())
+    assert options.to_kwargs() == DBOptions().to_kwargs()
+    assert not options.read_only
+
+
+def test_invalid_compression():
+    with pytest.raises(ValueError):
+        DBOptions(compression="zlib")
+
+
+def test_read_only_db():
+    class DictDB(dict):
+        def put(self, key, value):
+            self[key] = value
+
+        def prefixed_db(self, prefix):
+            return DictDB({k: v for k, v in self.items() if k.startswith(prefix)})
+
+    db = ReadOnlyDB(DictDB(a=1))
+    assert db.get("a") == 1
+    assert list(db) == ["a"]
+
+    with pytest.raises(PermissionError):
+        db.put("b", 2)
+
+    sub_db = db.prefixed_db("a")
+    assert sub_db.get("a") == 1
+    with pytest.raises(PermissionError):
+        sub_db.put("ab", 2)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+from icondbtools.utils.external_sort import external_sort
+
+
+@pytest.mark.parametrize("size", [0, 1, 9, 10, 11, 1000])
+@pytest.mark.parametrize("run_size", [1, 10, 100_000])
+def test_external_sort(size, run_size):
+    items = [(random.randrange(100), i) for i in range(size)]
+
+    assert list(external_sort(items, key=lambda x: x[0], run_size=run_size)) == sorted(
+        items, key=lambda x: x[0]
+    )
+
+
+def test_external_sort_with_invalid_run_size():
+    with pytest.raises(ValueError):
+        list(external_sort([1], key=lambda x: x, run_size=0))
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+
+import pytest
+
+from icondbtools.utils.json_stream import JsonObjectWriter, iter_json_object
+
+DATA = {
+    "hx0000000000000000000000000000000000000001": 12345678901234567890,
+    "hx0000000000000000000000000000000000000002": "0x1f",
+    "hx0000000000000000000000000000000000000003": [1, {"a": "b\n,}"}],
+    "hx0000000000000000000000000000000000000004": None,
+    "hx0000000000000000000000000000000000000005": -2.5e-7,
+    "hx0000000000000000000000000000000000000006": {},
+}
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("buffer_size", [1, 3, 64, 64 * 1024])
+def test_iter_json_object(indent, buffer_size):
+    fp = io.StringIO(json.dumps(DATA, indent=indent))
+    assert list(iter_json_object(fp, buffer_size)) == list(DATA.items())
+
+
+def test_iter_json_object_with_number_split_by_buffer():
+    fp = io.StringIO('{"a": 123.5e2}')
+    assert list(iter_json_object(fp, 1)) == [("a", 123.5e2)]
+
+
+@pytest.mark.parametrize("text", [" {} ", "{\n}"])
+def test_iter_json_object_with_empty_object(text):
+    assert list(iter_json_object(io.StringIO(text))) == []
+
+
+@pytest.mark.parametrize("text", ["", "[1]", '{"a": 1', '{"a" 1}', '{"a": 1,}', "{1: 2}"])
+def test_iter_json_object_with_invalid_json(text):
+    with pytest.raises(ValueError):
+        list(iter_json_object(io.StringIO(text), 1))
+
+
+def test_json_object_writer():
+    data = {
+        "blockHeight": 100,
+        "status": {"totalSupply": 1, "events": [{"a": 1}, []]},
+        "empty": {},
+        "accounts": DATA,
+    }
+
+    fp = io.StringIO()
+    writer = JsonObjectWriter(fp, indent=2)
+    writer.write("blockHeight", data["blockHeight"])
+    writer.write("status", data["status"])
+    writer.begin_object("empty").close()
+    accounts_writer = writer.begin_object("accounts")
+    for key, value in DATA.items():
+        accounts_writer.write(key, value)
+    accounts_writer.close()
+    writer.close()
+
+    assert fp.getvalue() == json.dumps(data, indent=2)
+
+
+def test_json_object_writer_with_fragments():
+    fragments = []
+    for shard in ({}, dict(list(DATA.items())[:2]), {}, dict(list(DATA.items())[2:])):
+        fp = io.StringIO()
+        writer = JsonObjectWriter(fp, indent=2, level=1, fragment=True)
+        for key, value in shard.items():
+            writer.write(key, value)
+        writer.close()
+        fp.seek(0)
+        fragments.append((fp, writer.members))
+
+    fp = io.StringIO()
+    writer = JsonObjectWriter(fp, indent=2)
+    writer.write("blockHeight", 100)
+    accounts_writer = writer.begin_object("accounts")
+    for fragment, members in fragments:
+        accounts_writer.copy_members(fragment, members)
+    accounts_writer.close()
+    writer.close()
+
+    assert fp.getvalue() == json.dumps({"blockHeight": 100, "accounts": DATA}, indent=2)
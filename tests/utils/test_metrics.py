@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+
+import pytest
+
+from icondbtools.utils.metrics import Histogram, StageMetrics
+
+
+def test_histogram():
+    h = Histogram()
+    assert h.count == 0
+    assert h.percentile(50) == 0.0
+
+    for i in range(1, 1001):
+        h.add(i / 1000)
+
+    assert h.count == 1000
+    assert h.sum == pytest.approx(500.5)
+    assert h.min == pytest.approx(0.001)
+    assert h.max == pytest.approx(1.0)
+
+    for p in (50, 90, 99):
+        assert h.percentile(p) == pytest.approx(p / 100, rel=0.05)
+    assert h.percentile(100) == h.max
+
+
+def test_histogram_with_tiny_duration():
+    h = Histogram()
+    h.add(0.0)
+    h.add(1e-9)
+
+    assert h.count == 2
+    assert h.percentile(100) == pytest.approx(1e-9)
+
+
+def test_stage_metrics():
+    metrics = StageMetrics(("read", "invoke"))
+
+    metrics.begin_block(10)
+    metrics.record("read", 0.1)
+    metrics.record("read", 0.2)
+    with metrics.measure("invoke"):
+        pass
+    metrics.end_block()
+
+    assert metrics.blocks == 1
+    assert metrics.get_histogram("read").count == 1
+    assert metrics.get_histogram("read").sum == pytest.approx(0.3)
+    assert metrics.get_histogram("invoke").count == 1
+
+    with pytest.raises(KeyError):
+        metrics.record("commit", 0.1)
+
+    lines = metrics.summary().splitlines()
+    assert len(lines) == 3
+    assert lines[1].startswith("read")
+
+
+@pytest.mark.parametrize("filename", ["metrics.jsonl", "metrics.csv"])
+def test_stage_metrics_dump(tmp_path, filename):
+    path = str(tmp_path / filename)
+    metrics = StageMetrics(("read", "invoke"), path)
+    metrics.open()
+
+    for height in range(3):
+        metrics.begin_block(height)
+        metrics.record("read", 0.5)
+        metrics.end_block()
+    metrics.close()
+
+    with open(path) as f:
+        if filename.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+            assert [int(row["height"]) for row in rows] == [0, 1, 2]
+            assert all(float(row["read"]) == 0.5 for row in rows)
+            assert all(float(row["invoke"]) == 0.0 for row in rows)
+        else:
+            rows = [json.loads(line) for line in f]
+            assert rows == [{"height": height, "read": 0.5} for height in range(3)]
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from icondbtools.utils.parallel import batched, imap_ordered
+
+
+def square_all(items: list) -> list:
+    return [item * item for item in items]
+
+
+@pytest.mark.parametrize(
+    "size,expected",
+    [(1, [[0], [1], [2], [3], [4]]), (2, [[0, 1], [2, 3], [4]]), (5, [[0, 1, 2, 3, 4]])],
+)
+def test_batched(size, expected):
+    assert list(batched(range(5), size)) == expected
+
+
+def test_batched_with_invalid_size():
+    with pytest.raises(ValueError):
+        list(batched(range(5), 0))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_imap_ordered(workers):
+    tasks = batched(range(1000), 7)
+    results = [x for ret in imap_ordered(square_all, tasks, workers) for x in ret]
+    assert results == [x * x for x in range(1000)]
+
+
+_offset = 0
+
+
+def set_offset(offset: int):
+    global _offset
+    _offset = offset
+
+
+def add_offset(item: int) -> int:
+    return item + _offset
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_imap_ordered_with_initializer(workers):
+    try:
+        results = list(
+            imap_ordered(add_offset, range(100), workers, set_offset, (1000,))
+        )
+        assert results == [x + 1000 for x in range(100)]
+    finally:
+        set_offset(0)
+
+
+def test_imap_ordered_with_executor():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        for _ in range(3):
+            tasks = batched(range(100), 7)
+            results = [
+                x
+                for ret in imap_ordered(square_all, tasks, 2, executor=executor)
+                for x in ret
+            ]
+            assert results == [x * x for x in range(100)]
+
+        # The pool is left open for the next call
+        assert executor.submit(square_all, [3]).result() == [9]